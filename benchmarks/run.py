@@ -0,0 +1,316 @@
+"""
+Offline end-to-end benchmark: recorded audio (or text prompts) -> STT -> stub LLM -> TTS (null sink).
+
+    python -m benchmarks.run --audio-dir recordings/            # full pipeline, WAV files fed to Whisper
+    python -m benchmarks.run --prompts prompts.txt              # LLM + TTS only, one prompt per line
+    python -m benchmarks.run --audio-dir recordings/ --compare benchmarks/results/<previous>.json
+
+Results are written as JSON to --out (default benchmarks/results/) named by timestamp and commit.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy
+
+import main as app
+from benchmarks.stub_llm import DEFAULT_REPLY, StubConfig, StubLLMServer
+from src.config import Settings, get_settings
+from src.memory_manager import MemoryManager
+from src.metrics import TurnMetrics
+from src.recall import HashingEmbedder, RecallIndex, VectorIndex
+from src.session_logger import SessionLogger
+from src.tts_engine import TtsEngine
+
+DEFAULT_PROMPTS = [
+    "Good morning, how are you today?",
+    "I have a job interview this afternoon and I'm a bit nervous.",
+    "Can you remind me what we talked about yesterday?",
+    "What is a good way to wind down before sleep?",
+    "Thanks, that helps. Talk to you later.",
+]
+
+
+class BenchmarkDone(Exception):
+    """Raised by the scripted recorders once every input has been consumed."""
+
+
+class FeedingRecorder:
+    """Wraps an AudioToTextRecorder (use_microphone=False) and feeds it one WAV file per text() call."""
+
+    def __init__(self, recorder: Any, files: Sequence[Path], speed: float = 1.0, trailing_silence: float = 1.5):
+        self._recorder = recorder
+        self._files = list(files)
+        self._speed = speed
+        self._trailing_silence = trailing_silence
+        self.speech_seconds = 0.0
+
+    def __enter__(self) -> "FeedingRecorder":
+        self._recorder.__enter__()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._recorder.__exit__(*exc)
+
+    def text(self) -> Optional[str]:
+        if not self._files:
+            raise BenchmarkDone
+        path = self._files.pop(0)
+        threading.Thread(target=self._feed, args=(path,), name="bench-feed", daemon=True).start()
+        return self._recorder.text()
+
+    def _feed(self, path: Path) -> None:
+        with wave.open(str(path), "rb") as wav:
+            rate, channels = wav.getframerate(), wav.getnchannels()
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16-bit PCM")
+            samples = numpy.frombuffer(wav.readframes(wav.getnframes()), dtype=numpy.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(numpy.int16)
+        self.speech_seconds += len(samples) / rate
+        silence = numpy.zeros(int(rate * self._trailing_silence), dtype=numpy.int16)
+        block = 1024
+        # Fed at (a multiple of) real time so the recorder's VAD timing behaves as with a microphone.
+        for audio in (samples, silence):
+            for start in range(0, len(audio), block):
+                chunk = audio[start : start + block]
+                self._recorder.feed_audio(chunk.tobytes(), original_sample_rate=rate)
+                time.sleep(len(chunk) / rate / self._speed)
+
+
+class ScriptedRecorder:
+    """Returns one text prompt per text() call (no STT)."""
+
+    def __init__(self, prompts: Sequence[str]):
+        self._prompts = list(prompts)
+
+    def __enter__(self) -> "ScriptedRecorder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def text(self) -> Optional[str]:
+        if not self._prompts:
+            raise BenchmarkDone
+        return self._prompts.pop(0)
+
+
+def bench_settings(base: Settings, endpoint: str, workdir: Path, tts_cache: bool) -> Settings:
+    tts_enabled = base.tts_enabled and bool(base.tts_voice_path) and Path(base.tts_voice_path).exists()
+    if base.tts_enabled and not tts_enabled:
+        print(f"[BENCH] Piper voice not found at {base.tts_voice_path!r}; TTS is skipped.", file=sys.stderr)
+    return dataclasses.replace(
+        base,
+        llm_endpoint=endpoint,
+        llm_model="stub",
+        rtstt_use_microphone=False,
+        tts_enabled=tts_enabled,
+        tts_null_sink=True,
+        tts_archive_format="",
+        tts_cache_enabled=tts_cache,
+        tts_cache_dir=str(workdir / "tts_cache"),
+        session_logs_dir=str(workdir / "session_logs"),
+        summary_background=False,
+        recall_enabled=False,
+        metrics_prometheus_path="",
+        metrics_port=0,
+    )
+
+
+def run_conversation(settings: Settings, workdir: Path, audio_files: Sequence[Path], prompts: Sequence[str], speed: float) -> Dict[str, Any]:
+    """Drive transcribe_loop over the inputs and return the per-stage latency summary."""
+    llm_client = app.build_llm_client(settings)
+    logger = SessionLogger(directory=settings.session_logs_dir)
+    tts_engine = TtsEngine(settings)
+    memory_manager = MemoryManager(settings, session_id="bench", db_path=workdir / "memory.db")
+    metrics = TurnMetrics()
+    recorder: Any
+    speech_seconds = 0.0
+    try:
+        app.warm_up_tts(tts_engine)
+        if audio_files:
+            inner = app.build_recorder(
+                settings,
+                on_recording_start=metrics.speech.started,
+                on_recording_stop=lambda: metrics.speech.ended(settings.rtstt_post_speech_silence),
+            )
+            recorder = FeedingRecorder(inner, audio_files, speed=speed)
+        else:
+            recorder = ScriptedRecorder(prompts)
+        with recorder:
+            try:
+                app.transcribe_loop(recorder, llm_client, logger, tts_engine, memory_manager, settings, metrics=metrics)
+            except BenchmarkDone:
+                pass
+        if isinstance(recorder, FeedingRecorder):
+            speech_seconds = recorder.speech_seconds
+    finally:
+        tts_engine.close()
+        llm_client.close()
+        logger.close()
+        memory_manager.store.close()
+    summary = metrics.summary()
+    summary["speech_seconds"] = speech_seconds
+    if tts_engine.cache is not None:
+        summary["tts_cache"] = tts_engine.cache.stats()
+    return summary
+
+
+def run_memory_growth(settings: Settings, workdir: Path, sizes: Sequence[int], with_recall: bool, repeats: int = 20) -> List[Dict[str, Any]]:
+    """Cost of recording a turn and assembling a prompt as the stored history grows."""
+    manager = MemoryManager(settings, session_id="growth", db_path=workdir / "growth.db")
+    manager.set_system_prompt("You are a kind and attentive conversational partner.")
+    if with_recall:
+        manager.recall = RecallIndex(manager.store, HashingEmbedder(), workdir)
+    results: List[Dict[str, Any]] = []
+    stored = 0
+    try:
+        for size in sorted(sizes):
+            record_times: List[float] = []
+            while stored < size:
+                started = time.perf_counter()
+                manager.record_turn(f"Question number {stored} about my day and plans.", DEFAULT_REPLY)
+                record_times.append(time.perf_counter() - started)
+                stored += 1
+            build_times: List[float] = []
+            for i in range(repeats):
+                started = time.perf_counter()
+                manager.build_context(f"Follow-up question {i} about the plans we made.")
+                build_times.append(time.perf_counter() - started)
+            results.append(
+                {
+                    "turns": size,
+                    "record_turn_ms": statistics.mean(record_times[-100:]) * 1000 if record_times else None,
+                    "build_context_ms": statistics.median(build_times) * 1000,
+                    "recall": with_recall,
+                }
+            )
+    finally:
+        manager.store.close()
+    return results
+
+
+def run_recall_search(workdir: Path, sizes: Sequence[int], dim: int = 384, repeats: int = 20) -> List[Dict[str, Any]]:
+    """Median top-k search time of the recall vector index at each size (random unit vectors)."""
+    rng = numpy.random.default_rng(0)
+    results: List[Dict[str, Any]] = []
+    for size in sorted(sizes):
+        vectors = rng.standard_normal((size, dim)).astype(numpy.float32)
+        vectors /= numpy.linalg.norm(vectors, axis=1, keepdims=True)
+        directory = workdir / f"recall-{size}"
+        directory.mkdir()
+        index = VectorIndex(directory, "bench")
+        index.append(list(range(1, size + 1)), vectors)
+        times: List[float] = []
+        for i in range(repeats):
+            started = time.perf_counter()
+            index.search(vectors[(i * 7919) % size], 3)
+            times.append(time.perf_counter() - started)
+        results.append({"vectors": size, "dim": dim, "search_ms": statistics.median(times) * 1000})
+        del index, vectors
+    return results
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "", "dirty": False}
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """p50/p95 per stage of two result files, with the relative change."""
+    lines = [f"Compared with {previous.get('commit') or 'previous run'}:"]
+    old_stages = previous.get("conversation", {}).get("stages", {})
+    for stage, stats in current.get("conversation", {}).get("stages", {}).items():
+        old = old_stages.get(stage)
+        if not old:
+            continue
+        cells = []
+        for p in ("p50", "p95"):
+            change = (stats[p] - old[p]) / old[p] * 100 if old[p] else 0.0
+            cells.append(f"{p} {old[p]:.3f} -> {stats[p]:.3f} ({change:+.1f}%)")
+        lines.append(f"  {stage:<16} " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark")
+    parser.add_argument("--audio-dir", type=Path, help="directory of 16-bit WAV utterances, fed through Whisper")
+    parser.add_argument("--prompts", type=Path, help="text prompts, one per line (used when no audio is given)")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio feed rate as a multiple of real time")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--tts-cache", action="store_true", help="leave the TTS cache on (off by default)")
+    parser.add_argument("--history-sizes", default="100,1000,5000", help="stored turns at which to time memory ops")
+    parser.add_argument("--recall", action="store_true", help="include long-term recall in the memory timings")
+    parser.add_argument("--recall-index-sizes", default="10000,200000", help="vector counts at which to time recall search (empty to skip)")
+    parser.add_argument("--out", type=Path, default=Path("benchmarks/results"))
+    parser.add_argument("--compare", type=Path, help="earlier result JSON to compare against")
+    args = parser.parse_args(argv)
+
+    audio_files = sorted(args.audio_dir.glob("*.wav")) if args.audio_dir else []
+    if args.audio_dir and not audio_files:
+        parser.error(f"no .wav files in {args.audio_dir}")
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        prompts = [line.strip() for line in args.prompts.read_text(encoding="utf-8").splitlines() if line.strip()]
+    stub_config = StubConfig(args.tokens_per_second, args.first_token_delay)
+
+    with tempfile.TemporaryDirectory(prefix="sottovoce-bench-") as tmp, StubLLMServer(stub_config) as stub:
+        workdir = Path(tmp)
+        settings = bench_settings(get_settings(), stub.endpoint, workdir, args.tts_cache)
+        conversation = run_conversation(settings, workdir, audio_files, prompts, args.speed)
+        sizes = [int(s) for s in args.history_sizes.split(",") if s.strip()]
+        memory = run_memory_growth(settings, workdir, sizes, args.recall)
+        recall_search = run_recall_search(workdir, [int(s) for s in args.recall_index_sizes.split(",") if s.strip()])
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "inputs": {"audio_files": len(audio_files), "prompts": 0 if audio_files else len(prompts)},
+        "config": {
+            "stub": dataclasses.asdict(stub_config),
+            "rtstt_model": settings.rtstt_model,
+            "rtstt_compute_type": settings.rtstt_compute_type,
+            "llm_stream": settings.llm_stream,
+            "tts_enabled": settings.tts_enabled,
+            "tts_cache": args.tts_cache,
+        },
+        "conversation": conversation,
+        "memory": memory,
+        "recall_search": recall_search,
+    }
+    args.out.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out_path = args.out / f"{stamp}-{result['commit'] or 'nogit'}.json"
+    out_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    print(f"[BENCH] Results written to {out_path}")
+    for stage, stats in conversation["stages"].items():
+        print(f"  {stage:<16} p50 {stats['p50']:.3f}  p95 {stats['p95']:.3f}  (n={stats['count']})")
+    for row in memory:
+        print(f"  memory @ {row['turns']:>6} turns: record {row['record_turn_ms']:.2f}ms, build {row['build_context_ms']:.2f}ms")
+    for row in recall_search:
+        print(f"  recall search @ {row['vectors']:>7} vectors: {row['search_ms']:.2f}ms")
+    if args.compare:
+        print(compare(json.loads(args.compare.read_text(encoding="utf-8")), result))
+
+
+if __name__ == "__main__":
+    main()
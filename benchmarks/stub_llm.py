@@ -0,0 +1,155 @@
+"""
+Local OpenAI-compatible stub server with a controllable first-token delay and token rate.
+
+    python -m benchmarks.stub_llm --port 8099 --tokens-per-second 30 --first-token-delay 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from src.token_counter import estimate_tokens
+
+DEFAULT_REPLY = (
+    "That sounds like a lovely plan. Take it one step at a time, and remember to rest when you need to. "
+    "Is there anything in particular you would like to talk through before you start?"
+)
+
+
+@dataclass
+class StubConfig:
+    tokens_per_second: float = 30.0
+    first_token_delay: float = 0.3
+    reply: str = DEFAULT_REPLY
+
+
+def _tokens(text: str) -> List[str]:
+    # Word-sized deltas (leading space kept), like most servers emit.
+    words = text.split(" ")
+    return [words[0]] + [f" {w}" for w in words[1:]]
+
+
+class StubLLMServer:
+    """Serves /v1/chat/completions (streaming and not) and /v1/models on a background thread."""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.requests = 0
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if not self.path.rstrip("/").endswith("/models"):
+                    self.send_error(404)
+                    return
+                self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests += 1
+                prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in payload.get("messages", []))
+                reply = stub.config.reply
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": estimate_tokens(reply),
+                    "total_tokens": prompt_tokens + estimate_tokens(reply),
+                }
+                if payload.get("stream"):
+                    self._stream(reply, usage)
+                    return
+                time.sleep(stub.config.first_token_delay + len(_tokens(reply)) / stub.config.tokens_per_second)
+                self._send_json(
+                    {
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                        "usage": usage,
+                    }
+                )
+
+            def _stream(self, reply: str, usage: Dict[str, Any]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(stub.config.first_token_delay)
+                interval = 1.0 / stub.config.tokens_per_second
+                for token in _tokens(reply):
+                    self._chunk({"choices": [{"index": 0, "delta": {"content": token}}]})
+                    time.sleep(interval)
+                self._chunk({"choices": [], "usage": usage})
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _chunk(self, data: Dict[str, Any]) -> None:
+                self._write_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+            def _write_chunk(self, body: bytes) -> None:
+                self.wfile.write(f"{len(body):x}\r\n".encode("ascii") + body + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, data: Dict[str, Any]) -> None:
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "StubLLMServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--tokens-per-second", type=float, default=30.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    args = parser.parse_args()
+    server = StubLLMServer(StubConfig(args.tokens_per_second, args.first_token_delay, args.reply), args.host, args.port)
+    print(f"Stub LLM listening on {server.endpoint}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
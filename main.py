@@ -1,19 +1,45 @@
 from __future__ import annotations
 
+import argparse
+import dataclasses
+import inspect
+import os
 import sys
-from typing import Optional, Protocol, runtime_checkable
-from pathlib import Path
+import threading
+import time
 
-from src.filteredWarnings import suppress_noisy_warnings
+_PROCESS_STARTED = time.perf_counter()
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Protocol, Sequence, runtime_checkable  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from src.filteredWarnings import suppress_noisy_warnings  # noqa: E402
 # Apply warning filters before importing libraries that emit noisy warnings.
 suppress_noisy_warnings()
-from RealtimeSTT import AudioToTextRecorder  # pyright: ignore[reportMissingTypeStubs]  # noqa: E402
 
 from src.config import Settings, get_settings  # noqa: E402
-from src.llm_client import LLMClient, LLMConfig # noqa: E402
-from src.memory_manager import MemoryManager  # noqa: E402
+from src.llm_client import LLMClient, LLMConfig, Prompt # noqa: E402
+from src.endpointing import AdaptiveEndpointer  # noqa: E402
+from src.fillers import FillerPool, PendingFiller, parse_phrases  # noqa: E402
+from src.metrics import TurnMetrics, TurnTimer  # noqa: E402
+from src.pipeline import ConversationPipeline, apply_context_limits  # noqa: E402
+from src.profiler import SamplingProfiler, set_stage  # noqa: E402
+from src.sentence_segmenter import SentenceSegmenter  # noqa: E402
+from src.speculation import SpeculativeResponder  # noqa: E402
 from src.session_logger import SessionLogger # noqa: E402
-from src.tts_engine import TtsEngine # noqa: E402
+from src.startup import format_breakdown, run_parallel  # noqa: E402
+from src.summariser import BackgroundSummariser  # noqa: E402
+from src.tts_engine import SpeechQueue, TtsEngine # noqa: E402
+
+if TYPE_CHECKING:
+    from src.history_store import HistoryStore
+    from src.memory_manager import MemoryManager
+    from src.recall import RecallIndex
+    from src.search_index import SearchIndex
+
+# RealtimeSTT pulls in torch and faster-whisper; it is imported by build_recorder, on a startup
+# worker thread, rather than at module load.
+AudioToTextRecorder: Any = None
 
 @runtime_checkable
 class RecorderProtocol(Protocol):
@@ -31,14 +57,59 @@ class RecorderProtocol(Protocol):
     ) -> None: ...
 
 
-def build_recorder(settings: Settings) -> RecorderProtocol:
-    """Create a recorder configured from Settings."""
+def build_recorder(
+    settings: Settings,
+    on_recording_start: Optional[Callable[[], None]] = None,
+    on_recording_stop: Optional[Callable[[], None]] = None,
+    on_partial: Optional[Callable[[str], None]] = None,
+    on_partial_update: Optional[Callable[[str], None]] = None,
+) -> RecorderProtocol:
+    """
+    Create a recorder configured from Settings (this loads the Whisper model).
+    on_partial / on_partial_update turn on realtime transcription and receive the stabilised /
+    latest partial text.
+    """
+    global AudioToTextRecorder
+    if AudioToTextRecorder is None:
+        from RealtimeSTT import AudioToTextRecorder as recorder_cls  # pyright: ignore[reportMissingTypeStubs]
+
+        AudioToTextRecorder = recorder_cls
+    threads: Dict[str, Any] = {}
+    if settings.rtstt_cpu_threads > 0:
+        # Handed to the Whisper model by releases that take it; never via os.environ, which this
+        # startup worker thread would be racing every other thread's getenv on.
+        parameters = inspect.signature(AudioToTextRecorder).parameters
+        if "cpu_threads" in parameters or any(p.kind is p.VAR_KEYWORD for p in parameters.values()):
+            threads["cpu_threads"] = settings.rtstt_cpu_threads
+        else:
+            print("[SYSTEM] RTSTT_CPU_THREADS ignored: this RealtimeSTT release does not take a thread count.", file=sys.stderr)
+    realtime: Dict[str, Any] = {}
+    if on_partial is not None or on_partial_update is not None:
+        realtime = {
+            "enable_realtime_transcription": True,
+            "realtime_model_type": settings.rtstt_realtime_model,
+            "realtime_processing_pause": settings.rtstt_realtime_pause,
+            "on_realtime_transcription_stabilized": on_partial,
+            "on_realtime_transcription_update": on_partial_update,
+        }
     recorder: RecorderProtocol = AudioToTextRecorder(
         model=settings.rtstt_model,
         compute_type=settings.rtstt_compute_type,
         language=settings.rtstt_language,
         use_microphone=settings.rtstt_use_microphone,
-        no_log_file=True
+        on_recording_start=on_recording_start,
+        on_recording_stop=on_recording_stop,
+        silero_sensitivity=settings.rtstt_silero_sensitivity,
+        silero_deactivity_detection=settings.rtstt_silero_deactivity,
+        webrtc_sensitivity=settings.rtstt_webrtc_sensitivity,
+        post_speech_silence_duration=settings.rtstt_post_speech_silence,
+        min_length_of_recording=settings.rtstt_min_recording_seconds,
+        min_gap_between_recordings=settings.rtstt_min_gap_seconds,
+        pre_recording_buffer_duration=settings.rtstt_pre_recording_buffer,
+        early_transcription_on_silence=settings.rtstt_early_transcription_on_silence,
+        no_log_file=True,
+        **realtime,
+        **threads,
     )
     return recorder
 
@@ -49,10 +120,167 @@ def build_llm_client(settings: Settings) -> LLMClient:
         endpoint=settings.llm_endpoint,
         model=settings.llm_model,
         timeout=settings.llm_timeout,
+        connect_timeout=settings.llm_connect_timeout,
+        pool_size=settings.llm_pool_size,
+        max_retries=settings.llm_max_retries,
+        retry_backoff=settings.llm_retry_backoff,
+        cache_prompt=settings.llm_cache_prompt,
+        hedge_after=settings.llm_hedge_after,
+        health_interval=settings.llm_health_interval,
+        summary_model=settings.llm_summary_model,
     )
     return LLMClient(cfg)
 
 
+def configure_system_prompt(llm_client: LLMClient, settings: Settings) -> None:
+    """PROMPT.md (if present) followed by the conversational instruction."""
+    prompt_path = Path("PROMPT.md")
+    system_prompt_parts = []
+    if prompt_path.exists():
+        llm_client.load_system_prompt(prompt_path)
+        system_prompt_parts.append(llm_client.system_prompt or "")
+    system_prompt_parts.append(settings.llm_prompt_conversational)
+    combined_prompt = "\n\n".join([p for p in system_prompt_parts if p.strip()])
+    if combined_prompt:
+        llm_client.system_prompt = combined_prompt
+
+
+def build_recall_index(settings: Settings, store: HistoryStore, llm_client: LLMClient) -> RecallIndex:
+    """Long-term recall over every stored session, embedded locally or via an embeddings endpoint."""
+    from src.recall import EndpointEmbedder, HashingEmbedder, RecallIndex
+
+    if settings.recall_embedding_endpoint:
+        embedder = EndpointEmbedder(
+            settings.recall_embedding_endpoint,
+            settings.recall_embedding_model or settings.llm_model,
+            session=llm_client.session,
+            timeout=settings.llm_timeout,
+        )
+    else:
+        embedder = HashingEmbedder()
+    return RecallIndex(
+        store,
+        embedder,
+        store.db_path.parent,
+        min_score=settings.recall_min_score,
+    )
+
+
+def build_memory_manager(settings: Settings, session_id: str, llm_client: LLMClient) -> MemoryManager:
+    """Open the history DB, warm the recent-message cache and (if enabled) sync long-term recall."""
+    from src.memory_manager import MemoryManager
+
+    memory_manager = MemoryManager(settings, session_id=session_id)
+    memory_manager.set_system_prompt(llm_client.system_prompt or "")
+    memory_manager.history.tail(memory_manager.window)
+    if settings.recall_enabled:
+        recall = build_recall_index(settings, memory_manager.store, llm_client)
+        indexed = recall.sync()
+        print(f"[SYSTEM] Recall index: {recall.index.size} turns ({indexed} new).")
+        memory_manager.recall = recall
+    return memory_manager
+
+
+def open_search_index(settings: Settings) -> Optional[SearchIndex]:
+    """The full-text index turns are added to as they happen (None when SEARCH_INDEX_PATH is empty)."""
+    if not settings.search_index_path:
+        return None
+    from src.search_index import SearchIndex
+
+    return SearchIndex(Path(settings.search_index_path))
+
+
+def start_profiler(
+    metrics: TurnMetrics, turns: int, interval: float, out: Path, trace_allocations: bool = False
+) -> Callable[[], None]:
+    """
+    Sample every thread for the next turns turns, then write the reports to out and stop. Returns
+    the function that does so early (on exit before the last profiled turn).
+    """
+    profiler = SamplingProfiler(interval=interval, trace_allocations=trace_allocations)
+
+    def finish() -> None:
+        metrics.remove_listener(on_turn)
+        if not profiler.running:
+            return
+        profiler.stop()
+        try:
+            profiler.write(out)
+        except OSError as exc:
+            print(f"[SYSTEM] Writing the profile failed: {exc}", file=sys.stderr)
+            return
+        files = "stacks.collapsed, report.txt, memory.jsonl" if trace_allocations else "stacks.collapsed, report.txt"
+        print(f"[SYSTEM] Profile of {len(profiler.turns)} turn(s) written to {out} ({files}).")
+
+    def on_turn(_timings: Dict[str, float]) -> None:
+        profiler.turn_finished()
+        if len(profiler.turns) >= turns:
+            finish()
+
+    metrics.add_listener(on_turn)
+    profiler.start()
+    print(f"[SYSTEM] Profiling the next {turns} turn(s), sampling every {interval * 1000:.0f} ms.")
+    return finish
+
+
+def warm_up_tts(tts_engine: TtsEngine, fillers: Optional[FillerPool] = None) -> None:
+    # A missing or broken voice is reported on each reply anyway, so it doesn't block startup.
+    try:
+        tts_engine.warm_up()
+    except Exception as exc:
+        print(f"[SYSTEM] TTS warm-up failed: {exc}", file=sys.stderr)
+        return
+    if fillers is not None:
+        fillers.prepare()
+
+
+def ping_llm(llm_client: LLMClient) -> None:
+    try:
+        llm_client.ping()
+    except Exception as exc:
+        print(f"[SYSTEM] LLM endpoint not reachable yet: {exc}", file=sys.stderr)
+
+
+def stream_reply(
+    llm_client: LLMClient,
+    prompt: Prompt,
+    tts_engine: TtsEngine,
+    audio_path: Path,
+    timer: Optional[TurnTimer] = None,
+    stream: Optional[Iterator[str]] = None,
+    filler: Optional[PendingFiller] = None,
+) -> str:
+    """
+    Stream the LLM reply, speaking each finished sentence while generation continues.
+    stream replaces the request for prompt (e.g. a speculative reply already under way); an armed
+    filler is called off by the first token.
+    """
+    segmenter = SentenceSegmenter()
+    speech = SpeechQueue(tts_engine, audio_path, timer) if tts_engine.enabled else None
+    parts: list[str] = []
+    try:
+        for delta in stream if stream is not None else llm_client.complete_stream(prompt):
+            if filler is not None:
+                filler.cancel()
+            if timer is not None:
+                timer.mark("llm_first_token")
+            parts.append(delta)
+            if speech is not None:
+                for sentence in segmenter.feed(delta):
+                    speech.put(sentence)
+        if speech is not None:
+            tail = segmenter.flush()
+            if tail:
+                speech.put(tail)
+        if timer is not None:
+            timer.mark("llm_done")
+    finally:
+        # Wait for playback to drain so the microphone doesn't pick up our own voice.
+        if speech is not None:
+            speech.close()
+    return "".join(parts)
+
+
 def transcribe_loop(
     recorder: RecorderProtocol,
     llm_client: LLMClient,
@@ -60,86 +288,522 @@ def transcribe_loop(
     tts_engine: TtsEngine,
     memory_manager: MemoryManager,
     settings: Settings,
+    summariser: Optional[BackgroundSummariser] = None,
+    metrics: Optional[TurnMetrics] = None,
+    speculator: Optional[SpeculativeResponder] = None,
+    fillers: Optional[FillerPool] = None,
 ) -> None:
     """Sequential listen -> transcribe -> LLM -> TTS -> log loop."""
     print("Initialising. Press Ctrl+C to quit.")
     print(f"Session log: {logger.path()}")
+    turn_index = 0
     while True:
+        set_stage("listen")
         user_text = recorder.text()
+        transcribed = time.perf_counter()
+        speech = metrics.speech.take() if metrics is not None else (None, None)
         if not user_text:
             continue
-        prompt = memory_manager.build_context_prompt(user_text)
+        turn_index += 1
+        timer = TurnTimer(speech)
+        timer.mark("transcribed", transcribed)
+        set_stage("prompt")
+        prompt = memory_manager.build_context(user_text)
+        timer.mark("prompt")
+        set_stage("llm")
         print(f"[YOU] {user_text}")
         print("[SYSTEM] Processing response...")
+        audio_path = logger.turn_audio_path(turn_index, tts_engine.audio_extension)
+        filler = fillers.arm() if fillers is not None else None
         try:
-            llm_response = llm_client.complete(prompt)
+            stream = speculator.complete_stream(prompt) if speculator is not None else None
+            if settings.llm_stream:
+                llm_response = stream_reply(llm_client, prompt, tts_engine, audio_path, timer, stream, filler)
+            else:
+                llm_response = "".join(stream) if stream is not None else llm_client.complete(prompt)
+                timer.mark("llm_done")
         except Exception as exc:
             print(f"[SYSTEM] LLM call failed: {exc}", file=sys.stderr)
             continue
+        finally:
+            if filler is not None:
+                filler.cancel()
+        usage = llm_client.last_usage
         print(f"[ASSISTANT] {llm_response}")
-        logger.append_turn(user_text, llm_response)
-        memory_manager.record_turn(user_text, llm_response)
-        usage = llm_client.last_usage or {}
-        total_tokens = usage.get("total_tokens")
-        print(f"[SYSTEM] LLM usage: { total_tokens or 'unknown' } total tokens.")
-        warn_threshold = int(settings.context_window_tokens * 0.8)
-        if total_tokens and total_tokens > warn_threshold:
-            print(
-                f"[SYSTEM] Approaching context limit ({total_tokens}/{settings.context_window_tokens}). Summarising to retain continuity..."
-            )
-            try:
-                summary = memory_manager.summarise_history(llm_client, settings.summarise_prompt)
-                print(f"[SYSTEM] Summary stored: {summary}")
-            except Exception as exc:
-                print(f"[SYSTEM] Summary failed: {exc}", file=sys.stderr)
-        if total_tokens and total_tokens > settings.context_window_tokens:
-            # First, try reducing the short-term window; if already minimal, clear history.
-            if memory_manager.window > 2:
-                new_window = max(1, memory_manager.window // 2)
-                memory_manager.shrink_window(new_window)
-                print(
-                    f"[SYSTEM] Context window exceeded ({total_tokens} > {settings.context_window_tokens}); "
-                    f"reducing recent window to last {new_window} messages."
-                )
-            else:
-                memory_manager.clear_history()
-                print(
-                    f"[SYSTEM] Context window exceeded ({total_tokens} > {settings.context_window_tokens}); "
-                    "resetting conversation context."
-                )
-        if tts_engine.enabled:
+        set_stage("memory")
+        memory_started = time.perf_counter()
+        message_id = memory_manager.record_turn(user_text, llm_response)
+        timer.add("memory", time.perf_counter() - memory_started)
+        apply_context_limits(llm_client, memory_manager, settings, summariser)
+        set_stage("tts")
+        if tts_engine.enabled and not settings.llm_stream:
             try:
                 print("[SYSTEM] TTS speaking...")
-                audio_path = logger.path().with_suffix(".wav")
                 tts_engine.synthesize(llm_response, audio_path)
             except Exception as exc:
                 print(f"[SYSTEM] TTS failed: {exc}", file=sys.stderr)
+            timer.add_synthesis(tts_engine.last_synthesis)
+        if tts_engine.enabled:
+            tts_engine.finish_output(audio_path)
+            timer.mark("playback_end")
+        set_stage("log")
+        log_started = time.perf_counter()
+        logger.append_turn(user_text, llm_response, timings=timer.timings(), usage=usage, message_id=message_id)
+        timer.add("log", time.perf_counter() - log_started)
+        if metrics is not None:
+            metrics.observe_turn(timer.timings())
+
+
+def run_batch(settings: Settings, args: argparse.Namespace) -> None:
+    """Headless processing of a directory or JSONL manifest (see src/batch.py)."""
+    from src.batch import BatchRunner, load_items
+    from src.transcriber import WhisperTranscriber
+
+    items = load_items(args.input)
+    concurrency = args.llm_concurrency or settings.batch_llm_concurrency
+    stt_workers = args.stt_workers or settings.batch_stt_workers
+    # One pooled connection per in-flight request.
+    settings = dataclasses.replace(settings, llm_pool_size=max(settings.llm_pool_size, concurrency))
+    llm_client: Optional[LLMClient] = None
+    if not args.no_reply:
+        llm_client = build_llm_client(settings)
+        configure_system_prompt(llm_client, settings)
+    transcriber = None
+    if any(item.audio is not None for item in items):
+        transcriber = WhisperTranscriber(
+            settings, batch_size=args.stt_batch_size or settings.batch_stt_batch_size, workers=stt_workers
+        )
+    tts_engine = None if args.no_speech else TtsEngine(settings)
+    runner = BatchRunner(
+        llm_client,
+        args.out,
+        transcriber=transcriber,
+        tts_engine=tts_engine,
+        stt_workers=stt_workers,
+        llm_concurrency=concurrency,
+        tts_workers=args.tts_workers or settings.batch_tts_workers,
+    )
+    try:
+        counts = runner.run(items)
+    finally:
+        if tts_engine is not None:
+            tts_engine.close()
+        if llm_client is not None:
+            llm_client.close()
+    print(
+        f"[BATCH] Finished: {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} skipped. "
+        f"Results: {runner.results_path}"
+    )
+
+
+def run_server(settings: Settings, args: argparse.Namespace) -> None:
+    """Serve several clients from one set of loaded models (see src/server.py)."""
+    from src.history_store import HistoryStore
+    from src.server import ConversationServer
+    from src.transcriber import WhisperTranscriber
+
+    # One pooled connection per concurrent LLM request.
+    settings = dataclasses.replace(settings, llm_pool_size=max(settings.llm_pool_size, settings.server_llm_slots))
+    llm_client = build_llm_client(settings)
+    configure_system_prompt(llm_client, settings)
+    db_path = Path("memory") / "memory.db"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    store = HistoryStore(db_path)
+    search_index = open_search_index(settings)
+    tts_engine = TtsEngine(settings)
+    metrics = TurnMetrics(settings.metrics_prometheus_path, settings.metrics_port)
+    server: Optional[ConversationServer] = None
+    try:
+        setup_done = time.perf_counter()
+        components, timings = run_parallel(
+            {
+                "stt": lambda: WhisperTranscriber(settings, batch_size=1, workers=settings.server_stt_slots),
+                "tts": lambda: warm_up_tts(tts_engine),
+                "recall": lambda: build_recall_index(settings, store, llm_client) if settings.recall_enabled else None,
+                "llm": lambda: ping_llm(llm_client),
+            }
+        )
+        print(format_breakdown(timings, time.perf_counter() - setup_done))
+        recall = components["recall"]
+        if recall is not None:
+            indexed = recall.sync()
+            print(f"[SYSTEM] Recall index: {recall.index.size} turns ({indexed} new).")
+        server = ConversationServer(
+            settings,
+            llm_client,
+            store,
+            transcriber=components["stt"],
+            tts_engine=tts_engine,
+            recall=recall,
+            metrics=metrics,
+            search_index=search_index,
+        )
+        server.start(args.host or settings.server_host, args.port if args.port is not None else settings.server_port)
+        print(f"[SYSTEM] Serving on http://{args.host or settings.server_host}:{server.port} (Ctrl+C to stop).")
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n[SYSTEM] Server stopped.")
+    finally:
+        if server is not None:
+            server.close()
+            print(metrics.format_summary())
+        metrics.close()
+        tts_engine.close()
+        llm_client.close()
+        store.close()
+        if search_index is not None:
+            search_index.close()
+
+
+def run_calibrate(settings: Settings, args: argparse.Namespace) -> None:
+    """Measure Whisper setups on this CPU and cache the best one for get_settings (see src/calibration.py)."""
+    from src.calibration import (
+        DEFAULT_COMPUTE_TYPES,
+        DEFAULT_MODELS,
+        WHISPER_SAMPLE_RATE,
+        candidate_grid,
+        default_profile_path,
+        default_thread_counts,
+        format_measurement,
+        reference_clip,
+        run_calibration,
+        write_profile,
+    )
+
+    models = _split(args.models) or list(DEFAULT_MODELS)
+    compute_types = _split(args.compute_types) or list(DEFAULT_COMPUTE_TYPES)
+    threads = [int(t) for t in _split(args.threads)] or default_thread_counts()
+    samples = reference_clip(settings, args.clip)
+    clip_seconds = len(samples) / WHISPER_SAMPLE_RATE
+    candidates = candidate_grid(models, compute_types, threads)
+    print(
+        f"[CALIBRATE] {len(candidates)} setups on a {clip_seconds:.1f}s clip, "
+        f"target {args.target_latency:.2f}s ({args.target_latency / clip_seconds:.2f} RTF)."
+    )
+    chosen, measurements = run_calibration(
+        candidates,
+        samples,
+        args.target_latency,
+        language=settings.rtstt_language,
+        repeats=args.repeats,
+        on_result=lambda m: print(format_measurement(m)),
+    )
+    if chosen is None:
+        print("[CALIBRATE] No setup met the target latency; the profile was not written.", file=sys.stderr)
+        return
+    out = args.out or (Path(settings.stt_profile_path) if settings.stt_profile_path else default_profile_path())
+    write_profile(out, chosen, measurements, clip_seconds, args.target_latency)
+    c = chosen.candidate
+    print(f"[CALIBRATE] Chose {c.model} / {c.compute_type} / {c.cpu_threads} threads; saved to {out}.")
+
+
+def run_search(settings: Settings, args: argparse.Namespace) -> None:
+    """Ranked full-text search over every session log and the memory DB (see src/search_index.py)."""
+    from src.history_store import HistoryStore
+    from src.search_index import SearchIndex
+
+    index = SearchIndex(Path(settings.search_index_path or "memory/search.db"))
+    try:
+        if args.rebuild:
+            index.clear()
+        if args.rebuild or not args.no_sync:
+            db_path = Path("memory") / "memory.db"
+            store = HistoryStore(db_path) if db_path.exists() else None
+            try:
+                synced_at = time.perf_counter()
+                added = index.sync(Path(settings.session_logs_dir), store)
+            finally:
+                if store is not None:
+                    store.close()
+            if added:
+                print(f"[SEARCH] Indexed {added} new turns in {time.perf_counter() - synced_at:.2f}s.")
+        marks = ("\033[1m", "\033[0m") if sys.stdout.isatty() else ("[", "]")
+        started = time.perf_counter()
+        try:
+            hits = index.search(
+                " ".join(args.query), limit=args.limit, session=args.session, since=args.since, raw=args.raw, marks=marks
+            )
+        except ValueError as exc:
+            print(f"sottovoce search: error: {exc}", file=sys.stderr)
+            sys.exit(2)
+        elapsed = time.perf_counter() - started
+        for hit in hits:
+            print(f"{hit.timestamp}  {hit.session}  ({hit.source}, score {hit.score:.3g})")
+            print(f"  You: {hit.user}")
+            print(f"  Assistant: {hit.assistant}")
+        print(f"[SEARCH] {len(hits)} matches among {index.size} turns in {elapsed * 1000:.1f} ms.")
+    finally:
+        index.close()
+
 
+def _since_ms(value: str) -> int:
+    """--since: an ISO date/time (UTC unless it has an offset) as epoch milliseconds."""
+    from datetime import datetime, timezone
 
-def main() -> None:
+    try:
+        start = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date/time: {value!r}") from None
+    start = start if start.tzinfo is not None else start.replace(tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="sottovoce", description="Local voice conversation partner.")
+    parser.add_argument("--profile", type=int, metavar="TURNS", help="sample the conversation loop for TURNS turns and write a profile")
+    parser.add_argument("--profile-interval", type=float, metavar="SECONDS", help="seconds between stack samples (default: 0.005)")
+    parser.add_argument("--profile-out", type=Path, metavar="DIR", help="profile directory (default: next to the session log)")
+    parser.add_argument(
+        "--profile-allocations", action="store_true", help="also trace allocations per turn with tracemalloc (slows everything down)"
+    )
+    commands = parser.add_subparsers(dest="command")
+    batch = commands.add_parser("batch", help="process a directory or JSONL manifest of audio/text without a microphone")
+    batch.add_argument("input", type=Path, help="directory (audio files and .txt prompts) or JSONL manifest")
+    batch.add_argument("--out", type=Path, default=Path("batch_output"), help="results.jsonl and audio/ go here")
+    batch.add_argument("--llm-concurrency", type=int, help="parallel LLM requests (BATCH_LLM_CONCURRENCY)")
+    batch.add_argument("--stt-workers", type=int, help="parallel Whisper transcriptions (BATCH_STT_WORKERS)")
+    batch.add_argument("--stt-batch-size", type=int, help="Whisper segments per batch (BATCH_STT_BATCH_SIZE)")
+    batch.add_argument("--tts-workers", type=int, help="parallel Piper syntheses (BATCH_TTS_WORKERS)")
+    batch.add_argument("--no-reply", action="store_true", help="skip the LLM (transcribe and/or synthesize the input)")
+    batch.add_argument("--no-speech", action="store_true", help="skip speech synthesis")
+    serve = commands.add_parser("serve", help="serve several clients over HTTP, sharing one set of loaded models")
+    serve.add_argument("--host", help="interface to listen on (SERVER_HOST)")
+    serve.add_argument("--port", type=int, help="port to listen on (SERVER_PORT)")
+    search = commands.add_parser("search", help="full-text search over session logs and memory")
+    search.add_argument("query", nargs="+", help='words (all must match), "a phrase" or prefix*')
+    search.add_argument("--limit", type=int, default=20, help="matches to show, best first")
+    search.add_argument("--session", help="only this session (e.g. session_20250101T120000Z)")
+    search.add_argument("--since", type=_since_ms, help="only turns on or after this ISO date/time (UTC unless given)")
+    search.add_argument("--raw", action="store_true", help="pass the query to FTS5 as-is (OR, NEAR, column filters)")
+    search.add_argument("--no-sync", action="store_true", help="don't index new log lines / memory rows first")
+    search.add_argument("--rebuild", action="store_true", help="drop the index and rebuild it from every log and the memory DB")
+    calibrate = commands.add_parser("calibrate", help="pick the Whisper model / compute type / threads for this CPU")
+    calibrate.add_argument("--clip", type=Path, help="16-bit WAV to transcribe (default: a reference sentence read by Piper)")
+    calibrate.add_argument("--target-latency", type=float, default=1.0, help="max seconds to transcribe the clip")
+    calibrate.add_argument("--models", help="comma-separated, smallest first (default: tiny.en,base.en,small.en)")
+    calibrate.add_argument("--compute-types", help="comma-separated (default: int8,int8_float32,float32)")
+    calibrate.add_argument("--threads", help="comma-separated CPU thread counts (default: 1, 2, 4, ... cores)")
+    calibrate.add_argument("--repeats", type=int, default=2, help="timed transcriptions per setup (median is kept)")
+    calibrate.add_argument("--out", type=Path, help="profile to write (STT_PROFILE_PATH)")
+    args = parser.parse_args(argv)
+    options = args.profile_interval is not None or args.profile_out is not None or args.profile_allocations
+    if args.command is not None and (args.profile is not None or options):
+        parser.error(f"--profile and its options only apply to the conversation loop, not to {args.command}")
+    if args.profile is None and options:
+        parser.error("--profile-interval, --profile-out and --profile-allocations need --profile TURNS")
+    if args.profile is not None and args.profile < 1:
+        parser.error("--profile needs at least one turn")
+    return args
+
+
+def release_components(
+    built: Dict[str, Any],
+    llm_client: Optional[LLMClient],
+    logger: Optional[SessionLogger],
+    tts_engine: Optional[TtsEngine],
+    metrics: Optional[TurnMetrics],
+    search_index: Optional[SearchIndex],
+    summariser: Optional[BackgroundSummariser],
+    speculator: Optional[SpeculativeResponder],
+    finish_profile: Optional[Callable[[], None]],
+) -> None:
+    """Shut down whatever the conversation loop got to build (None: never created), recorder first."""
+    if finish_profile is not None:
+        finish_profile()
+    recorder = built.get("stt")
+    if recorder is not None:
+        # Releases the microphone and stops the transcription process.
+        recorder.__exit__(None, None, None)
+    if summariser is not None:
+        summariser.stop()
+    memory_manager = built.get("memory")
+    if memory_manager is not None:
+        memory_manager.store.close()
+    if tts_engine is not None:
+        tts_engine.close()
+    if llm_client is not None:
+        llm_client.close()
+    if logger is not None:
+        logger.close()
+    if search_index is not None:
+        search_index.close()
+    if speculator is not None:
+        print(speculator.format_stats())
+    if metrics is not None:
+        if metrics.turns and logger is not None:
+            print(metrics.format_summary())
+            metrics.write_summary(logger.path().with_suffix(".metrics.json"))
+        metrics.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
     suppress_noisy_warnings()
+    args = parse_args(argv)
     settings = get_settings()
+    if args.command == "batch":
+        run_batch(settings, args)
+        return
+    if args.command == "serve":
+        run_server(settings, args)
+        return
+    if args.command == "calibrate":
+        run_calibrate(settings, args)
+        return
+    if args.command == "search":
+        run_search(settings, args)
+        return
+    # Anything built before a failure is released in the finally below, whatever stage startup reached.
+    llm_client: Optional[LLMClient] = None
+    search_index: Optional[SearchIndex] = None
+    logger: Optional[SessionLogger] = None
+    tts_engine: Optional[TtsEngine] = None
+    metrics: Optional[TurnMetrics] = None
+    summariser: Optional[BackgroundSummariser] = None
+    speculator: Optional[SpeculativeResponder] = None
+    finish_profile: Optional[Callable[[], None]] = None
+    built: Dict[str, Any] = {}
     try:
         llm_client = build_llm_client(settings)
-        prompt_path = Path("PROMPT.md")
-        system_prompt_parts = []
-        if prompt_path.exists():
-            llm_client.load_system_prompt(prompt_path)
-            system_prompt_parts.append(llm_client.system_prompt or "")
-        system_prompt_parts.append(settings.llm_prompt_conversational)
-        combined_prompt = "\n\n".join([p for p in system_prompt_parts if p.strip()])
-        if combined_prompt:
-            llm_client.system_prompt = combined_prompt
-        logger = SessionLogger(directory=settings.session_logs_dir)
+        configure_system_prompt(llm_client, settings)
+        search_index = open_search_index(settings)
+        logger = SessionLogger(
+            directory=settings.session_logs_dir,
+            flush_interval=settings.session_log_flush_seconds,
+            max_bytes=settings.session_log_max_bytes,
+            search_index=search_index,
+        )
         tts_engine = TtsEngine(settings)
-        memory_manager = MemoryManager(settings, session_id=logger.path().stem)
-        with build_recorder(settings) as recorder:
-            transcribe_loop(recorder, llm_client, logger, tts_engine, memory_manager, settings)
+        metrics = TurnMetrics(settings.metrics_prometheus_path, settings.metrics_port)
+        fillers = (
+            FillerPool(
+                tts_engine,
+                parse_phrases(settings.filler_phrases),
+                delay=settings.filler_delay,
+                crossfade=settings.filler_crossfade_seconds,
+                metrics=metrics,
+            )
+            if settings.filler_enabled and tts_engine.enabled
+            else None
+        )
+        # The recorder is created before the pipeline and the speculator (which needs the memory
+        # manager), so its callbacks are routed to them once they exist.
+        pipelines: List[ConversationPipeline] = []
+        speculators: List[SpeculativeResponder] = []
+        endpointer = (
+            AdaptiveEndpointer(
+                settings.rtstt_post_speech_silence,
+                settings.endpoint_short_silence,
+                settings.endpoint_long_silence,
+                metrics,
+            )
+            if settings.adaptive_endpointing
+            else None
+        )
+
+        def on_start() -> None:
+            metrics.speech.started()
+            if endpointer is not None:
+                endpointer.on_recording_start()
+            if speculators:
+                speculators[0].discard()
+            if settings.concurrent_pipeline and settings.barge_in and pipelines:
+                pipelines[0].barge_in()
+
+        def on_stop() -> None:
+            # The recording ends once the silence timeout has elapsed after speech, so that timeout is the endpoint delay.
+            delay = endpointer.on_recording_stop() if endpointer is not None else settings.rtstt_post_speech_silence
+            metrics.speech.ended(delay)
+
+        def on_partial(text: str) -> None:
+            if speculators:
+                speculators[0].on_partial(text)
+
+        setup_done = time.perf_counter()
+        components, timings = run_parallel(
+            {
+                "stt": lambda: build_recorder(
+                    settings,
+                    on_recording_start=on_start,
+                    on_recording_stop=on_stop,
+                    on_partial=on_partial if settings.speculative_llm else None,
+                    on_partial_update=endpointer.on_partial if endpointer is not None else None,
+                ),
+                "tts": lambda: warm_up_tts(tts_engine, fillers),
+                "memory": lambda: build_memory_manager(settings, logger.path().stem, llm_client),
+                "llm": lambda: ping_llm(llm_client),
+            },
+            results=built,
+        )
+        timings["imports+setup"] = setup_done - _PROCESS_STARTED
+        print(format_breakdown(timings, time.perf_counter() - _PROCESS_STARTED))
+        recorder: RecorderProtocol = components["stt"]
+        if endpointer is not None:
+            endpointer.attach(recorder)
+        memory_manager: MemoryManager = components["memory"]
+        memory_manager.search_index = search_index
+        summariser = (
+            BackgroundSummariser(
+                memory_manager,
+                llm_client,
+                settings.summarise_prompt,
+                batch_messages=settings.summary_batch_messages,
+            )
+            if settings.summary_background
+            else None
+        )
+        if settings.speculative_llm:
+            speculators.append(
+                SpeculativeResponder(
+                    llm_client,
+                    memory_manager.preview_context,
+                    stable_seconds=settings.speculative_stable_seconds,
+                    tts_engine=tts_engine if settings.speculative_tts else None,
+                    metrics=metrics,
+                )
+            )
+        speculator = speculators[0] if speculators else None
+        # Started once warm-up is over, so only the conversation loop is sampled.
+        finish_profile = (
+            start_profiler(
+                metrics,
+                args.profile,
+                args.profile_interval or 0.005,
+                args.profile_out or logger.path().with_suffix(".profile"),
+                trace_allocations=args.profile_allocations,
+            )
+            if args.profile
+            else None
+        )
+        if settings.concurrent_pipeline:
+            pipeline = ConversationPipeline(
+                llm_client, logger, tts_engine, memory_manager, settings, summariser, metrics, speculator, fillers
+            )
+            pipelines.append(pipeline)
+            pipeline.run(recorder)
+        else:
+            transcribe_loop(
+                recorder,
+                llm_client,
+                logger,
+                tts_engine,
+                memory_manager,
+                settings,
+                summariser,
+                metrics,
+                speculator,
+                fillers,
+            )
     except KeyboardInterrupt:
         print("\nExiting.")
     except Exception as exc:  # pragma: no cover - runtime path
         print(f"Fatal error: {exc}", file=sys.stderr)
         raise
+    finally:
+        release_components(built, llm_client, logger, tts_engine, metrics, search_index, summariser, speculator, finish_profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import queue
+import subprocess
+import sys
+import threading
+import wave
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy
+
+ARCHIVE_FORMATS = ("wav", "flac", "opus")
+
+
+def to_int16(samples: numpy.ndarray, volume: float = 1.0) -> numpy.ndarray:
+    """Float samples in [-1, 1] (or int16 PCM) to 16-bit PCM, applying volume."""
+    if samples.dtype == numpy.int16 and volume == 1.0:
+        return samples
+    factor = volume if samples.dtype == numpy.int16 else 32767.0 * volume
+    scaled = numpy.multiply(samples, factor, dtype=numpy.float32)
+    numpy.clip(scaled, -32767.0, 32767.0, out=scaled)
+    return scaled.astype(numpy.int16)
+
+
+class _WavSink:
+    def __init__(self, path: Path, sample_rate: int, channels: int):
+        self._wav = wave.open(str(path), "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, pcm: numpy.ndarray) -> None:
+        self._wav.writeframes(pcm.tobytes())
+
+    def close(self) -> None:
+        self._wav.close()
+
+
+class _FfmpegSink:
+    """Compressed output (FLAC/Opus) by piping raw PCM through ffmpeg, which the project already requires."""
+
+    def __init__(self, path: Path, sample_rate: int, channels: int):
+        self._proc = subprocess.Popen(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "-",
+                str(path),
+            ],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, pcm: numpy.ndarray) -> None:
+        assert self._proc.stdin is not None
+        self._proc.stdin.write(pcm.tobytes())
+
+    def close(self) -> None:
+        assert self._proc.stdin is not None
+        self._proc.stdin.close()
+        self._proc.wait()
+
+
+_Chunk = Tuple[Path, Optional[numpy.ndarray], int, int, float]
+
+
+class AudioArchive:
+    """
+    Streams synthesized audio to one file per turn from a background thread.
+    Chunks are queued by reference (the arrays Piper already produced for playback), so archiving
+    adds no re-synthesis and never holds a whole utterance in memory.
+    """
+
+    def __init__(self, fmt: str = "wav"):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unsupported audio archive format: {fmt}")
+        self.format = fmt
+        self._queue: "queue.Queue[Optional[_Chunk]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="audio-archive", daemon=True)
+        self._thread.start()
+
+    def write(self, path: Path, samples: numpy.ndarray, sample_rate: int, channels: int, volume: float = 1.0) -> None:
+        self._queue.put((path, samples, sample_rate, channels, volume))
+
+    def finish(self, path: Path) -> None:
+        """Finalise the file for a turn once its last chunk has been queued."""
+        self._queue.put((path, None, 0, 0, 0.0))
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        current: Optional[Tuple[Path, Union[_WavSink, _FfmpegSink]]] = None
+        # A turn whose sink failed: the rest of its chunks are dropped so the error is reported once.
+        dead: Optional[Path] = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, samples, sample_rate, channels, volume = item
+            if current is not None and (samples is None or current[0] != path):
+                self._close(current[1])
+                current = None
+            if dead is not None and (samples is None or dead != path):
+                dead = None
+            if samples is None or dead == path:
+                continue
+            try:
+                if current is None:
+                    sink_cls = _WavSink if self.format == "wav" else _FfmpegSink
+                    current = (path, sink_cls(path, sample_rate, channels))
+                current[1].write(to_int16(samples, volume))
+            except Exception as exc:
+                print(f"[SYSTEM] Audio archive write failed: {exc}", file=sys.stderr)
+                if current is not None:
+                    self._close(current[1])
+                    current = None
+                dead = path
+        if current is not None:
+            self._close(current[1])
+
+    @staticmethod
+    def _close(sink: Union[_WavSink, _FfmpegSink]) -> None:
+        try:
+            sink.close()
+        except Exception as exc:
+            print(f"[SYSTEM] Audio archive close failed: {exc}", file=sys.stderr)
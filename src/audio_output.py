@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Optional
+
+import numpy
+
+
+class PcmRingBuffer:
+    """Bounded float32 frame buffer shared between a producer thread and the audio callback."""
+
+    def __init__(self, capacity_frames: int, channels: int = 1):
+        self.capacity = max(1, capacity_frames)
+        self.channels = channels
+        self._data = numpy.zeros((self.capacity, channels), dtype=numpy.float32)
+        self._read = 0
+        self._size = 0
+        self._epoch = 0
+        self._cond = threading.Condition()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return self._size
+
+    def write(self, samples: numpy.ndarray, scale: float = 1.0, crossfade: int = 0) -> bool:
+        """
+        Copy samples into the buffer, applying scale in place; blocks while the buffer is full.
+        With crossfade > 0, audio still queued is cut to that many frames, faded out and mixed
+        with the (faded in) start of samples instead of playing to its end first.
+        Returns False if the buffer was cleared before every frame could be written.
+        """
+        frames = samples.reshape(-1, self.channels)
+        # Integer PCM is scaled down into [-1, 1] by the caller's scale; clip only if it can overshoot.
+        peak = numpy.iinfo(frames.dtype).max if frames.dtype.kind == "i" else 1.0
+        offset = 0
+        with self._cond:
+            epoch = self._epoch
+            if crossfade > 0 and self._size:
+                offset = min(crossfade, self._size, len(frames))
+                self._size = offset
+                positions = (self._read + numpy.arange(offset)) % self.capacity
+                ramp = numpy.linspace(0.0, 1.0, offset, endpoint=False, dtype=numpy.float32)[:, None]
+                mixed = self._data[positions] * (1.0 - ramp) + frames[:offset] * numpy.float32(scale) * ramp
+                self._data[positions] = numpy.clip(mixed, -1.0, 1.0)
+                self._cond.notify_all()
+            while offset < len(frames):
+                while self._size == self.capacity and self._epoch == epoch:
+                    self._cond.wait()
+                if self._epoch != epoch:
+                    return False
+                start = (self._read + self._size) % self.capacity
+                count = min(len(frames) - offset, self.capacity - self._size, self.capacity - start)
+                target = self._data[start : start + count]
+                numpy.multiply(frames[offset : offset + count], scale, out=target)
+                if scale * peak > 1.0:
+                    numpy.clip(target, -1.0, 1.0, out=target)
+                self._size += count
+                offset += count
+                self._cond.notify_all()
+        return True
+
+    def read_into(self, out: numpy.ndarray) -> int:
+        """Fill out with buffered frames (zero-padding any shortfall) and return the frames read."""
+        with self._cond:
+            count = min(len(out), self._size)
+            first = min(count, self.capacity - self._read)
+            out[:first] = self._data[self._read : self._read + first]
+            out[first:count] = self._data[: count - first]
+            out[count:] = 0
+            self._read = (self._read + count) % self.capacity
+            self._size -= count
+            if count:
+                self._cond.notify_all()
+            return count
+
+    def wait_empty(self) -> bool:
+        """Block until every buffered frame has been consumed; False if cleared meanwhile."""
+        with self._cond:
+            epoch = self._epoch
+            while self._size and self._epoch == epoch:
+                self._cond.wait()
+            return self._epoch == epoch
+
+    def clear(self) -> None:
+        """Drop buffered audio and release any blocked writer or waiter."""
+        with self._cond:
+            self._read = 0
+            self._size = 0
+            self._epoch += 1
+            self._cond.notify_all()
+
+
+class NullOutputStream:
+    """
+    Stand-in for sounddevice.OutputStream that pulls audio at the real playback rate and discards
+    it, so headless runs (benchmarks, servers without a sound card) keep realistic timing.
+    """
+
+    latency = 0.0
+
+    def __init__(self, samplerate: int, channels: int, callback: Any, blocksize: int = 512, **_: Any):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self._callback = callback
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="null-audio", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        out = numpy.zeros((self.blocksize, self.channels), dtype=numpy.float32)
+        period = self.blocksize / self.samplerate
+        deadline = time.monotonic()
+        while not self._stopped.is_set():
+            self._callback(out, self.blocksize, None, None)
+            deadline += period
+            self._stopped.wait(max(0.0, deadline - time.monotonic()))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self) -> None:
+        self.stop()
+
+
+class AudioPlayer:
+    """Keeps one sounddevice OutputStream open and plays audio pushed into a ring buffer."""
+
+    def __init__(self, buffer_seconds: float = 2.0, null_sink: bool = False):
+        self.buffer_seconds = buffer_seconds
+        self.null_sink = null_sink
+        self._stream: Optional[Any] = None
+        self._buffer: Optional[PcmRingBuffer] = None
+        self._format: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _ensure_stream(self, sample_rate: int, channels: int) -> PcmRingBuffer:
+        with self._lock:
+            if self._format != (sample_rate, channels) or self._buffer is None:
+                self._close_stream()
+                if self.null_sink:
+                    stream_cls: Any = NullOutputStream
+                else:
+                    # Imported lazily so the buffer can be used without a PortAudio device present.
+                    import sounddevice as sd  # type: ignore[import-not-found]
+
+                    stream_cls = sd.OutputStream
+                buffer = PcmRingBuffer(int(sample_rate * self.buffer_seconds), channels)
+
+                def _callback(outdata: numpy.ndarray, frames: int, time_info: Any, status: Any) -> None:
+                    buffer.read_into(outdata)
+
+                self._stream = stream_cls(
+                    samplerate=sample_rate,
+                    channels=channels,
+                    dtype="float32",
+                    callback=_callback,
+                )
+                self._stream.start()
+                self._buffer = buffer
+                self._format = (sample_rate, channels)
+            return self._buffer
+
+    def play(
+        self, samples: numpy.ndarray, sample_rate: int, channels: int = 1, volume: float = 1.0, crossfade: float = 0.0
+    ) -> bool:
+        """
+        Queue samples for playback, scaled by volume (float in [-1, 1], or integer PCM with the
+        volume already divided by full scale); returns once they fit in the buffer. crossfade
+        (seconds) blends them into whatever is still queued rather than after it.
+        """
+        buffer = self._ensure_stream(sample_rate, channels)
+        return buffer.write(samples, volume, int(crossfade * sample_rate))
+
+    @property
+    def idle(self) -> bool:
+        """Nothing queued for playback."""
+        buffer = self._buffer
+        return buffer is None or buffer.pending == 0
+
+    def wait(self) -> None:
+        """Block until queued audio has been handed to the device and played out."""
+        buffer = self._buffer
+        if buffer is None or not buffer.wait_empty():
+            return
+        stream = self._stream
+        if stream is not None:
+            # The device still holds roughly one latency period of audio after the buffer drains.
+            time.sleep(float(stream.latency))
+
+    def stop(self) -> None:
+        """Discard any audio that has not been played yet."""
+        if self._buffer is not None:
+            self._buffer.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_stream()
+
+    def _close_stream(self) -> None:
+        if self._buffer is not None:
+            self._buffer.clear()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+        self._stream = None
+        self._buffer = None
+        self._format = None
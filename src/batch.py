@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from src.llm_client import LLMClient
+from src.scheduler import InferenceScheduler
+from src.tts_engine import TtsEngine
+
+AUDIO_SUFFIXES = frozenset({".wav", ".flac", ".mp3", ".ogg", ".m4a", ".opus"})
+RESULTS_FILENAME = "results.jsonl"
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    id: str
+    audio: Optional[Path] = None
+    text: Optional[str] = None
+
+
+def load_items(source: Path) -> List[BatchItem]:
+    """
+    Items from a directory (audio files are transcribed, .txt files are prompts) or a JSONL
+    manifest of {"id": ..., "audio": path} / {"id": ..., "text": ...} lines.
+    Relative audio paths in a manifest are resolved against the manifest's directory.
+    """
+    items: List[BatchItem] = []
+    if source.is_dir():
+        for path in sorted(p for p in source.rglob("*") if p.is_file()):
+            item_id = path.relative_to(source).with_suffix("").as_posix()
+            if path.suffix.lower() in AUDIO_SUFFIXES:
+                items.append(BatchItem(item_id, audio=path))
+            elif path.suffix.lower() == ".txt":
+                items.append(BatchItem(item_id, text=path.read_text(encoding="utf-8").strip()))
+        return items
+    with source.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            audio = entry.get("audio")
+            items.append(
+                BatchItem(
+                    str(entry.get("id", line_no)),
+                    audio=(source.parent / audio) if audio else None,
+                    text=entry.get("text"),
+                )
+            )
+    return items
+
+
+def completed_ids(results_path: Path) -> Set[str]:
+    """Ids already processed successfully by an earlier (possibly interrupted) run."""
+    done: Set[str] = set()
+    if not results_path.exists():
+        return done
+    with results_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if record.get("status") == "ok":
+                done.add(str(record["id"]))
+    return done
+
+
+class BatchRunner:
+    """
+    Runs items through transcription -> LLM -> synthesis with a separate concurrency limit per
+    stage, so Whisper, the LLM server's parallel slots and Piper are all kept busy at once.
+    Results are appended to results.jsonl as each item finishes; ids already recorded as ok are
+    skipped, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient],
+        out_dir: Path,
+        transcriber: Optional[Any] = None,
+        tts_engine: Optional[TtsEngine] = None,
+        stt_workers: int = 1,
+        llm_concurrency: int = 4,
+        tts_workers: int = 2,
+    ):
+        self.llm_client = llm_client
+        self.transcriber = transcriber
+        self.tts_engine = tts_engine if tts_engine is not None and tts_engine.enabled else None
+        self.out_dir = out_dir
+        self.audio_dir = out_dir / "audio"
+        self.results_path = out_dir / RESULTS_FILENAME
+        self.scheduler = InferenceScheduler({"stt": stt_workers, "llm": llm_concurrency, "tts": tts_workers})
+        self._workers = max(1, stt_workers) + max(1, llm_concurrency) + max(1, tts_workers)
+
+    def run(self, items: List[BatchItem]) -> Dict[str, int]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self.tts_engine is not None:
+            self.audio_dir.mkdir(parents=True, exist_ok=True)
+        done = completed_ids(self.results_path)
+        self._terminate_partial_line()
+        todo = [item for item in items if item.id not in done]
+        counts = {"skipped": len(items) - len(todo), "ok": 0, "error": 0}
+        print(f"[BATCH] {len(todo)} items to process ({counts['skipped']} already done).")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="batch") as pool, self.results_path.open(
+            "a", encoding="utf-8"
+        ) as results:
+            futures = [pool.submit(self._process, item) for item in todo]
+            for future in as_completed(futures):
+                record = future.result()
+                counts[record["status"]] += 1
+                results.write(json.dumps(record, ensure_ascii=False) + "\n")
+                results.flush()
+                finished = counts["ok"] + counts["error"]
+                if finished % 10 == 0 or finished == len(todo):
+                    rate = finished / max(time.perf_counter() - started, 1e-9)
+                    print(f"[BATCH] {finished}/{len(todo)} done ({rate:.2f} items/s, {counts['error']} failed).")
+        return counts
+
+    def _terminate_partial_line(self) -> None:
+        # A crash mid-write can leave the last line unterminated; start new records on a fresh line.
+        if not self.results_path.exists() or self.results_path.stat().st_size == 0:
+            return
+        with self.results_path.open("rb+") as f:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _process(self, item: BatchItem) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": item.id, "status": "ok", "timings": {}}
+        timings: Dict[str, float] = record["timings"]
+        try:
+            text = item.text
+            if item.audio is not None:
+                record["source"] = str(item.audio)
+                if self.transcriber is None:
+                    raise RuntimeError("audio input needs a transcriber")
+                with self.scheduler.slot("stt", timings):
+                    text = self.transcriber.transcribe(item.audio)
+                record["transcript"] = text
+            if not text:
+                raise ValueError("nothing to respond to")
+            reply = text
+            if self.llm_client is not None:
+                with self.scheduler.slot("llm", timings):
+                    reply, record["usage"] = self.llm_client.complete_with_usage(text)
+                record["reply"] = reply
+            if self.tts_engine is not None:
+                audio_path = self.audio_dir / f"{item.id.replace('/', '__')}.wav"
+                with self.scheduler.slot("tts", timings):
+                    record["audio_seconds"] = self.tts_engine.render_to_file(reply, audio_path)
+                record["audio"] = str(audio_path)
+        except Exception as exc:
+            record["status"] = "error"
+            record["error"] = f"{type(exc).__name__}: {exc}"
+            print(f"[BATCH] {item.id} failed: {exc}", file=sys.stderr)
+        return record
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import wave
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy
+
+    from src.config import Settings
+
+# Read aloud by the local Piper voice when no clip is given: about six seconds, the length of a typical turn.
+REFERENCE_TEXT = (
+    "Could you remind me what we talked about yesterday? I think it was the trip to the coast, "
+    "and whether the weather would hold until the weekend."
+)
+# Largest last: calibration keeps the largest model that still meets the target.
+DEFAULT_MODELS = ("tiny.en", "base.en", "small.en")
+DEFAULT_COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+WHISPER_SAMPLE_RATE = 16000
+
+
+@dataclass(frozen=True)
+class Candidate:
+    model: str
+    compute_type: str
+    cpu_threads: int
+
+
+@dataclass
+class Measurement:
+    candidate: Candidate
+    seconds: float = 0.0  # median transcription time of the clip, model load excluded
+    real_time_factor: float = 0.0
+    peak_rss_mb: float = 0.0
+    text: str = ""
+    error: str = ""
+
+
+@dataclass(frozen=True)
+class SttProfile:
+    """The Whisper setup chosen by `calibrate`, loaded by get_settings."""
+
+    model: str
+    compute_type: str
+    cpu_threads: int
+    real_time_factor: float
+    cpu_count: int
+
+
+def default_thread_counts(cpu_count: Optional[int] = None) -> List[int]:
+    """1, 2, 4, ... up to the core count (which is always included)."""
+    cores = cpu_count or os.cpu_count() or 1
+    counts: List[int] = []
+    threads = 1
+    while threads < cores:
+        counts.append(threads)
+        threads *= 2
+    counts.append(cores)
+    return counts
+
+
+def candidate_grid(models: Sequence[str], compute_types: Sequence[str], thread_counts: Sequence[int]) -> List[Candidate]:
+    return [Candidate(m, c, t) for m in models for c in compute_types for t in thread_counts]
+
+
+def reference_clip(settings: Settings, clip: Optional[Path] = None) -> "numpy.ndarray":
+    """Mono float32 samples at 16 kHz: a WAV file, or REFERENCE_TEXT spoken by the configured Piper voice."""
+    import numpy
+
+    from src.tts_engine import TtsEngine
+
+    if clip is not None:
+        with wave.open(str(clip), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{clip}: expected 16-bit PCM")
+            pcm = numpy.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+            sample_rate, channels = wav.getframerate(), wav.getnchannels()
+    else:
+        if not settings.tts_voice_path:
+            raise ValueError("no reference clip: pass --clip or set TTS_VOICE_PATH")
+        engine = TtsEngine(replace(settings, tts_enabled=True, tts_cache_enabled=False, tts_workers=1))
+        try:
+            chunks = list(engine.iter_pcm(REFERENCE_TEXT))
+        finally:
+            engine.close()
+        if not chunks:
+            raise ValueError("the Piper voice produced no audio for the reference text")
+        pcm = numpy.concatenate([chunk.samples for chunk in chunks])
+        sample_rate, channels = chunks[0].sample_rate, chunks[0].channels
+    samples = pcm.reshape(-1, channels).mean(axis=1).astype(numpy.float32) / 32768.0
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        positions = numpy.arange(0, len(samples), sample_rate / WHISPER_SAMPLE_RATE)
+        samples = numpy.interp(positions, numpy.arange(len(samples)), samples).astype(numpy.float32)
+    return samples
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure_worker(candidate: Candidate, samples: "numpy.ndarray", language: str, repeats: int, conn) -> None:
+    try:
+        from faster_whisper import WhisperModel  # type: ignore[import-not-found]
+
+        model = WhisperModel(
+            candidate.model, device="cpu", compute_type=candidate.compute_type, cpu_threads=candidate.cpu_threads
+        )
+        timings: List[float] = []
+        text = ""
+        # One untimed pass first: the first call pays for lazy initialisation.
+        for attempt in range(repeats + 1):
+            started = time.perf_counter()
+            segments, _ = model.transcribe(samples, language=language or None)
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+            if attempt:
+                timings.append(time.perf_counter() - started)
+        conn.send({"seconds": statistics.median(timings), "peak_rss_mb": _peak_rss_mb(), "text": text})
+    except Exception as exc:
+        conn.send({"error": str(exc)})
+    finally:
+        conn.close()
+
+
+def measure_candidate(candidate: Candidate, samples: "numpy.ndarray", language: str = "", repeats: int = 2) -> Measurement:
+    """
+    Transcribe the clip with one candidate in a fresh process, so its peak RSS is its own and the
+    models loaded for earlier candidates are freed.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_worker, args=(candidate, samples, language, max(1, repeats), sender))
+    process.start()
+    sender.close()
+    try:
+        result: Dict[str, object] = receiver.recv()
+    except EOFError:
+        result = {"error": f"worker exited with code {process.exitcode}"}
+    process.join()
+    if "error" in result:
+        return Measurement(candidate, error=str(result["error"]))
+    seconds = float(result["seconds"])  # type: ignore[arg-type]
+    return Measurement(
+        candidate,
+        seconds=seconds,
+        real_time_factor=seconds / (len(samples) / WHISPER_SAMPLE_RATE),
+        peak_rss_mb=float(result["peak_rss_mb"]),  # type: ignore[arg-type]
+        text=str(result["text"]),
+    )
+
+
+def choose(measurements: Iterable[Measurement], target_latency: float, models: Sequence[str]) -> Optional[Measurement]:
+    """
+    The largest model (by its position in models) that transcribes the clip within target_latency,
+    in its fastest compute type / thread count.
+    """
+    fitting = [m for m in measurements if not m.error and m.seconds <= target_latency]
+    if not fitting:
+        return None
+    rank = {model: index for index, model in enumerate(models)}
+    return min(fitting, key=lambda m: (-rank.get(m.candidate.model, -1), m.seconds, m.peak_rss_mb))
+
+
+def run_calibration(
+    candidates: Sequence[Candidate],
+    samples: "numpy.ndarray",
+    target_latency: float,
+    language: str = "",
+    repeats: int = 2,
+    measure: Callable[..., Measurement] = measure_candidate,
+    on_result: Optional[Callable[[Measurement], None]] = None,
+) -> Tuple[Optional[Measurement], List[Measurement]]:
+    measurements: List[Measurement] = []
+    for candidate in candidates:
+        measurement = measure(candidate, samples, language, repeats)
+        measurements.append(measurement)
+        if on_result is not None:
+            on_result(measurement)
+    models = list(dict.fromkeys(candidate.model for candidate in candidates))
+    return choose(measurements, target_latency, models), measurements
+
+
+def format_measurement(measurement: Measurement) -> str:
+    c = measurement.candidate
+    label = f"{c.model:<10} {c.compute_type:<13} {c.cpu_threads:>2} threads"
+    if measurement.error:
+        return f"[CALIBRATE] {label}  failed: {measurement.error}"
+    return (
+        f"[CALIBRATE] {label}  {measurement.seconds:6.2f}s  RTF {measurement.real_time_factor:.3f}  "
+        f"peak RSS {measurement.peak_rss_mb:.0f} MB"
+    )
+
+
+def write_profile(
+    path: Path, chosen: Measurement, measurements: Sequence[Measurement], clip_seconds: float, target_latency: float
+) -> None:
+    document = {
+        "rtstt_model": chosen.candidate.model,
+        "rtstt_compute_type": chosen.candidate.compute_type,
+        "rtstt_cpu_threads": chosen.candidate.cpu_threads,
+        "real_time_factor": chosen.real_time_factor,
+        "cpu_count": os.cpu_count() or 1,
+        "target_latency": target_latency,
+        "clip_seconds": clip_seconds,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "measurements": [asdict(m) for m in measurements],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def default_profile_path() -> Path:
+    """Per-user location of the profile ($XDG_CONFIG_HOME or ~/.config), used when STT_PROFILE_PATH is unset."""
+    base = os.getenv("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+    return Path(base) / "sottovoce" / "stt_profile.json"
+
+
+def load_stt_profile(path: str) -> Optional[SttProfile]:
+    """The cached profile, or None if missing, unreadable, or measured on a machine with a different core count."""
+    try:
+        document = json.loads(Path(path).read_text(encoding="utf-8"))
+        profile = SttProfile(
+            model=str(document["rtstt_model"]),
+            compute_type=str(document["rtstt_compute_type"]),
+            cpu_threads=int(document["rtstt_cpu_threads"]),
+            real_time_factor=float(document["real_time_factor"]),
+            cpu_count=int(document["cpu_count"]),
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"[SYSTEM] STT profile {path} ignored: {exc}", file=sys.stderr)
+        return None
+    if profile.cpu_count != (os.cpu_count() or 1):
+        print(f"[SYSTEM] STT profile {path} was measured on another machine; run calibrate again.", file=sys.stderr)
+        return None
+    return profile
@@ -28,6 +28,73 @@ class Settings:
     context_window_messages: int
     summarise_prompt: str
     llm_prompt_conversational: str
+    llm_stream: bool = False
+    tts_buffer_seconds: float = 2.0
+    llm_connect_timeout: float = 5.0
+    llm_pool_size: int = 4
+    llm_max_retries: int = 2
+    llm_retry_backoff: float = 0.5
+    concurrent_pipeline: bool = False
+    barge_in: bool = False
+    context_reply_tokens: int = 512
+    summary_background: bool = False
+    summary_batch_messages: int = 4
+    llm_structured_messages: bool = False
+    llm_cache_prompt: bool = False
+    recall_enabled: bool = False
+    recall_top_k: int = 3
+    recall_min_score: float = 0.3
+    recall_embedding_endpoint: str = ""
+    recall_embedding_model: str = ""
+    session_log_flush_seconds: float = 1.0
+    session_log_max_bytes: int = 10485760
+    tts_archive_format: str = ""
+    tts_cache_enabled: bool = True
+    tts_cache_dir: str = ""  # empty: the per-user cache directory
+    tts_cache_memory_mb: int = 32
+    tts_cache_disk_mb: int = 256
+    tts_cache_max_chars: int = 200
+    metrics_prometheus_path: str = ""
+    metrics_port: int = 0
+    tts_null_sink: bool = False
+    batch_stt_workers: int = 1
+    batch_stt_batch_size: int = 8
+    batch_llm_concurrency: int = 4
+    batch_tts_workers: int = 2
+    server_host: str = "127.0.0.1"
+    server_port: int = 8765
+    server_stt_slots: int = 1
+    server_llm_slots: int = 4
+    server_tts_slots: int = 2
+    llm_hedge_after: float = 1.5
+    llm_health_interval: float = 10.0
+    llm_summary_model: str = ""
+    rtstt_realtime_model: str = "tiny.en"
+    speculative_llm: bool = False
+    speculative_stable_seconds: float = 0.3
+    speculative_tts: bool = False
+    tts_workers: int = 1
+    tts_threads_per_worker: int = 0
+    rtstt_cpu_threads: int = 0
+    stt_profile_path: str = ""  # empty: no profile (get_settings defaults an unset one to the per-user path)
+    rtstt_silero_sensitivity: float = 0.4
+    rtstt_webrtc_sensitivity: int = 3
+    rtstt_silero_deactivity: bool = False
+    rtstt_post_speech_silence: float = 0.6
+    rtstt_min_recording_seconds: float = 0.5
+    rtstt_min_gap_seconds: float = 0.0
+    rtstt_pre_recording_buffer: float = 1.0
+    rtstt_early_transcription_on_silence: float = 0.0
+    rtstt_realtime_pause: float = 0.2
+    adaptive_endpointing: bool = False
+    endpoint_short_silence: float = 0.25
+    endpoint_long_silence: float = 1.0
+    search_index_path: str = "memory/search.db"
+    filler_enabled: bool = False
+    filler_phrases: str = "Mm-hm.|Let me think.|Hmm, okay.|Right."
+    filler_delay: float = 0.7
+    filler_crossfade_seconds: float = 0.12
+    server_session_idle_seconds: float = 1800.0
 
 
 def _bool_env(name: str, default: bool) -> bool:
@@ -39,8 +106,9 @@ def _bool_env(name: str, default: bool) -> bool:
 
 def get_settings() -> Settings:
     # Load settings from environment with sensible defaults.
-    rtstt_model = os.getenv("RTSTT_MODEL", "base.en").strip()
-    rtstt_compute_type = os.getenv("RTSTT_COMPUTE_TYPE", "default").strip()
+    # Left empty (as in .env-default), these three come from the calibration profile if there is one.
+    rtstt_model = os.getenv("RTSTT_MODEL", "").strip() or "base.en"
+    rtstt_compute_type = os.getenv("RTSTT_COMPUTE_TYPE", "").strip() or "default"
     rtstt_language = os.getenv("RTSTT_LANGUAGE", "").strip()
     rtstt_use_microphone = _bool_env("RTSTT_USE_MICROPHONE", True)
     llm_endpoint = os.getenv("LLM_ENDPOINT", "http://localhost:1234/v1/chat/completions").strip()
@@ -64,6 +132,90 @@ def get_settings() -> Settings:
         "LLM_PROMPT_CONVERSATIONAL",
         "Keep replies concise, natural, and conversational—no emojis, no lists unless asked, and avoid using formatting such as bold or italics (e.g., *word*, **word**).",
     )
+    llm_stream = _bool_env("LLM_STREAM", False)
+    tts_buffer_seconds = float(os.getenv("TTS_BUFFER_SECONDS", "2.0"))
+    llm_connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    llm_pool_size = int(os.getenv("LLM_POOL_SIZE", "4"))
+    llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    llm_retry_backoff = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+    concurrent_pipeline = _bool_env("CONCURRENT_PIPELINE", False)
+    barge_in = _bool_env("BARGE_IN", False)
+    context_reply_tokens = int(os.getenv("CONTEXT_REPLY_TOKENS", "512"))
+    summary_background = _bool_env("SUMMARY_BACKGROUND", False)
+    summary_batch_messages = int(os.getenv("SUMMARY_BATCH_MESSAGES", "4"))
+    llm_structured_messages = _bool_env("LLM_STRUCTURED_MESSAGES", False)
+    llm_cache_prompt = _bool_env("LLM_CACHE_PROMPT", False)
+    recall_enabled = _bool_env("RECALL_ENABLED", False)
+    recall_top_k = int(os.getenv("RECALL_TOP_K", "3"))
+    recall_min_score = float(os.getenv("RECALL_MIN_SCORE", "0.3"))
+    recall_embedding_endpoint = os.getenv("RECALL_EMBEDDING_ENDPOINT", "").strip()
+    recall_embedding_model = os.getenv("RECALL_EMBEDDING_MODEL", "").strip()
+    session_log_flush_seconds = float(os.getenv("SESSION_LOG_FLUSH_SECONDS", "1.0"))
+    session_log_max_bytes = int(os.getenv("SESSION_LOG_MAX_BYTES", "10485760"))
+    tts_archive_format = os.getenv("TTS_ARCHIVE_FORMAT", "").strip().lower()
+    tts_cache_enabled = _bool_env("TTS_CACHE_ENABLED", True)
+    tts_cache_dir = os.getenv("TTS_CACHE_DIR", "").strip()
+    tts_cache_memory_mb = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+    tts_cache_disk_mb = int(os.getenv("TTS_CACHE_DISK_MB", "256"))
+    tts_cache_max_chars = int(os.getenv("TTS_CACHE_MAX_CHARS", "200"))
+    metrics_prometheus_path = os.getenv("METRICS_PROMETHEUS_PATH", "").strip()
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    tts_null_sink = _bool_env("TTS_NULL_SINK", False)
+    batch_stt_workers = int(os.getenv("BATCH_STT_WORKERS", "1"))
+    batch_stt_batch_size = int(os.getenv("BATCH_STT_BATCH_SIZE", "8"))
+    batch_llm_concurrency = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+    batch_tts_workers = int(os.getenv("BATCH_TTS_WORKERS", "2"))
+    server_host = os.getenv("SERVER_HOST", "127.0.0.1").strip()
+    server_port = int(os.getenv("SERVER_PORT", "8765"))
+    server_stt_slots = int(os.getenv("SERVER_STT_SLOTS", "1"))
+    server_llm_slots = int(os.getenv("SERVER_LLM_SLOTS", "4"))
+    server_tts_slots = int(os.getenv("SERVER_TTS_SLOTS", "2"))
+    llm_hedge_after = float(os.getenv("LLM_HEDGE_AFTER", "1.5"))
+    llm_health_interval = float(os.getenv("LLM_HEALTH_INTERVAL", "10.0"))
+    llm_summary_model = os.getenv("LLM_SUMMARY_MODEL", "").strip()
+    rtstt_realtime_model = os.getenv("RTSTT_REALTIME_MODEL", "tiny.en").strip()
+    speculative_llm = _bool_env("SPECULATIVE_LLM", False)
+    speculative_stable_seconds = float(os.getenv("SPECULATIVE_STABLE_SECONDS", "0.3"))
+    speculative_tts = _bool_env("SPECULATIVE_TTS", False)
+    tts_workers = int(os.getenv("TTS_WORKERS", "1"))
+    tts_threads_per_worker = int(os.getenv("TTS_THREADS_PER_WORKER", "0"))
+    rtstt_cpu_threads = int(os.getenv("RTSTT_CPU_THREADS", "").strip() or "0")
+    stt_profile_path = os.getenv("STT_PROFILE_PATH")
+    if stt_profile_path is None:
+        from src.calibration import default_profile_path
+
+        stt_profile_path = str(default_profile_path())
+    stt_profile_path = os.path.expanduser(stt_profile_path.strip())
+    if stt_profile_path:
+        from src.calibration import load_stt_profile
+
+        # Written by `main.py calibrate`: the measured Whisper setup fills in whatever is not set explicitly.
+        profile = load_stt_profile(stt_profile_path)
+        if profile is not None:
+            if not os.getenv("RTSTT_MODEL", "").strip():
+                rtstt_model = profile.model
+            if not os.getenv("RTSTT_COMPUTE_TYPE", "").strip():
+                rtstt_compute_type = profile.compute_type
+            if not os.getenv("RTSTT_CPU_THREADS", "").strip():
+                rtstt_cpu_threads = profile.cpu_threads
+    rtstt_silero_sensitivity = float(os.getenv("RTSTT_SILERO_SENSITIVITY", "0.4"))
+    rtstt_webrtc_sensitivity = int(os.getenv("RTSTT_WEBRTC_SENSITIVITY", "3"))
+    rtstt_silero_deactivity = _bool_env("RTSTT_SILERO_DEACTIVITY", False)
+    rtstt_post_speech_silence = float(os.getenv("RTSTT_POST_SPEECH_SILENCE", "0.6"))
+    rtstt_min_recording_seconds = float(os.getenv("RTSTT_MIN_RECORDING_SECONDS", "0.5"))
+    rtstt_min_gap_seconds = float(os.getenv("RTSTT_MIN_GAP_SECONDS", "0.0"))
+    rtstt_pre_recording_buffer = float(os.getenv("RTSTT_PRE_RECORDING_BUFFER", "1.0"))
+    rtstt_early_transcription_on_silence = float(os.getenv("RTSTT_EARLY_TRANSCRIPTION_ON_SILENCE", "0.0"))
+    rtstt_realtime_pause = float(os.getenv("RTSTT_REALTIME_PAUSE", "0.2"))
+    adaptive_endpointing = _bool_env("ADAPTIVE_ENDPOINTING", False)
+    endpoint_short_silence = float(os.getenv("ENDPOINT_SHORT_SILENCE", "0.25"))
+    endpoint_long_silence = float(os.getenv("ENDPOINT_LONG_SILENCE", "1.0"))
+    search_index_path = os.getenv("SEARCH_INDEX_PATH", "memory/search.db").strip()
+    filler_enabled = _bool_env("FILLER_ENABLED", False)
+    filler_phrases = os.getenv("FILLER_PHRASES", "Mm-hm.|Let me think.|Hmm, okay.|Right.").strip()
+    filler_delay = float(os.getenv("FILLER_DELAY", "0.7"))
+    filler_crossfade_seconds = float(os.getenv("FILLER_CROSSFADE_SECONDS", "0.12"))
+    server_session_idle_seconds = float(os.getenv("SERVER_SESSION_IDLE_SECONDS", "1800"))
 
     return Settings(
         rtstt_model=rtstt_model,
@@ -85,4 +237,71 @@ def get_settings() -> Settings:
         context_window_messages=context_window_messages,
         summarise_prompt=summarise_prompt,
         llm_prompt_conversational=llm_prompt_conversational,
+        llm_stream=llm_stream,
+        tts_buffer_seconds=tts_buffer_seconds,
+        llm_connect_timeout=llm_connect_timeout,
+        llm_pool_size=llm_pool_size,
+        llm_max_retries=llm_max_retries,
+        llm_retry_backoff=llm_retry_backoff,
+        concurrent_pipeline=concurrent_pipeline,
+        barge_in=barge_in,
+        context_reply_tokens=context_reply_tokens,
+        summary_background=summary_background,
+        summary_batch_messages=summary_batch_messages,
+        llm_structured_messages=llm_structured_messages,
+        llm_cache_prompt=llm_cache_prompt,
+        recall_enabled=recall_enabled,
+        recall_top_k=recall_top_k,
+        recall_min_score=recall_min_score,
+        recall_embedding_endpoint=recall_embedding_endpoint,
+        recall_embedding_model=recall_embedding_model,
+        session_log_flush_seconds=session_log_flush_seconds,
+        session_log_max_bytes=session_log_max_bytes,
+        tts_archive_format=tts_archive_format,
+        tts_cache_enabled=tts_cache_enabled,
+        tts_cache_dir=tts_cache_dir,
+        tts_cache_memory_mb=tts_cache_memory_mb,
+        tts_cache_disk_mb=tts_cache_disk_mb,
+        tts_cache_max_chars=tts_cache_max_chars,
+        metrics_prometheus_path=metrics_prometheus_path,
+        metrics_port=metrics_port,
+        tts_null_sink=tts_null_sink,
+        batch_stt_workers=batch_stt_workers,
+        batch_stt_batch_size=batch_stt_batch_size,
+        batch_llm_concurrency=batch_llm_concurrency,
+        batch_tts_workers=batch_tts_workers,
+        server_host=server_host,
+        server_port=server_port,
+        server_stt_slots=server_stt_slots,
+        server_llm_slots=server_llm_slots,
+        server_tts_slots=server_tts_slots,
+        llm_hedge_after=llm_hedge_after,
+        llm_health_interval=llm_health_interval,
+        llm_summary_model=llm_summary_model,
+        rtstt_realtime_model=rtstt_realtime_model,
+        speculative_llm=speculative_llm,
+        speculative_stable_seconds=speculative_stable_seconds,
+        speculative_tts=speculative_tts,
+        tts_workers=tts_workers,
+        tts_threads_per_worker=tts_threads_per_worker,
+        rtstt_cpu_threads=rtstt_cpu_threads,
+        stt_profile_path=stt_profile_path,
+        rtstt_silero_sensitivity=rtstt_silero_sensitivity,
+        rtstt_webrtc_sensitivity=rtstt_webrtc_sensitivity,
+        rtstt_silero_deactivity=rtstt_silero_deactivity,
+        rtstt_post_speech_silence=rtstt_post_speech_silence,
+        rtstt_min_recording_seconds=rtstt_min_recording_seconds,
+        rtstt_min_gap_seconds=rtstt_min_gap_seconds,
+        rtstt_pre_recording_buffer=rtstt_pre_recording_buffer,
+        rtstt_early_transcription_on_silence=rtstt_early_transcription_on_silence,
+        rtstt_realtime_pause=rtstt_realtime_pause,
+        adaptive_endpointing=adaptive_endpointing,
+        endpoint_short_silence=endpoint_short_silence,
+        endpoint_long_silence=endpoint_long_silence,
+        search_index_path=search_index_path,
+        filler_enabled=filler_enabled,
+        filler_phrases=filler_phrases,
+        filler_delay=filler_delay,
+        filler_crossfade_seconds=filler_crossfade_seconds,
+        server_session_idle_seconds=server_session_idle_seconds,
     )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from src.metrics import TurnMetrics
+
+# Words an utterance almost never ends on, even when the transcript put a full stop after them:
+# the speaker is pausing mid-clause (prepositions and pronouns are left out - "Where are you from?").
+CONTINUATION_WORDS = frozenset(
+    "a an the and or but so because if than my your our their um uh er erm hmm".split()
+)
+_LAST_WORD = re.compile(r"([\w']+)\W*$")
+
+
+def classify(text: str) -> str:
+    """'complete' (looks like a finished sentence), 'incomplete' (mid-clause) or 'unknown'."""
+    text = text.strip()
+    if not text:
+        return "unknown"
+    if text.endswith(("?", "!")):
+        return "complete"
+    match = _LAST_WORD.search(text)
+    if match is not None and match.group(1).lower() in CONTINUATION_WORDS:
+        return "incomplete"
+    if text.endswith(("...", "…", ",", ";", ":", "-")):
+        return "incomplete"
+    if text.endswith("."):
+        return "complete"
+    return "unknown"
+
+
+class AdaptiveEndpointer:
+    """
+    Moves the recorder's post-speech silence timeout while the user speaks. RealtimeSTT re-reads
+    post_speech_silence_duration on every VAD frame, so each realtime transcript update can shorten
+    the wait when the text so far reads as a finished sentence and lengthen it mid-clause.
+    """
+
+    def __init__(
+        self,
+        base_silence: float,
+        short_silence: float,
+        long_silence: float,
+        metrics: Optional[TurnMetrics] = None,
+    ):
+        self.base_silence = base_silence
+        self.short_silence = short_silence
+        self.long_silence = long_silence
+        self.metrics = metrics
+        self._silence = {"complete": short_silence, "incomplete": long_silence, "unknown": base_silence}
+        self._lock = threading.Lock()
+        self._recorder: Any = None
+        self._state = "unknown"
+
+    def attach(self, recorder: Any) -> None:
+        self._recorder = recorder
+        self._apply("unknown")
+
+    def _apply(self, state: str) -> None:
+        with self._lock:
+            self._state = state
+            if self._recorder is not None:
+                self._recorder.post_speech_silence_duration = self._silence[state]
+
+    def on_partial(self, text: str) -> None:
+        """Realtime transcript update (the recorder's on_realtime_transcription_update)."""
+        self._apply(classify(text))
+
+    def on_recording_start(self) -> None:
+        self._apply("unknown")
+
+    def on_recording_stop(self) -> float:
+        """The silence the turn just waited for (its endpoint delay); resets for the next utterance."""
+        with self._lock:
+            state = self._state
+        if self.metrics is not None:
+            self.metrics.count(f"endpoint_{state}")
+        delay = self._silence[state]
+        self._apply("unknown")
+        return delay
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import random
+import sys
+import threading
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from src.metrics import TurnMetrics
+    from src.tts_cache import CachedAudio
+    from src.tts_engine import TtsEngine
+
+
+def parse_phrases(value: str) -> List[str]:
+    """FILLER_PHRASES: acknowledgements separated by |."""
+    return [phrase.strip() for phrase in value.split("|") if phrase.strip()]
+
+
+class PendingFiller:
+    """One armed filler: plays after the pool's delay unless cancelled first (by the first token)."""
+
+    def __init__(self, pool: FillerPool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self.played = False
+        self._timer = threading.Timer(pool.delay, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _fire(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self.played = self._pool.play()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+        self._timer.cancel()
+
+
+class FillerPool:
+    """
+    Short acknowledgements ("Mm-hm.", "Let me think.") synthesized once at startup with the
+    configured voice and kept in memory. arm() when the request goes out; if the first token has
+    not arrived within delay seconds one of them plays, and the reply crossfades into it.
+    Playing a filler never touches the synthesis path.
+    """
+
+    def __init__(
+        self,
+        tts_engine: TtsEngine,
+        phrases: Sequence[str],
+        delay: float = 0.7,
+        crossfade: float = 0.12,
+        metrics: Optional[TurnMetrics] = None,
+    ):
+        self.tts_engine = tts_engine
+        self.phrases = list(phrases)
+        self.delay = delay
+        self.crossfade = crossfade
+        self.metrics = metrics
+        self.clips: List[CachedAudio] = []
+        self._last = -1
+        self._random = random.Random()
+
+    def prepare(self) -> int:
+        """Render every phrase (call at startup, after the voice is loaded); returns the clips ready."""
+        if not self.tts_engine.enabled:
+            return 0
+        for phrase in self.phrases:
+            try:
+                audio = self.tts_engine.render(phrase).audio
+            except Exception as exc:
+                print(f"[SYSTEM] Filler synthesis failed: {exc}", file=sys.stderr)
+                continue
+            if audio is not None:
+                self.clips.append(audio)
+        return len(self.clips)
+
+    def arm(self) -> Optional[PendingFiller]:
+        return PendingFiller(self) if self.clips else None
+
+    def play(self) -> bool:
+        # Never the same acknowledgement twice in a row.
+        choices = [i for i in range(len(self.clips)) if i != self._last] or [0]
+        index = self._random.choice(choices)
+        if not self.tts_engine.play_filler(self.clips[index], self.crossfade):
+            return False
+        self._last = index
+        if self.metrics is not None:
+            self.metrics.count("filler_played")
+        return True
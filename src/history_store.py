@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, message_to_dict, messages_from_dict  # type: ignore[import-not-found]
+
+from src.token_counter import estimate_tokens
+
+
+def message_tokens(message: BaseMessage) -> int:
+    # Counted as rendered in the prompt ("User: ..." plus the newline).
+    return estimate_tokens(str(message.content)) + 3
+
+
+@dataclass(frozen=True)
+class StoredMessage:
+    id: int
+    message: BaseMessage
+    tokens: int
+
+
+def _load(rows: Iterable[Tuple[int, str]]) -> List[StoredMessage]:
+    rows = list(rows)
+    messages = messages_from_dict([json.loads(r[1]) for r in rows])
+    return [StoredMessage(r[0], m, message_tokens(m)) for r, m in zip(rows, messages)]
+
+
+class HistoryStore:
+    """
+    Lean sqlite3 message store.
+    Uses the same `message_store` schema as LangChain's SQLChatMessageHistory so existing DBs keep working.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS message_store "
+                "(id INTEGER PRIMARY KEY, session_id TEXT, message TEXT)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_message_store_session_id_id "
+                "ON message_store (session_id, id)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_summary "
+                "(session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, through_id INTEGER NOT NULL)"
+            )
+
+    def append(self, session_id: str, messages: Iterable[BaseMessage]) -> List[int]:
+        ids: List[int] = []
+        with self._lock, self._conn:
+            for m in messages:
+                cursor = self._conn.execute(
+                    "INSERT INTO message_store (session_id, message) VALUES (?, ?)",
+                    (session_id, json.dumps(message_to_dict(m))),
+                )
+                ids.append(int(cursor.lastrowid))
+        return ids
+
+    def tail(self, session_id: str, limit: int) -> List[StoredMessage]:
+        """Return the last `limit` messages for a session, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, message FROM message_store WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+        return _load(reversed(rows))
+
+    def after(self, session_id: str, after_id: int, up_to_id: Optional[int] = None, limit: int = -1) -> List[StoredMessage]:
+        """Messages with after_id < id <= up_to_id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, message FROM message_store WHERE session_id = ? AND id > ? AND id <= ? "
+                "ORDER BY id LIMIT ?",
+                (session_id, after_id, up_to_id if up_to_id is not None else 2**63 - 1, limit),
+            ).fetchall()
+        return _load(rows)
+
+    def newest_id(self, session_id: str, offset: int = 0) -> Optional[int]:
+        """Id of the message `offset` places before the newest one, if there is one."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM message_store WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (session_id, offset),
+            ).fetchone()
+        return int(row[0]) if row else None
+
+    def ids(self, session_id: str) -> List[int]:
+        """Every message id stored for a session, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM message_store WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return [int(r[0]) for r in rows]
+
+    def rows_after(self, after_id: int, limit: int) -> List[Tuple[int, str, BaseMessage]]:
+        """(id, session_id, message) rows across all sessions with id > after_id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, session_id, message FROM message_store WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        messages = messages_from_dict([json.loads(r[2]) for r in rows])
+        return [(int(r[0]), r[1], m) for r, m in zip(rows, messages)]
+
+    def turn_batches(self, after_id: int, batch_size: int) -> Iterator[Tuple[List[Tuple[int, str, str, str]], int]]:
+        """
+        (user message id, session_id, user_text, assistant_text) turns with ids > after_id, read
+        batch_size rows at a time; each batch comes with the id to resume after once it is handled.
+        """
+        while True:
+            rows = self.rows_after(after_id, limit=batch_size)
+            if not rows:
+                return
+            turns: List[Tuple[int, str, str, str]] = []
+            for (message_id, session_id, message), nxt in zip(rows, rows[1:] + [None]):
+                if isinstance(message, HumanMessage) and nxt is not None and nxt[1] == session_id and not isinstance(nxt[2], HumanMessage):
+                    turns.append((message_id, session_id, str(message.content), str(nxt[2].content)))
+            # Leave a trailing user message for the next batch, in case its reply is in it.
+            after_id = rows[-2][0] if len(rows) > 1 and isinstance(rows[-1][2], HumanMessage) else rows[-1][0]
+            yield turns, after_id
+            if len(rows) < batch_size:
+                return
+
+    def turn_at(self, message_id: int) -> Optional[Tuple[str, str, str]]:
+        """(session_id, user_text, assistant_text) for the turn starting at message_id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, message FROM message_store WHERE id >= ? "
+                "AND session_id = (SELECT session_id FROM message_store WHERE id = ?) ORDER BY id LIMIT 2",
+                (message_id, message_id),
+            ).fetchall()
+        if len(rows) < 2:
+            return None
+        user, assistant = messages_from_dict([json.loads(r[1]) for r in rows])
+        return rows[0][0], str(user.content), str(assistant.content)
+
+    def all(self, session_id: str) -> List[StoredMessage]:
+        return self.after(session_id, 0)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM message_store WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM session_summary WHERE session_id = ?", (session_id,))
+
+    def load_summary(self, session_id: str) -> Tuple[str, int]:
+        """Rolling summary for a session and the id of the last message folded into it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, through_id FROM session_summary WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return (row[0], int(row[1])) if row else ("", 0)
+
+    def save_summary(self, session_id: str, summary: str, through_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO session_summary (session_id, summary, through_id) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, through_id = excluded.through_id",
+                (session_id, summary, through_id),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChatHistory:
+    """
+    Write-through session history: the most recent messages stay in a bounded in-memory deque,
+    each paired with its token count so prompt budgeting never re-tokenises old turns.
+    """
+
+    def __init__(self, store: HistoryStore, session_id: str, capacity: int):
+        self.store = store
+        self.session_id = session_id
+        self.capacity = max(1, capacity)
+        self._recent: Deque[StoredMessage] = deque(maxlen=self.capacity)
+        self._warm = False
+        self._lock = threading.Lock()
+
+    def _warm_up(self) -> None:
+        if not self._warm:
+            self._recent.extend(self.store.tail(self.session_id, self.capacity))
+            self._warm = True
+
+    def tail(self, count: int) -> List[StoredMessage]:
+        """Last `count` messages; served from memory unless more than the cache holds is asked for."""
+        if count <= 0:
+            return []
+        if count > self.capacity:
+            return self.store.tail(self.session_id, count)
+        with self._lock:
+            self._warm_up()
+            recent = list(self._recent)
+        return recent[-count:]
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Full session history (reads the store)."""
+        return [m.message for m in self.store.all(self.session_id)]
+
+    def add_messages(self, messages: List[BaseMessage]) -> List[int]:
+        with self._lock:
+            self._warm_up()
+            ids = self.store.append(self.session_id, messages)
+            self._recent.extend(StoredMessage(i, m, message_tokens(m)) for i, m in zip(ids, messages))
+        return ids
+
+    def clear(self) -> None:
+        with self._lock:
+            self.store.clear(self.session_id)
+            self._recent.clear()
+            self._warm = True
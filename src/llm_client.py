@@ -1,48 +1,362 @@
 from __future__ import annotations
 
+import copy
+import dataclasses
+import json
+import math
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 @dataclass
 class LLMConfig:
-    endpoint: str
+    endpoint: str  # one URL, or a comma-separated pool of "url" / "url*weight" entries
     model: str
-    timeout: float = 60.0
+    timeout: float = 60.0  # read timeout
+    connect_timeout: float = 5.0
+    pool_size: int = 4
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    cache_prompt: bool = False
+    hedge_after: float = 0.0  # seconds without a first token before racing a second backend; 0 = off
+    health_interval: float = 10.0  # seconds between background probes of a multi-endpoint pool; 0 = off
+    summary_model: str = ""  # model for summarisation calls (same endpoints); "" = use model
+
+# Either a flattened prompt (sent as one user message) or role-tagged chat messages.
+Prompt = Union[str, List[Dict[str, str]]]
+
+
+def parse_endpoints(spec: str) -> List[Tuple[str, float]]:
+    """Split "url*2, url" into [(url, 2.0), (url, 1.0)]."""
+    endpoints: List[Tuple[str, float]] = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, weight = entry.partition("*")
+        endpoints.append((url.strip(), float(weight) if weight.strip() else 1.0))
+    if not endpoints:
+        raise ValueError("no LLM endpoint configured")
+    if any(weight <= 0 for _, weight in endpoints):
+        raise ValueError(f"LLM endpoint weights must be positive: {spec!r}")
+    return endpoints
+
+
+def models_url(endpoint: str) -> str:
+    """The server's /v1/models route (or the endpoint itself if it has no /v1/ prefix)."""
+    return endpoint.rsplit("/v1/", 1)[0] + "/v1/models" if "/v1/" in endpoint else endpoint
+
+
+def build_session(config: LLMConfig) -> requests.Session:
+    """Create a keep-alive session with a bounded connection pool and retry policy."""
+    retry = Retry(
+        total=config.max_retries,
+        connect=config.max_retries,
+        read=0,
+        status=config.max_retries,
+        backoff_factor=config.retry_backoff,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    # One connection pool per backend host.
+    hosts = len(parse_endpoints(config.endpoint))
+    adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=config.pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Backend:
+    """One OpenAI-compatible server in the pool, with its current load and health."""
+
+    def __init__(self, endpoint: str, weight: float = 1.0):
+        self.endpoint = endpoint
+        self.weight = weight
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # smoothed probe round-trip time
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class EndpointPool:
+    """
+    Routes each request to the least-loaded healthy backend (in-flight requests per unit of weight,
+    then probe latency). A failing backend is skipped for cooldown seconds or until a probe succeeds;
+    if every backend is down they are all tried anyway.
+    """
+
+    def __init__(self, endpoints: List[Tuple[str, float]], cooldown: float = 30.0):
+        self.backends = [Backend(url, weight) for url, weight in endpoints]
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(backend.in_flight for backend in self.backends)
+
+    def acquire(self, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """Pick a backend not in exclude and count a request against it (see release)."""
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+            healthy = [b for b in candidates if b.healthy] or candidates
+            backend = min(
+                healthy,
+                key=lambda b: ((b.in_flight + 1) / b.weight, b.latency if b.latency is not None else math.inf),
+            )
+            backend.in_flight += 1
+            return backend
+
+    def release(self, backend: Backend) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+
+    def mark_ok(self, backend: Backend, latency: Optional[float] = None) -> None:
+        with self._lock:
+            backend.down_until = 0.0
+            if latency is not None:
+                backend.latency = latency if backend.latency is None else 0.7 * backend.latency + 0.3 * latency
+
+    def mark_failed(self, backend: Backend) -> None:
+        with self._lock:
+            backend.failures += 1
+            backend.down_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": b.endpoint,
+                    "weight": b.weight,
+                    "healthy": b.healthy,
+                    "in_flight": b.in_flight,
+                    "latency": b.latency,
+                    "failures": b.failures,
+                }
+                for b in self.backends
+            ]
+
+
+def _backend_fault(exc: BaseException) -> bool:
+    """
+    Whether an error says the backend is unwell (connection failure, timeout, 5xx) rather than that
+    the request itself was rejected (4xx), which another backend would reject just the same.
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+class _StreamAttempt:
+    """One streamed request of a hedged call, read on its own thread into the call's event queue."""
+
+    def __init__(self, client: "LLMClient", backend: Backend, payload: Dict[str, Any], events: "queue.Queue[Any]"):
+        self.backend = backend
+        self.usage: Optional[Dict[str, Any]] = None
+        self.cancelled = threading.Event()
+        self._client = client
+        self._payload = payload
+        self._events = events
+        threading.Thread(target=self._run, name="llm-stream", daemon=True).start()
+
+    def _run(self) -> None:
+        pool = self._client.pool
+        try:
+            for content in self._client._iter_stream(self.backend, self._payload, self):
+                if self.cancelled.is_set():
+                    return
+                self._events.put((self, "delta", content))
+            pool.mark_ok(self.backend)
+            self._events.put((self, "done", None))
+        except Exception as exc:
+            if not self.cancelled.is_set():
+                self._events.put((self, "error", exc))
+        finally:
+            pool.release(self.backend)
+
+    def cancel(self) -> None:
+        # Closing the response from here would block on the reader; the thread drops the
+        # connection itself as soon as its next chunk arrives.
+        self.cancelled.set()
 
 
 class LLMClient:
-    # Minimal OpenAI-compatible chat client.
+    # Minimal OpenAI-compatible chat client over one endpoint or a load-balanced pool.
 
     def __init__(self, config: LLMConfig):
         self.config = config
         self.system_prompt: Optional[str] = None
         self.last_usage: Dict[str, Any] | None = None
+        self.session = build_session(config)
+        self.pool = EndpointPool(parse_endpoints(config.endpoint), cooldown=max(config.health_interval, 1.0) * 3)
+        self._stopped = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+        if len(self.pool.backends) > 1 and config.health_interval > 0:
+            self._prober = threading.Thread(target=self._probe_loop, name="llm-health", daemon=True)
+            self._prober.start()
+        # Summarisation calls go through a view with its own model but the same pool and session.
+        self.summaries = self
+        if config.summary_model and config.summary_model != config.model:
+            self.summaries = self.view(config.summary_model)
+
+    def view(self, model: str = "") -> "LLMClient":
+        """
+        A client sharing this one's pool, session and system prompt, with its own last_usage.
+        Its `summaries` is likewise a fresh view of this client's summaries, or the view itself when
+        summaries go through the chat model, so summary usage never lands on the parent.
+        """
+        view = copy.copy(self)
+        view.last_usage = None
+        if model:
+            view.config = dataclasses.replace(self.config, model=model)
+        if self.summaries is self:
+            view.summaries = view
+        else:
+            view.summaries = copy.copy(self.summaries)
+            view.summaries.last_usage = None
+            view.summaries.summaries = view.summaries
+        return view
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently being served; background work waits for this to reach 0."""
+        return self.pool.in_flight
+
+    @contextmanager
+    def _track(self, backend: Optional[Backend] = None) -> Iterator[Backend]:
+        backend = backend or self.pool.acquire()
+        assert backend is not None
+        try:
+            yield backend
+        finally:
+            self.pool.release(backend)
+
+    @property
+    def _timeouts(self) -> tuple[float, float]:
+        return (self.config.connect_timeout, self.config.timeout)
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.session.close()
+
+    def _probe(self, backend: Backend) -> float:
+        started = time.perf_counter()
+        try:
+            response = self.session.get(models_url(backend.endpoint), timeout=self._timeouts)
+            response.raise_for_status()
+        except requests.RequestException:
+            self.pool.mark_failed(backend)
+            raise
+        rtt = time.perf_counter() - started
+        self.pool.mark_ok(backend, rtt)
+        return rtt
+
+    def _probe_loop(self) -> None:
+        while not self._stopped.wait(self.config.health_interval):
+            for backend in self.pool.backends:
+                try:
+                    self._probe(backend)
+                except requests.RequestException:
+                    pass  # already marked down; routing skips it until a probe succeeds
+
+    def ping(self) -> float:
+        """
+        Probe each backend's /v1/models route (falling back to the endpoint itself) and return the
+        fastest round-trip time; also leaves warm keep-alive connections in the pool.
+        """
+        best: Optional[float] = None
+        error: Optional[Exception] = None
+        for backend in self.pool.backends:
+            try:
+                rtt = self._probe(backend)
+            except requests.RequestException as exc:
+                error = exc
+                continue
+            best = rtt if best is None else min(best, rtt)
+        if best is None:
+            assert error is not None
+            raise error
+        return best
 
     def load_system_prompt(self, path: Path) -> None:
         self.system_prompt = path.read_text(encoding="utf-8")
 
-    def complete(self, prompt: str) -> str:
+    def _build_payload(self, prompt: Prompt, stream: bool) -> Dict[str, Any]:
         messages: List[Dict[str, str]] = []
-        if self.system_prompt:
-            messages.append({"role": "system", "content": self.system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        turns = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else list(prompt)
+        # Leading system messages (e.g. a conversation summary) are merged into the system prompt,
+        # since many chat templates accept only one system message.
+        system_parts = [self.system_prompt] if self.system_prompt else []
+        while turns and turns[0]["role"] == "system":
+            system_parts.append(turns.pop(0)["content"])
+        if system_parts:
+            messages.append({"role": "system", "content": "\n\n".join(system_parts)})
+        messages.extend(turns)
         payload: Dict[str, Any] = {
             "model": self.config.model,
             "messages": messages,
-            "stream": False,
+            "stream": stream,
         }
-        response = requests.post(
-            self.config.endpoint,
-            json=payload,
-            timeout=self.config.timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
-        self.last_usage = data.get("usage")
+        if self.config.cache_prompt:
+            # llama.cpp server hint to reuse the KV cache for the shared prompt prefix.
+            payload["cache_prompt"] = True
+        if stream:
+            # Ask for a trailing usage chunk so token accounting still works when streaming.
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def complete(self, prompt: Prompt) -> str:
+        content, self.last_usage = self.complete_with_usage(prompt)
+        return content
+
+    def complete_with_usage(self, prompt: Prompt) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Like complete(), but returns the usage instead of setting last_usage (safe across threads).
+        A backend that fails is marked down and the request moves on to the next one; a request the
+        server rejects (4xx) is raised straight away.
+        """
+        payload = self._build_payload(prompt, stream=False)
+        tried: List[Backend] = []
+        error: Exception = RuntimeError("no LLM endpoint available")
+        while True:
+            backend = self.pool.acquire(exclude=tried)
+            if backend is None:
+                raise error
+            tried.append(backend)
+            try:
+                with self._track(backend):
+                    response = self.session.post(
+                        backend.endpoint,
+                        json=payload,
+                        timeout=self._timeouts,
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+            except requests.RequestException as exc:
+                if not _backend_fault(exc):
+                    raise
+                self.pool.mark_failed(backend)
+                error = exc
+                continue
+            self.pool.mark_ok(backend)
+            break
         # Expected OpenAI-compatible structure
         choices = data.get("choices", [])
         if not choices:
@@ -51,4 +365,106 @@ class LLMClient:
         content = message.get("content")
         if not isinstance(content, str):
             raise ValueError("LLM response content missing or invalid")
-        return content
+        return content, data.get("usage")
+
+    def complete_stream(self, prompt: Prompt) -> Iterator[str]:
+        """
+        Stream the reply as content deltas parsed from OpenAI-compatible SSE events.
+        last_usage is updated once the stream finishes (if the server reports usage).
+        """
+        payload = self._build_payload(prompt, stream=True)
+        self.last_usage = None
+        if len(self.pool.backends) == 1:
+            with self._track() as backend:
+                yield from self._iter_stream(backend, payload)
+            return
+        yield from self._pooled_stream(payload)
+
+    def _pooled_stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream from the least-loaded backend. If it fails before the first token the request moves
+        to the next backend (unless the request itself was rejected); if it is merely slow (no token within hedge_after) a second backend is
+        raced against it and whichever answers first is kept, the other cancelled.
+        """
+        events: "queue.Queue[Tuple[_StreamAttempt, str, Any]]" = queue.Queue()
+        tried: List[Backend] = []
+        running: List[_StreamAttempt] = []
+
+        def launch() -> bool:
+            backend = self.pool.acquire(exclude=tried)
+            if backend is None:
+                return False
+            tried.append(backend)
+            running.append(_StreamAttempt(self, backend, payload, events))
+            return True
+
+        launch()
+        winner: Optional[_StreamAttempt] = None
+        hedge_at = time.monotonic() + self.config.hedge_after if self.config.hedge_after > 0 else None
+        try:
+            while True:
+                timeout = max(0.0, hedge_at - time.monotonic()) if winner is None and hedge_at is not None else None
+                try:
+                    attempt, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_at = None
+                    launch()
+                    continue
+                if winner is not None and attempt is not winner:
+                    continue
+                if kind == "error":
+                    if not _backend_fault(value):
+                        raise value
+                    self.pool.mark_failed(attempt.backend)
+                    if winner is not None:
+                        raise value
+                    running.remove(attempt)
+                    if not running and not launch():
+                        raise value
+                    continue
+                if winner is None:
+                    winner = attempt
+                    for other in running:
+                        if other is not winner:
+                            other.cancel()
+                if kind == "done":
+                    self.last_usage = winner.usage
+                    return
+                yield value
+        finally:
+            for attempt in running:
+                attempt.cancel()
+
+    def _iter_stream(
+        self, backend: Backend, payload: Dict[str, Any], attempt: Optional[_StreamAttempt] = None
+    ) -> Iterator[str]:
+        response = self.session.post(
+            backend.endpoint,
+            json=payload,
+            timeout=self._timeouts,
+            stream=True,
+        )
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data_str = line[len("data:") :].strip()
+                if data_str == "[DONE]":
+                    break
+                data = json.loads(data_str)
+                usage = data.get("usage")
+                if usage:
+                    if attempt is not None:
+                        attempt.usage = usage
+                    else:
+                        self.last_usage = usage
+                choices = data.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta") or {}
+                content = delta.get("content")
+                if isinstance(content, str) and content:
+                    yield content
+        finally:
+            response.close()
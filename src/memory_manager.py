@@ -1,70 +1,258 @@
 from __future__ import annotations
 
-from __future__ import annotations
-
+import sys
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Union
 
-from langchain_community.chat_message_histories import SQLChatMessageHistory  # type: ignore[import-not-found]
 from langchain_core.messages import AIMessage, HumanMessage, BaseMessage  # type: ignore[import-not-found]
 
 from src.config import Settings
+from src.history_store import ChatHistory, HistoryStore, StoredMessage
+from src.recall import RecallIndex
+from src.search_index import SearchIndex
+from src.token_counter import estimate_tokens
+
+SUMMARY_PREFIX = "Summary: "
+MEMORIES_HEADER = "Relevant memories from earlier conversations:"
+
+ChatMessages = List[Dict[str, str]]
+
+
+def _render(messages: Sequence[BaseMessage]) -> str:
+    lines = []
+    for m in messages:
+        role = "User" if isinstance(m, HumanMessage) else "Assistant"
+        lines.append(f"{role}: {m.content}")
+    return "\n".join(lines)
 
 
 class MemoryManager:
-    """Maintains rolling recent context with persistent SQLite history."""
+    """Maintains rolling recent context with persistent SQLite history and a rolling summary."""
 
-    def __init__(self, settings: Settings, session_id: Optional[str] = None):
+    def __init__(
+        self,
+        settings: Settings,
+        session_id: Optional[str] = None,
+        db_path: Optional[Path] = None,
+        store: Optional[HistoryStore] = None,
+    ):
         self.window = settings.context_window_messages
-        db_path = Path("memory") / "memory.db"
-        db_path.parent.mkdir(parents=True, exist_ok=True)
         self.session_id = session_id or datetime.now(timezone.utc).strftime("session_%Y%m%dT%H%M%SZ")
-        self.history = SQLChatMessageHistory(
-            session_id=self.session_id,
-            connection=f"sqlite:///{db_path}",
-        )
+        if store is None:
+            # Server mode passes one store shared by every session instead of a connection each.
+            db_path = db_path or Path("memory") / "memory.db"
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            store = HistoryStore(db_path)
+        self.store = store
+        # The window only ever shrinks, so caching its initial size covers every prompt.
+        self.history = ChatHistory(self.store, self.session_id, capacity=self.window)
+        # Prompt tokens available to history: the context window minus room for the reply.
+        self.token_budget = max(0, settings.context_window_tokens - settings.context_reply_tokens)
+        self.system_prompt_tokens = 0
+        # Messages with id <= summary_through are represented by the summary instead of verbatim.
+        self.summary, self.summary_through = self.store.load_summary(self.session_id)
+        self._summary_lock = threading.Lock()
+        # Bumped by clear_history, so a fold that started before a clear never writes back.
+        self._generation = 0
+        self.structured = settings.llm_structured_messages
+        # Structured mode keeps the sent prefix frozen: the summary snapshot and the id after which
+        # turns are replayed only change when the window overflows.
+        self._prefix_summary, self._prefix_after = self.summary, self.summary_through
+        # Optional long-term recall over every stored session (see build_recall_index in main).
+        self.recall: Optional[RecallIndex] = None
+        self.recall_top_k = settings.recall_top_k
+        # Optional full-text index of every turn (see src/search_index.py).
+        self.search_index: Optional[SearchIndex] = None
+
+    def _recall_block(self, user_text: str, budget: int) -> str:
+        """Best-matching turns from earlier sessions, rendered and trimmed to fit budget."""
+        if self.recall is None or self.recall_top_k <= 0:
+            return ""
+        try:
+            memories = self.recall.search(user_text, self.recall_top_k, exclude_session=self.session_id)
+        except Exception as exc:
+            print(f"[SYSTEM] Recall failed: {exc}", file=sys.stderr)
+            return ""
+        lines = [MEMORIES_HEADER]
+        used = estimate_tokens(MEMORIES_HEADER)
+        for memory in memories:
+            tokens = estimate_tokens(memory) + 2
+            if used + tokens > budget:
+                break
+            lines.append(f"- {memory}")
+            used += tokens
+        return "\n".join(lines) if len(lines) > 1 else ""
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Account for the system prompt, which is sent ahead of every assembled context."""
+        self.system_prompt_tokens = estimate_tokens(system_prompt) if system_prompt else 0
 
     def build_context_prompt(self, user_text: str) -> str:
-        msgs: List[BaseMessage] = self.history.messages[-self.window :]
+        """
+        Assemble the prompt newest-first within the token budget: the user's text always goes in,
+        then the rolling summary and recalled memories, then as many recent messages (up to the window)
+        as still fit.
+        """
+        current = f"User: {user_text}"
+        remaining = self.token_budget - self.system_prompt_tokens - estimate_tokens(current)
+        summary, through = self.summary, self.summary_through
         stitched: List[str] = []
-        for m in msgs:
-            role = "User" if isinstance(m, HumanMessage) else "Assistant"
-            stitched.append(f"{role}: {m.content}")
-        stitched.append(f"User: {user_text}")
+        if summary:
+            summary_line = f"{SUMMARY_PREFIX}{summary}"
+            summary_tokens = estimate_tokens(summary_line)
+            if summary_tokens <= remaining:
+                stitched.append(summary_line)
+                remaining -= summary_tokens
+        memories = self._recall_block(user_text, remaining // 2)
+        if memories:
+            stitched.append(memories)
+            remaining -= estimate_tokens(memories)
+        recent: List[BaseMessage] = []
+        for entry in reversed(self.history.tail(self.window)):
+            if entry.id <= through or entry.tokens > remaining:
+                break
+            recent.append(entry.message)
+            remaining -= entry.tokens
+        recent.reverse()
+        if recent:
+            stitched.append(_render(recent))
+        stitched.append(current)
         return "\n".join(stitched)
 
-    def record_turn(self, user_text: str, assistant_text: str) -> None:
-        self.history.add_messages(
+    def build_context(self, user_text: str) -> Union[str, ChatMessages]:
+        """Prompt for the configured mode: a flattened string or role-tagged messages."""
+        if self.structured:
+            return self.build_context_messages(user_text)
+        return self.build_context_prompt(user_text)
+
+    def preview_context(self, user_text: str) -> Union[str, ChatMessages]:
+        """
+        The prompt build_context would return now, without moving the structured prefix (for
+        speculative requests, which run alongside the real turns).
+        """
+        if self.structured:
+            return self.build_context_messages(user_text, commit=False)
+        return self.build_context_prompt(user_text)
+
+    def build_context_messages(self, user_text: str, commit: bool = True) -> ChatMessages:
+        """
+        Role-tagged messages (summary, turns, new user text) whose prefix is append-only between
+        resets, so servers with prompt caching only prefill the newest turn.
+        When the window or token budget overflows, the oldest half is dropped in one step and the
+        latest summary is snapshotted, rather than sliding (and invalidating the cache) every turn.
+        With commit=False the prefix is computed but not kept.
+        """
+        remaining = self.token_budget - self.system_prompt_tokens - estimate_tokens(user_text) - 3
+        # Recalled memories change every turn, so they ride on the new user message, after the prefix.
+        memories = self._recall_block(user_text, remaining // 2)
+        remaining -= estimate_tokens(memories)
+        tail = self.history.tail(self.window)
+        with self._summary_lock:
+            summary, summary_through = self.summary, self.summary_through
+            prefix_summary, prefix_after, generation = self._prefix_summary, self._prefix_after, self._generation
+        entries = [e for e in tail if e.id > prefix_after]
+        summary_tokens = estimate_tokens(prefix_summary) + 8 if prefix_summary else 0
+        overflowed = len(tail) == self.window and tail[0].id > prefix_after and (
+            (self.store.newest_id(self.session_id, offset=self.window) or 0) > prefix_after
+        )
+        if overflowed or summary_tokens + sum(e.tokens for e in entries) > remaining:
+            prefix_summary = summary
+            summary_tokens = estimate_tokens(summary) + 8 if summary else 0
+            if summary_tokens > remaining:
+                prefix_summary, summary_tokens = "", 0
+            kept: List[StoredMessage] = []
+            budget = remaining - summary_tokens
+            for entry in reversed(tail[-max(1, self.window // 2) :]):
+                if entry.id <= summary_through or entry.tokens > budget:
+                    break
+                kept.append(entry)
+                budget -= entry.tokens
+            kept.reverse()
+            prefix_after = kept[0].id - 1 if kept else (tail[-1].id if tail else summary_through)
+            entries = kept
+            if commit:
+                with self._summary_lock:
+                    # A clear in the meantime already reset the prefix.
+                    if self._generation == generation:
+                        self._prefix_summary, self._prefix_after = prefix_summary, prefix_after
+        messages: ChatMessages = []
+        if prefix_summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {prefix_summary}"})
+        for entry in entries:
+            role = "user" if isinstance(entry.message, HumanMessage) else "assistant"
+            messages.append({"role": role, "content": str(entry.message.content)})
+        content = f"{memories}\n\n{user_text}" if memories else user_text
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def record_turn(self, user_text: str, assistant_text: str) -> int:
+        """Store a turn and index it; returns the id of its user message (the turn's key in the indexes)."""
+        ids = self.history.add_messages(
             [HumanMessage(content=user_text), AIMessage(content=assistant_text)]
         )
+        if self.recall is not None:
+            try:
+                self.recall.add_turn(ids[0], user_text, assistant_text)
+            except Exception as exc:
+                print(f"[SYSTEM] Recall indexing failed: {exc}", file=sys.stderr)
+        if self.search_index is not None:
+            try:
+                self.search_index.add_turn(ids[0], self.session_id, user_text, assistant_text)
+            except Exception as exc:
+                print(f"[SYSTEM] Search indexing failed: {exc}", file=sys.stderr)
+        return ids[0]
 
     def shrink_window(self, new_window: int) -> None:
         """Reduce the rolling window size (does not delete history, just limits prompt assembly)."""
         self.window = max(1, new_window)
 
     def clear_history(self) -> None:
-        """Clear stored messages if the context must be reset."""
-        try:
+        """Clear stored messages (and the summary) if the context must be reset."""
+        with self._summary_lock:
             self.history.clear()
-        except Exception:
-            # Fallback: overwrite with empty list if clear is unsupported.
-            self.history.messages = []
+            self._generation += 1
+            self.summary, self.summary_through = "", 0
+            self._prefix_summary, self._prefix_after = "", 0
+
+    def _fold(self, summariser, prompt_prefix: str, pending: List[StoredMessage]) -> int:
+        """Fold pending messages into the summary; the new summary is swapped in atomically."""
+        if not pending:
+            return 0
+        with self._summary_lock:
+            base_summary, base_through, generation = self.summary, self.summary_through, self._generation
+        convo = _render([p.message for p in pending])
+        if base_summary:
+            prompt = f"{prompt_prefix}\n\nSummary so far:\n{base_summary}\n\nConversation:\n{convo}"
+        else:
+            prompt = f"{prompt_prefix}\n\nConversation:\n{convo}"
+        summary = summariser.complete(prompt)
+        with self._summary_lock:
+            if self._generation != generation or self.summary_through != base_through:
+                # History was cleared or folded elsewhere while we were summarising; drop this result.
+                return 0
+            through = pending[-1].id
+            self.store.save_summary(self.session_id, summary, through)
+            self.summary, self.summary_through = summary, through
+        return len(pending)
+
+    def fold_older(self, summariser, prompt_prefix: str, batch_messages: int) -> int:
+        """
+        Fold up to batch_messages of the oldest unsummarised messages that have already left the
+        recent window into the rolling summary. Returns how many messages were folded.
+        """
+        boundary = self.store.newest_id(self.session_id, offset=self.window)
+        if boundary is None or boundary <= self.summary_through:
+            return 0
+        pending = self.store.after(self.session_id, self.summary_through, boundary, limit=batch_messages)
+        return self._fold(summariser, prompt_prefix, pending)
 
     def summarise_history(self, summariser, prompt_prefix: str) -> str:
         """
-        Summarize the full stored history using the provided LLM client.
+        Summarize every stored message not yet in the summary using the provided LLM client.
         The summariser must expose a .complete(prompt: str) -> str method.
         """
-        msgs: List[BaseMessage] = self.history.messages
-        transcript = []
-        for m in msgs:
-            role = "User" if isinstance(m, HumanMessage) else "Assistant"
-            transcript.append(f"{role}: {m.content}")
-        convo = "\n".join(transcript)
-        prompt = f"{prompt_prefix}\n\nConversation:\n{convo}"
-        summary = summariser.complete(prompt)
-        # Reset and store summary as a single assistant message to keep context light.
-        self.clear_history()
-        self.history.add_messages([AIMessage(content=f"Summary: {summary}")])
-        return summary
+        pending = self.store.after(self.session_id, self.summary_through)
+        self._fold(summariser, prompt_prefix, pending)
+        return self.summary
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.tts_engine import SynthesisStats
+
+# Upper bounds (seconds) for latency histograms; ratios (real-time factors) use their own buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+RATIO_STAGES = frozenset({"stt_rtf", "tts_rtf"})
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class SpeechClock:
+    """
+    Start/end of the user's latest utterance, fed from the recorder's VAD callbacks, plus the
+    post-speech silence the recorder waited for before ending it (the endpoint delay).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self._ended: Optional[float] = None
+        self._endpoint: Optional[float] = None
+
+    def started(self) -> None:
+        with self._lock:
+            self._started, self._ended, self._endpoint = time.perf_counter(), None, None
+
+    def ended(self, endpoint_delay: Optional[float] = None) -> None:
+        with self._lock:
+            self._ended = time.perf_counter()
+            self._endpoint = endpoint_delay
+
+    def take(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Return and reset (speech start, speech end, endpoint delay) for the utterance just transcribed."""
+        with self._lock:
+            span = (self._started, self._ended, self._endpoint)
+            self._started = self._ended = self._endpoint = None
+        return span
+
+
+class TurnTimer:
+    """
+    Milestone timestamps for one turn (speech end, transcribed, prompt, LLM first/last token,
+    first audio, playback end) plus directly measured spans, turned into stage timings at the end.
+    """
+
+    def __init__(self, speech: Tuple[Optional[float], ...] = (None, None)):
+        self.marks: Dict[str, float] = {}
+        self.spans: Dict[str, float] = {}
+        speech_start, speech_end = speech[:2]
+        if len(speech) > 2 and speech[2] is not None:
+            self.spans["endpoint"] = speech[2]
+        if speech_start is not None:
+            self.marks["speech_start"] = speech_start
+        if speech_end is not None:
+            self.marks["speech_end"] = speech_end
+
+    def mark(self, name: str, at: Optional[float] = None) -> None:
+        """Record a milestone; the first mark of a name wins (first token, first audio)."""
+        self.marks.setdefault(name, time.perf_counter() if at is None else at)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add_synthesis(self, stats: Optional[SynthesisStats]) -> None:
+        if stats is None:
+            return
+        if stats.first_audio_at is not None:
+            self.mark("first_audio", stats.first_audio_at)
+        if not stats.cached:
+            # Cache hits play without inference, so they are left out of the real-time factor.
+            self.add("tts_inference", stats.inference_seconds)
+            self.add("tts_audio", stats.audio_seconds)
+
+    def timings(self) -> Dict[str, float]:
+        marks = self.marks
+        origin = marks.get("speech_end", marks.get("transcribed"))
+        timings: Dict[str, float] = {}
+
+        def span(name: str, start: Optional[float], end: Optional[float]) -> None:
+            if start is not None and end is not None:
+                timings[name] = max(0.0, end - start)
+
+        span("stt", marks.get("speech_end"), marks.get("transcribed"))
+        span("prompt", marks.get("transcribed"), marks.get("prompt"))
+        span("llm_first_token", marks.get("prompt"), marks.get("llm_first_token"))
+        span("llm", marks.get("prompt"), marks.get("llm_done"))
+        span("first_audio", origin, marks.get("first_audio"))
+        span("playback", marks.get("first_audio"), marks.get("playback_end"))
+        span("total", origin, marks.get("playback_end", marks.get("llm_done")))
+        for name in ("endpoint", "memory", "log"):
+            if name in self.spans:
+                timings[name] = self.spans[name]
+        speech_start, speech_end = marks.get("speech_start"), marks.get("speech_end")
+        if "stt" in timings and speech_start is not None and speech_end is not None and speech_end > speech_start:
+            timings["stt_rtf"] = timings["stt"] / (speech_end - speech_start)
+        if self.spans.get("tts_audio"):
+            timings["tts_rtf"] = self.spans["tts_inference"] / self.spans["tts_audio"]
+        return timings
+
+
+class Histogram:
+    """Cumulative Prometheus-style buckets plus a window of recent samples for quantiles."""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = 2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def quantile(self, q: float) -> float:
+        if not self._recent:
+            return math.nan
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TurnMetrics:
+    """
+    In-process per-stage histograms for every turn, exported as Prometheus text (file and/or a
+    local /metrics endpoint) and as a per-session summary.
+    """
+
+    def __init__(self, prometheus_path: str = "", port: int = 0, namespace: str = "sottovoce"):
+        self.namespace = namespace
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.speech = SpeechClock()
+        self.turns = 0
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, float]], None]] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        if port:
+            self._serve(port)
+
+    def observe_turn(self, timings: Dict[str, float]) -> None:
+        with self._lock:
+            self.turns += 1
+            for stage, value in timings.items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = Histogram(RATIO_BUCKETS if stage in RATIO_STAGES else LATENCY_BUCKETS)
+                    self._histograms[stage] = histogram
+                histogram.observe(value)
+        if self.prometheus_path is not None:
+            self.write_prometheus(self.prometheus_path)
+        for listener in list(self._listeners):
+            listener(timings)
+
+    def add_listener(self, listener: Callable[[Dict[str, float]], None]) -> None:
+        """Call listener with each finished turn's timings (e.g. the profiler closing a turn)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, float]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def count(self, event: str, n: int = 1) -> None:
+        """Bump an event counter (e.g. speculation hits and misses)."""
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + n
+
+    def quantiles(self, stage: str) -> Dict[float, float]:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            return {q: histogram.quantile(q) if histogram else math.nan for q in QUANTILES}
+
+    def render_prometheus(self) -> str:
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_turns_total Conversation turns completed.",
+            f"# TYPE {ns}_turns_total counter",
+        ]
+        with self._lock:
+            lines.append(f"{ns}_turns_total {self.turns}")
+            for kind, unit in (("seconds", False), ("ratio", True)):
+                name = f"{ns}_turn_stage_{kind}" if not unit else f"{ns}_real_time_factor"
+                stages = sorted(s for s in self._histograms if (s in RATIO_STAGES) == unit)
+                if not stages:
+                    continue
+                help_text = "Real-time factor (processing time / audio duration)." if unit else "Per-turn stage latency."
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for stage in stages:
+                    histogram = self._histograms[stage]
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            if self._counters:
+                lines += [f"# HELP {ns}_events_total Counted events.", f"# TYPE {ns}_events_total counter"]
+                for event, count in sorted(self._counters.items()):
+                    lines.append(f'{ns}_events_total{{event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write the exposition atomically (e.g. for node_exporter's textfile collector)."""
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(self.render_prometheus(), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as exc:
+            print(f"[SYSTEM] Metrics export failed: {exc}", file=sys.stderr)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage count, mean and p50/p95/p99 for the session."""
+        with self._lock:
+            stages: Dict[str, Any] = {}
+            for stage, histogram in sorted(self._histograms.items()):
+                stages[stage] = {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else math.nan,
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+                }
+            return {"turns": self.turns, "stages": stages, "events": dict(sorted(self._counters.items()))}
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines: List[str] = [f"[SYSTEM] Session latency over {summary['turns']} turns (p50 / p95 / p99):"]
+        for stage, stats in summary["stages"].items():
+            if stage in RATIO_STAGES:
+                values = " / ".join(f"{stats[p]:.2f}x" for p in ("p50", "p95", "p99"))
+            else:
+                values = " / ".join(f"{stats[p] * 1000:.0f}ms" for p in ("p50", "p95", "p99"))
+            lines.append(f"  {stage:<16} {values}  (n={stats['count']})")
+        if summary["events"]:
+            lines.append("  events: " + ", ".join(f"{event}={count}" for event, count in summary["events"].items()))
+        return "\n".join(lines)
+
+    def write_summary(self, path: Path) -> None:
+        try:
+            path.write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+        except OSError as exc:
+            print(f"[SYSTEM] Metrics summary write failed: {exc}", file=sys.stderr)
+
+    def _serve(self, port: int) -> None:
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server is not None else None
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
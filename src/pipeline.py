@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from src.config import Settings
+from src.llm_client import LLMClient
+from src.metrics import TurnMetrics, TurnTimer
+from src.profiler import set_stage
+from src.sentence_segmenter import SentenceSegmenter
+from src.session_logger import SessionLogger
+
+if TYPE_CHECKING:
+    # Annotation-only: the memory (LangChain) and TTS (Piper) stacks load during startup warm-up.
+    from src.fillers import FillerPool
+    from src.memory_manager import MemoryManager
+    from src.speculation import SpeculativeResponder
+    from src.summariser import BackgroundSummariser
+    from src.tts_engine import TtsEngine
+
+
+def apply_context_limits(
+    llm_client: LLMClient,
+    memory_manager: MemoryManager,
+    settings: Settings,
+    summariser: Optional[BackgroundSummariser] = None,
+) -> None:
+    """Report token usage for the last call and summarise/shrink history as the window fills."""
+    usage = llm_client.last_usage or {}
+    total_tokens = usage.get("total_tokens")
+    print(f"[SYSTEM] LLM usage: { total_tokens or 'unknown' } total tokens.")
+    if summariser is not None:
+        # Turns leaving the window are folded in the background; nothing to wait for here.
+        summariser.schedule()
+    warn_threshold = int(settings.context_window_tokens * 0.8)
+    if summariser is None and total_tokens and total_tokens > warn_threshold:
+        print(
+            f"[SYSTEM] Approaching context limit ({total_tokens}/{settings.context_window_tokens}). Summarising to retain continuity..."
+        )
+        try:
+            summary = memory_manager.summarise_history(llm_client.summaries, settings.summarise_prompt)
+            print(f"[SYSTEM] Summary stored: {summary}")
+        except Exception as exc:
+            print(f"[SYSTEM] Summary failed: {exc}", file=sys.stderr)
+    if total_tokens and total_tokens > settings.context_window_tokens:
+        # First, try reducing the short-term window; if already minimal, clear history.
+        if memory_manager.window > 2:
+            new_window = max(1, memory_manager.window // 2)
+            memory_manager.shrink_window(new_window)
+            print(
+                f"[SYSTEM] Context window exceeded ({total_tokens} > {settings.context_window_tokens}); "
+                f"reducing recent window to last {new_window} messages."
+            )
+        else:
+            memory_manager.clear_history()
+            print(
+                f"[SYSTEM] Context window exceeded ({total_tokens} > {settings.context_window_tokens}); "
+                "resetting conversation context."
+            )
+
+
+@dataclass(eq=False)
+class Turn:
+    user_text: str
+    audio_path: Path
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    timer: TurnTimer = field(default_factory=TurnTimer)
+    # Filled in by the respond stage; logged once the turn's audio has finished.
+    reply: str = ""
+    usage: Optional[Dict[str, Any]] = None
+    message_id: Optional[int] = None
+
+
+class ConversationPipeline:
+    """
+    Runs listen, respond (LLM), speak (TTS) and log as concurrent stages connected by queues.
+    The recorder keeps listening while a reply is generated or played; barge_in() cancels it.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        logger: SessionLogger,
+        tts_engine: TtsEngine,
+        memory_manager: MemoryManager,
+        settings: Settings,
+        summariser: Optional[BackgroundSummariser] = None,
+        metrics: Optional[TurnMetrics] = None,
+        speculator: Optional[SpeculativeResponder] = None,
+        fillers: Optional[FillerPool] = None,
+    ):
+        self.llm_client = llm_client
+        self.logger = logger
+        self.tts_engine = tts_engine
+        self.memory_manager = memory_manager
+        self.settings = settings
+        self.summariser = summariser
+        self.metrics = metrics
+        self.speculator = speculator
+        self.fillers = fillers
+        self._turns: "queue.Queue[Optional[Turn]]" = queue.Queue()
+        self._speech: "queue.Queue[Optional[Tuple[Turn, Optional[str]]]]" = queue.Queue()
+        self._records: "queue.Queue[Optional[Turn]]" = queue.Queue()
+        self._active: List[Turn] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def barge_in(self) -> None:
+        """Cancel in-flight generation and playback; wired to the recorder's speech-start callback."""
+        with self._lock:
+            active = [t for t in self._active if not t.cancelled.is_set()]
+            for turn in active:
+                turn.cancelled.set()
+        if active:
+            self.tts_engine.stop()
+            print("[SYSTEM] Barge-in: interrupting the current reply.")
+
+    def run(self, recorder: Any) -> None:
+        """Start the worker stages and listen on the calling thread until interrupted."""
+        print("Initialising. Press Ctrl+C to quit.")
+        print(f"Session log: {self.logger.path()}")
+        self._workers = [
+            threading.Thread(target=self._respond_loop, name="pipeline-respond", daemon=True),
+            threading.Thread(target=self._speak_loop, name="pipeline-speak", daemon=True),
+            threading.Thread(target=self._log_loop, name="pipeline-log", daemon=True),
+        ]
+        for worker in self._workers:
+            worker.start()
+        try:
+            self._listen_loop(recorder)
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self.barge_in()
+        self._turns.put(None)
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+
+    def _listen_loop(self, recorder: Any) -> None:
+        turn_index = 0
+        while not self._stopped.is_set():
+            set_stage("listen")
+            user_text = recorder.text()
+            transcribed = time.perf_counter()
+            speech = self.metrics.speech.take() if self.metrics is not None else (None, None)
+            if not user_text:
+                continue
+            print(f"[YOU] {user_text}")
+            turn_index += 1
+            audio_path = self.logger.turn_audio_path(turn_index, self.tts_engine.audio_extension)
+            timer = TurnTimer(speech)
+            timer.mark("transcribed", transcribed)
+            self._turns.put(Turn(user_text, audio_path, timer=timer))
+
+    def _respond_loop(self) -> None:
+        while True:
+            set_stage("idle")
+            turn = self._turns.get()
+            if turn is None:
+                break
+            with self._lock:
+                self._active.append(turn)
+            try:
+                self._respond(turn)
+            finally:
+                # End-of-turn marker lets the speak stage retire the turn once its audio is done.
+                self._speech.put((turn, None))
+        self._speech.put(None)
+
+    def _respond(self, turn: Turn) -> None:
+        timer = turn.timer
+        set_stage("prompt")
+        prompt = self.memory_manager.build_context(turn.user_text)
+        timer.mark("prompt")
+        set_stage("llm")
+        print("[SYSTEM] Processing response...")
+        speak = self.tts_engine.enabled
+        parts: List[str] = []
+        filler = self.fillers.arm() if self.fillers is not None else None
+        try:
+            if self.settings.llm_stream:
+                segmenter = SentenceSegmenter()
+                stream = (self.speculator or self.llm_client).complete_stream(prompt)
+                try:
+                    for delta in stream:
+                        if turn.cancelled.is_set():
+                            break
+                        if filler is not None:
+                            filler.cancel()
+                        timer.mark("llm_first_token")
+                        parts.append(delta)
+                        if speak:
+                            for sentence in segmenter.feed(delta):
+                                self.tts_engine.prefetch(sentence)
+                                self._speech.put((turn, sentence))
+                finally:
+                    stream.close()
+                tail = segmenter.flush()
+                if speak and tail and not turn.cancelled.is_set():
+                    self.tts_engine.prefetch(tail)
+                    self._speech.put((turn, tail))
+            else:
+                if self.speculator is not None:
+                    parts.append("".join(self.speculator.complete_stream(prompt)))
+                else:
+                    parts.append(self.llm_client.complete(prompt))
+                if speak and not turn.cancelled.is_set():
+                    self._speech.put((turn, parts[0]))
+        except Exception as exc:
+            print(f"[SYSTEM] LLM call failed: {exc}", file=sys.stderr)
+            return
+        finally:
+            if filler is not None:
+                filler.cancel()
+        timer.mark("llm_done")
+        llm_response = "".join(parts)
+        if not llm_response:
+            return
+        suffix = " (interrupted)" if turn.cancelled.is_set() else ""
+        print(f"[ASSISTANT] {llm_response}{suffix}")
+        # Memory is written here, not in the log stage, so the next prompt always sees this turn.
+        set_stage("memory")
+        memory_started = time.perf_counter()
+        turn.message_id = self.memory_manager.record_turn(turn.user_text, llm_response)
+        timer.add("memory", time.perf_counter() - memory_started)
+        turn.reply, turn.usage = llm_response, self.llm_client.last_usage
+        apply_context_limits(self.llm_client, self.memory_manager, self.settings, self.summariser)
+
+    def _speak_loop(self) -> None:
+        while True:
+            item = self._speech.get()
+            if item is None:
+                break
+            turn, text = item
+            if text is None:
+                self.tts_engine.finish_output(turn.audio_path)
+                if "first_audio" in turn.timer.marks:
+                    turn.timer.mark("playback_end")
+                with self._lock:
+                    if turn in self._active:
+                        self._active.remove(turn)
+                if turn.reply:
+                    self._records.put(turn)
+                continue
+            if turn.cancelled.is_set():
+                # barge_in() cancels what is rendering ahead, but a sentence prefetched after it ran
+                # would otherwise keep a render worker busy and sit in the engine until shutdown.
+                self.tts_engine.discard_prefetched(text)
+                continue
+            try:
+                self.tts_engine.synthesize(text, turn.audio_path)
+            except Exception as exc:
+                print(f"[SYSTEM] TTS failed: {exc}", file=sys.stderr)
+            turn.timer.add_synthesis(self.tts_engine.last_synthesis)
+        self._records.put(None)
+
+    def _log_loop(self) -> None:
+        while True:
+            turn = self._records.get()
+            if turn is None:
+                break
+            log_started = time.perf_counter()
+            try:
+                self.logger.append_turn(
+                    turn.user_text, turn.reply, timings=turn.timer.timings(), usage=turn.usage, message_id=turn.message_id
+                )
+            except Exception as exc:
+                print(f"[SYSTEM] Session log write failed: {exc}", file=sys.stderr)
+            turn.timer.add("log", time.perf_counter() - log_started)
+            if self.metrics is not None:
+                self.metrics.observe_turn(turn.timer.timings())
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
+
+# Stage of threads that never call set_stage, by thread-name prefix (first match wins).
+THREAD_STAGES = (
+    ("pipeline-respond", "llm"),
+    ("pipeline-speak", "tts"),
+    ("pipeline-log", "log"),
+    ("speculation-tts", "tts"),
+    ("speculation", "llm"),
+    ("llm-", "llm"),
+    ("tts-", "tts"),
+    ("audio-archive", "tts"),
+    ("null-audio", "audio"),
+    ("session-logger", "log"),
+    ("summariser", "summary"),
+)
+
+# Stage per thread id, set from the conversation loop. Plain dict writes are atomic under the GIL,
+# which keeps set_stage cheap enough to leave in the hot path when no profiler is running.
+_stages: Dict[int, str] = {}
+_active = False
+
+
+def set_stage(name: str) -> None:
+    """Tag the calling thread's samples with a pipeline stage until the next call (no-op unless profiling)."""
+    if _active:
+        _stages[threading.get_ident()] = name
+
+
+def _thread_stage(thread_name: str) -> str:
+    for prefix, stage in THREAD_STAGES:
+        if thread_name.startswith(prefix):
+            return stage
+    return "other"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler: a background thread snapshots every other thread's stack each
+    interval (sys._current_frames, so no tracing hooks slow the code being measured) and counts
+    (stage, stack) pairs. With trace_allocations, allocation growth is also tracked per turn with
+    tracemalloc, which hooks every allocation and slows the whole process down noticeably.
+    """
+
+    def __init__(self, interval: float = 0.005, trace_allocations: bool = False, top: int = 15):
+        self.interval = interval
+        self.trace_allocations = trace_allocations
+        self.top = top
+        self.samples: Counter[Tuple[str, Tuple[str, ...]]] = Counter()
+        self.turns: List[Dict[str, Any]] = []
+        self._labels: Dict[CodeType, str] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._names_refreshed = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._turn_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        global _active
+        if self.trace_allocations:
+            tracemalloc.start()
+            self._snapshot = tracemalloc.take_snapshot()
+        _active = True
+        self._turn_started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        global _active
+        _active = False
+        _stages.clear()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            self._sample(own)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{Path(code.co_filename).name}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def _sample(self, own: int) -> None:
+        now = time.monotonic()
+        if now - self._names_refreshed > 1.0:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+            self._names_refreshed = now
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack: List[str] = []
+                current: Any = frame
+                while current is not None:
+                    stack.append(self._label(current.f_code))
+                    current = current.f_back
+                stack.reverse()
+                stage = _stages.get(ident) or _thread_stage(self._thread_names.get(ident, ""))
+                self.samples[(stage, tuple(stack))] += 1
+
+    def turn_finished(self) -> Dict[str, Any]:
+        """Close the current turn: its duration and, with tracemalloc, the allocation growth since the last turn."""
+        now = time.perf_counter()
+        record: Dict[str, Any] = {"turn": len(self.turns) + 1, "seconds": now - self._turn_started}
+        self._turn_started = now
+        if self.trace_allocations and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+            )
+            growth = snapshot.compare_to(self._snapshot, "lineno") if self._snapshot is not None else []
+            self._snapshot = snapshot
+            record.update(
+                current_mb=current / 2**20,
+                peak_mb=peak / 2**20,
+                growth=[
+                    {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "kb": s.size_diff / 1024, "blocks": s.count_diff}
+                    for s in growth[: self.top]
+                    if s.size_diff > 0
+                ],
+            )
+        self.turns.append(record)
+        return record
+
+    def collapsed(self) -> List[str]:
+        """Folded stacks ("stage;outer;...;leaf count"), stage as the root frame, for flamegraph.pl / speedscope."""
+        with self._lock:
+            items = list(self.samples.items())
+        return [f"{';'.join((stage,) + stack)} {count}" for (stage, stack), count in sorted(items)]
+
+    def report(self) -> str:
+        """Per stage: share of samples, then the top functions by self and by inclusive samples."""
+        with self._lock:
+            items = list(self.samples.items())
+        total = sum(count for _, count in items) or 1
+        by_stage: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        for (stage, stack), count in items:
+            by_stage.setdefault(stage, []).append((stack, count))
+        lines: List[str] = []
+        for stage, stacks in sorted(by_stage.items(), key=lambda kv: -sum(c for _, c in kv[1])):
+            stage_total = sum(count for _, count in stacks)
+            own: Counter[str] = Counter()
+            inclusive: Counter[str] = Counter()
+            for stack, count in stacks:
+                if stack:
+                    own[stack[-1]] += count
+                for label in set(stack):
+                    inclusive[label] += count
+            lines.append(f"== {stage}: {stage_total} samples ({stage_total / total:.1%}) ==")
+            lines.append(f"  {'self':>6} {'total':>6}  function")
+            for label, count in own.most_common(self.top):
+                lines.append(f"  {count / stage_total:6.1%} {inclusive[label] / stage_total:6.1%}  {label}")
+            lines.append("")
+        if self.turns:
+            lines.append("== turns ==")
+            for turn in self.turns:
+                memory = f", {turn['current_mb']:.1f} MB traced (peak {turn['peak_mb']:.1f} MB)" if "current_mb" in turn else ""
+                lines.append(f"  turn {turn['turn']}: {turn['seconds']:.2f}s{memory}")
+                for growth in turn.get("growth", [])[:5]:
+                    lines.append(f"      +{growth['kb']:.1f} KB ({growth['blocks']:+d} blocks)  {growth['where']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: Path) -> Path:
+        """Write stacks.collapsed, report.txt and (with tracemalloc) memory.jsonl into directory."""
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "stacks.collapsed").write_text("\n".join(self.collapsed()) + "\n", encoding="utf-8")
+        (directory / "report.txt").write_text(self.report(), encoding="utf-8")
+        if self.trace_allocations and self.turns:
+            with (directory / "memory.jsonl").open("w", encoding="utf-8") as f:
+                for turn in self.turns:
+                    f.write(json.dumps(turn) + "\n")
+        return directory
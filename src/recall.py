@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy
+import requests
+
+from src.history_store import HistoryStore
+
+_WORD = re.compile(r"\w+")
+
+
+def _normalise_rows(matrix: numpy.ndarray) -> numpy.ndarray:
+    norms = numpy.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class HashingEmbedder:
+    """Dependency-free embedder: signed feature hashing of lower-cased word unigrams and bigrams."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: Sequence[str]) -> numpy.ndarray:
+        out = numpy.zeros((len(texts), self.dim), dtype=numpy.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if digest & 1 else -1.0
+                out[row, (digest >> 1) % self.dim] += sign
+        return _normalise_rows(out)
+
+
+class EndpointEmbedder:
+    """Embeds through a local OpenAI-compatible /v1/embeddings endpoint."""
+
+    def __init__(self, endpoint: str, model: str, session: Optional[requests.Session] = None, timeout: float = 30.0):
+        self.endpoint = endpoint
+        self.model = model
+        self.name = f"endpoint-{model}"
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def embed(self, texts: Sequence[str]) -> numpy.ndarray:
+        response = self.session.post(
+            self.endpoint,
+            json={"model": self.model, "input": list(texts)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data = sorted(response.json().get("data", []), key=lambda d: d.get("index", 0))
+        if len(data) != len(texts):
+            raise ValueError("Embedding response size does not match input")
+        return _normalise_rows(numpy.asarray([d["embedding"] for d in data], dtype=numpy.float32))
+
+
+class VectorIndex:
+    """
+    Append-only float32 matrix of unit vectors plus their message ids, persisted as raw files
+    (`<name>.f32`, `<name>.ids`, `<name>.json`) so appends are a single write and loads a single read.
+    """
+
+    def __init__(self, directory: Path, embedder_name: str, name: str = "recall"):
+        self.embedder_name = embedder_name
+        self._vectors_path = directory / f"{name}.f32"
+        self._ids_path = directory / f"{name}.ids"
+        self._meta_path = directory / f"{name}.json"
+        self._lock = threading.Lock()
+        self._matrix = numpy.zeros((0, 0), dtype=numpy.float32)
+        self._ids = numpy.zeros(0, dtype=numpy.int64)
+        self._size = 0
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def max_id(self) -> int:
+        return int(self._ids[self._size - 1]) if self._size else 0
+
+    def _load(self) -> None:
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("embedder") != self.embedder_name:
+            # Different (or no) embedder: vectors are not comparable, start over.
+            for path in (self._vectors_path, self._ids_path):
+                path.unlink(missing_ok=True)
+            return
+        dim = int(meta["dim"])
+        ids = numpy.fromfile(self._ids_path, dtype=numpy.int64) if self._ids_path.exists() else self._ids
+        vectors = numpy.fromfile(self._vectors_path, dtype=numpy.float32) if self._vectors_path.exists() else None
+        count = min(len(ids), 0 if vectors is None else len(vectors) // dim)
+        # A crash between (or during) the two writes of an append leaves one file ahead of the other;
+        # cut both back to the rows they share, or every later append would pair ids with the wrong vectors.
+        for path, keep in ((self._ids_path, count * ids.itemsize), (self._vectors_path, count * dim * 4)):
+            if path.exists() and path.stat().st_size > keep:
+                os.truncate(path, keep)
+        self._matrix = vectors[: count * dim].reshape(count, dim).copy() if vectors is not None else self._matrix
+        self._ids = ids[:count].copy()
+        self._size = count
+
+    def append(self, ids: Sequence[int], vectors: numpy.ndarray) -> None:
+        if not len(ids):
+            return
+        vectors = numpy.ascontiguousarray(vectors, dtype=numpy.float32)
+        with self._lock:
+            if self._size == 0 and self._matrix.shape[1] != vectors.shape[1]:
+                self._matrix = numpy.zeros((0, vectors.shape[1]), dtype=numpy.float32)
+                self._meta_path.write_text(
+                    json.dumps({"embedder": self.embedder_name, "dim": vectors.shape[1]}), encoding="utf-8"
+                )
+            needed = self._size + len(ids)
+            if needed > len(self._matrix):
+                # Grow geometrically so appends stay amortised O(1).
+                capacity = max(needed, 2 * len(self._matrix), 1024)
+                grown = numpy.zeros((capacity, vectors.shape[1]), dtype=numpy.float32)
+                grown[: self._size] = self._matrix[: self._size]
+                self._matrix = grown
+                grown_ids = numpy.zeros(capacity, dtype=numpy.int64)
+                grown_ids[: self._size] = self._ids[: self._size]
+                self._ids = grown_ids
+            self._matrix[self._size : needed] = vectors
+            self._ids[self._size : needed] = ids
+            self._size = needed
+            with self._vectors_path.open("ab") as f:
+                vectors.tofile(f)
+            with self._ids_path.open("ab") as f:
+                numpy.asarray(ids, dtype=numpy.int64).tofile(f)
+
+    def search(self, query: numpy.ndarray, k: int, exclude: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (id, cosine score) pairs, best first; ids in exclude are masked out before ranking."""
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            scores = self._matrix[: self._size] @ query.astype(numpy.float32, copy=False)
+            ids = self._ids[: self._size]
+        if exclude is not None and len(exclude):
+            scores[numpy.isin(ids, numpy.asarray(exclude, dtype=numpy.int64))] = -numpy.inf
+        k = min(k, len(scores))
+        top = numpy.argpartition(-scores, k - 1)[:k]
+        top = top[numpy.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] != -numpy.inf]
+
+
+class RecallIndex:
+    """Long-term recall across every stored session: one vector per user/assistant turn."""
+
+    def __init__(self, store: HistoryStore, embedder, directory: Path, min_score: float = 0.3):
+        self.store = store
+        self.embedder = embedder
+        self.min_score = min_score
+        self.index = VectorIndex(directory, embedder.name)
+
+    @staticmethod
+    def _render(user_text: str, assistant_text: str) -> str:
+        return f"User: {user_text}\nAssistant: {assistant_text}"
+
+    def sync(self, batch_size: int = 256) -> int:
+        """Embed every stored turn newer than the index (incremental; run at startup)."""
+        added = 0
+        for turns, _ in self.store.turn_batches(self.index.max_id, batch_size * 2):
+            if turns:
+                ids = [turn[0] for turn in turns]
+                self.index.append(ids, self.embedder.embed([self._render(user, assistant) for _, _, user, assistant in turns]))
+                added += len(ids)
+        return added
+
+    def add_turn(self, message_id: int, user_text: str, assistant_text: str) -> None:
+        self.index.append([message_id], self.embedder.embed([self._render(user_text, assistant_text)]))
+
+    def search(self, text: str, k: int, exclude_session: Optional[str] = None) -> List[str]:
+        """Best-matching past turns (rendered), skipping the given session, which is already in context."""
+        query = self.embedder.embed([text])[0]
+        # The excluded session is masked before ranking, however many of its turns are indexed.
+        exclude = self.store.ids(exclude_session) if exclude_session is not None else None
+        results: List[str] = []
+        for message_id, score in self.index.search(query, k, exclude):
+            if score < self.min_score:
+                break
+            turn = self.store.turn_at(message_id)
+            if turn is not None:
+                results.append(self._render(turn[1], turn[2]))
+        return results
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class InferenceScheduler:
+    """
+    Bounds concurrent work per shared resource (e.g. "stt", "llm", "tts") with one semaphore each,
+    so many callers can share a single loaded model or connection pool without oversubscribing it.
+    """
+
+    def __init__(self, slots: Dict[str, int]):
+        self.slots = {name: max(1, count) for name, count in slots.items()}
+        self._semaphores = {name: threading.BoundedSemaphore(count) for name, count in self.slots.items()}
+        self._lock = threading.Lock()
+        self._busy = {name: 0 for name in self.slots}
+        self._waiting = {name: 0 for name in self.slots}
+
+    @contextmanager
+    def slot(self, name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Hold one of the resource's slots; the time spent inside (not queued) goes into timings[name]."""
+        semaphore = self._semaphores[name]
+        with self._lock:
+            self._waiting[name] += 1
+        semaphore.acquire()
+        with self._lock:
+            self._waiting[name] -= 1
+            self._busy[name] += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+            with self._lock:
+                self._busy[name] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                name: {"slots": self.slots[name], "busy": self._busy[name], "waiting": self._waiting[name]}
+                for name in self.slots
+            }
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.history_store import HistoryStore
+
+_QUERY_TERM = re.compile(r'"([^"]+)"|(\w+\*?)')
+_WORD = re.compile(r"\w+")
+_LEGACY_TURN_END = re.compile(r"^---\n", re.MULTILINE)
+
+# (key, source, session, ts in epoch milliseconds or None, user, assistant)
+Row = Tuple[str, str, str, Optional[int], str, str]
+# Bumped when keys or bookkeeping change; an index written by another version is rebuilt by sync().
+SCHEMA_VERSION = 2
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    session: str
+    ts: Optional[int]  # epoch milliseconds; None for memory rows never seen in a session log
+    source: str
+    user: str  # highlighted snippets
+    assistant: str
+    score: float
+
+    @property
+    def timestamp(self) -> str:
+        if self.ts is None:
+            return "-"
+        return datetime.fromtimestamp(self.ts / 1000, tz=timezone.utc).isoformat(timespec="milliseconds")
+
+
+def match_query(text: str) -> str:
+    """
+    Plain words (AND-ed), "quoted phrases" and prefix* terms as an FTS5 MATCH expression, with
+    everything quoted so punctuation in the query can never be an FTS5 syntax error.
+    """
+    terms: List[str] = []
+    for phrase, word in _QUERY_TERM.findall(text):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms)
+
+
+def _turn_key(message_id: int, user: str, assistant: str) -> str:
+    # The memory DB id of the turn's user message, shared by its session-log record, so the two
+    # copies are indexed once while a repeated question stays a turn of its own. SQLite hands out
+    # the ids of rows deleted by clear_history() again, so a short digest of the text tells a
+    # later turn from the cleared one that had its id.
+    digest = hashlib.sha1(f"{user}\0{assistant}".encode("utf-8")).hexdigest()[:12]
+    return f"{message_id}:{digest}"
+
+
+def _epoch_ms(iso: str) -> Optional[int]:
+    try:
+        return int(datetime.fromisoformat(iso.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def _legacy_rows(session: str, text: str) -> List[Row]:
+    """
+    Turns from a session_*.log written before the JSONL logger: "USER: ..." and "ASSISTANT: ..."
+    (the reply may span lines), each turn closed by a "---" line. Those files carry no per-turn
+    time, so turns are dated by the session start in the file name.
+    """
+    try:
+        started = datetime.strptime(session.removeprefix("session_"), "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        ts: Optional[int] = int(started.timestamp() * 1000)
+    except ValueError:
+        ts = None
+    rows: List[Row] = []
+    # The files were only ever appended to, so a turn's position is a stable key.
+    for number, block in enumerate(_LEGACY_TURN_END.split(text)):
+        if not block.startswith("USER: ") or "\nASSISTANT: " not in block:
+            continue
+        user, assistant = block[len("USER: ") :].split("\nASSISTANT: ", 1)
+        rows.append((f"legacy:{session}:{number}", "log", session, ts, user, assistant.rstrip("\n")))
+    return rows
+
+
+def _log_row(record: dict) -> Optional[Row]:
+    session, user, assistant = record.get("session"), record.get("user"), record.get("assistant")
+    if not isinstance(session, str) or not isinstance(user, str) or not isinstance(assistant, str):
+        return None
+    raw_ts = record.get("ts")
+    message_id = record.get("message_id")
+    if isinstance(message_id, int):
+        key = _turn_key(message_id, user, assistant)
+    elif isinstance(raw_ts, str):
+        # Turns not stored in memory: the log timestamp is unique within a session and survives rotation.
+        key = f"log:{session}:{raw_ts}"
+    else:
+        return None
+    ts = _epoch_ms(raw_ts) if isinstance(raw_ts, str) else None
+    return (key, "log", session, ts, user, assistant)
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 full-text index over every conversation turn, from the JSONL session logs and the
+    memory DB. Turns are added as they are logged/recorded; sync() catches up in bulk on existing
+    logs (tracking how far each file was read) and memory rows. A turn is keyed by its memory
+    message id, which its log record carries too, so the two copies collapse into one row.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, "
+                "source TEXT NOT NULL, session TEXT NOT NULL, ts INTEGER, user TEXT NOT NULL, assistant TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_turns_session_ts ON turns (session, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_turns_ts ON turns (ts)")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5("
+                "user, assistant, content='turns', content_rowid='id', tokenize='porter unicode61')"
+            )
+            # Only the text columns are in the FTS index, so filling in a missing ts needs no trigger.
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN "
+                "INSERT INTO turns_fts (rowid, user, assistant) VALUES (new.id, new.user, new.assistant); END"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None or row[0] != SCHEMA_VERSION:
+                self._conn.execute("DELETE FROM turns")
+                self._conn.execute("INSERT INTO turns_fts (turns_fts) VALUES ('delete-all')")
+                self._conn.execute("DROP TABLE IF EXISTS indexed_files")
+                self._conn.execute("DELETE FROM meta")
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+            # inode tells a log that was rotated and restarted from one that only grew.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS indexed_files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "offset INTEGER NOT NULL, inode INTEGER NOT NULL)"
+            )
+
+    def _insert(self, rows: Iterable[Row]) -> int:
+        """Insert within an open transaction (lock held); returns the number of new turns."""
+        before = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM turns").fetchone()[0]
+        self._conn.executemany(
+            "INSERT INTO turns (key, source, session, ts, user, assistant) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET ts = excluded.ts WHERE turns.ts IS NULL AND excluded.ts IS NOT NULL",
+            rows,
+        )
+        return int(self._conn.execute("SELECT COUNT(*) FROM turns WHERE id > ?", (before,)).fetchone()[0])
+
+    def add_turn(
+        self, message_id: int, session: str, user: str, assistant: str, ts: Optional[int] = None, source: str = "memory"
+    ) -> None:
+        """Index one turn as it happens; message_id is its user message in the memory DB (ts defaults to now)."""
+        ts = int(time.time() * 1000) if ts is None else ts
+        with self._lock, self._conn:
+            self._insert([(_turn_key(message_id, user, assistant), source, session, ts, user, assistant)])
+
+    def add_log_records(self, records: Iterable[dict]) -> None:
+        """Index session-log records (SessionLogger's writer calls this with each batch it writes)."""
+        rows = [row for row in map(_log_row, records) if row is not None]
+        if rows:
+            with self._lock, self._conn:
+                self._insert(rows)
+
+    def clear(self) -> None:
+        """Drop every indexed turn and the record of what was read (for a full rebuild)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM turns")
+            self._conn.execute("INSERT INTO turns_fts (turns_fts) VALUES ('delete-all')")
+            self._conn.execute("DELETE FROM indexed_files")
+            self._conn.execute("DELETE FROM meta WHERE key != 'schema'")
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0])
+
+    def sync(self, logs_dir: Optional[Path] = None, store: Optional[HistoryStore] = None) -> int:
+        """
+        Bulk-index session logs (current, rotated .gz and pre-JSONL .log) and memory rows not seen
+        yet; returns new turns.
+        """
+        added = 0
+        if logs_dir is not None and logs_dir.is_dir():
+            paths = sorted(logs_dir.glob("*.jsonl")) + sorted(logs_dir.glob("*.jsonl.gz")) + sorted(logs_dir.glob("*.log"))
+            for path in paths:
+                try:
+                    added += self._sync_file(path)
+                except (OSError, EOFError) as exc:
+                    print(f"[SYSTEM] Search indexing of {path} failed: {exc}", file=sys.stderr)
+        if store is not None:
+            added += self._sync_store(store)
+        if added:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO turns_fts (turns_fts) VALUES ('optimize')")
+        return added
+
+    def _sync_file(self, path: Path) -> int:
+        stat = path.stat()
+        size, inode = stat.st_size, stat.st_ino
+        with self._lock:
+            row = self._conn.execute("SELECT size, offset, inode FROM indexed_files WHERE path = ?", (str(path),)).fetchone()
+        same_file = row is not None and row[2] == inode
+        if path.suffix == ".log":
+            if same_file and row[0] == size:
+                return 0
+            rows = _legacy_rows(path.stem, path.read_text(encoding="utf-8", errors="replace"))
+            with self._lock, self._conn:
+                added = self._insert(rows)
+                self._record_file(path, size, size, inode)
+            return added
+        if path.suffix == ".gz":
+            # Archives never change once written.
+            if same_file and row[0] == size:
+                return 0
+            with gzip.open(path, "rb") as f:
+                data = f.read()
+            offset = size
+        else:
+            # The live log only grows; another inode or a smaller file means it was rotated and restarted.
+            start = row[1] if same_file and size >= row[1] else 0
+            if start == size:
+                return 0
+            with path.open("rb") as f:
+                f.seek(start)
+                data = f.read(size - start)
+            # Leave a partially written last line for the next sync.
+            data = data[: data.rfind(b"\n") + 1]
+            offset = start + len(data)
+        rows: List[Row] = []
+        for line in data.splitlines():
+            try:
+                row = _log_row(json.loads(line))
+            except (ValueError, KeyError, AttributeError):
+                continue
+            if row is not None:
+                rows.append(row)
+        with self._lock, self._conn:
+            added = self._insert(rows)
+            self._record_file(path, size, offset, inode)
+        return added
+
+    def _record_file(self, path: Path, size: int, offset: int, inode: int) -> None:
+        """Remember how far a file was read (lock held, within a transaction)."""
+        self._conn.execute(
+            "INSERT INTO indexed_files (path, size, offset, inode) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, offset = excluded.offset, inode = excluded.inode",
+            (str(path), size, offset, inode),
+        )
+
+    def _sync_store(self, store: HistoryStore, batch_size: int = 512) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'memory_through'").fetchone()
+        added = 0
+        for turns, through in store.turn_batches(int(row[0]) if row else 0, batch_size):
+            rows: List[Row] = [
+                (_turn_key(message_id, user, assistant), "memory", session_id, None, user, assistant)
+                for message_id, session_id, user, assistant in turns
+            ]
+            with self._lock, self._conn:
+                added += self._insert(rows)
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('memory_through', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (through,),
+                )
+        return added
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        session: Optional[str] = None,
+        since: Optional[int] = None,
+        raw: bool = False,
+        marks: Tuple[str, str] = ("[", "]"),
+    ) -> List[SearchHit]:
+        """
+        Best matches first (BM25), with matched terms wrapped in marks. raw passes FTS5 syntax
+        through; a malformed raw expression raises ValueError.
+        """
+        expression = query if raw else match_query(query)
+        if not expression:
+            return []
+        sql = (
+            "SELECT t.session, t.ts, t.source, "
+            "snippet(turns_fts, 0, ?, ?, '…', 16), snippet(turns_fts, 1, ?, ?, '…', 16), bm25(turns_fts) "
+            "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid WHERE turns_fts MATCH ?"
+        )
+        params: List[object] = [marks[0], marks[1], marks[0], marks[1], expression]
+        if session is not None:
+            sql += " AND t.session = ?"
+            params.append(session)
+        if since is not None:
+            sql += " AND t.ts >= ?"
+            params.append(since)
+        sql += " ORDER BY bm25(turns_fts) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as exc:
+                if not raw:
+                    raise
+                # Only a raw expression can be malformed; match_query() output always parses.
+                raise ValueError(f"invalid FTS5 query {expression!r}: {exc}") from exc
+        # bm25() is lower-is-better; flip it so higher scores rank first.
+        return [SearchHit(r[0], r[1], r[2], r[3], r[4], -float(r[5])) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+# Sentence-ending punctuation, optionally followed by closing quotes/brackets, then whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+
+class SentenceSegmenter:
+    """Accumulates streamed text deltas and emits complete sentences as they close."""
+
+    def __init__(self, min_chars: int = 20):
+        # Very short fragments ("Hi.", "Dr.") are merged into the next sentence to avoid choppy TTS.
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buffer += delta
+        sentences: List[str] = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start : match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended."""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
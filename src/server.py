@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import base64
+import json
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy
+
+from src.config import Settings
+from src.llm_client import LLMClient
+from src.memory_manager import MemoryManager
+from src.pipeline import apply_context_limits
+from src.scheduler import InferenceScheduler
+from src.sentence_segmenter import SentenceSegmenter
+from src.summariser import BackgroundSummariser
+
+if TYPE_CHECKING:
+    from src.history_store import HistoryStore
+    from src.metrics import TurnMetrics
+    from src.recall import RecallIndex
+    from src.search_index import SearchIndex
+    from src.tts_engine import TtsEngine
+
+# Uploaded turn audio: raw little-endian 16-bit mono PCM at this rate (what Whisper runs at).
+INPUT_SAMPLE_RATE = 16000
+# Two minutes of input audio; longer uploads are rejected rather than buffered.
+MAX_UPLOAD_BYTES = INPUT_SAMPLE_RATE * 2 * 120
+_SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9_.-]+)(/turn)?$")
+
+
+class ServerSession:
+    """
+    One client conversation: its own memory (history, summary), one turn at a time, and an LLM
+    client view so its token usage is not mixed up with other sessions'.
+    """
+
+    def __init__(self, memory: MemoryManager, llm_client: LLMClient, summariser: Optional[BackgroundSummariser] = None):
+        self.memory = memory
+        self.llm_client = llm_client
+        self.summariser = summariser
+        self.lock = threading.Lock()
+        self.turns = 0
+        self.last_active = time.monotonic()
+        # Requests holding the session (guarded by the server lock); a claimed session never expires.
+        self.claims = 0
+
+    def close(self) -> None:
+        if self.summariser is not None:
+            self.summariser.stop()
+
+    @property
+    def id(self) -> str:
+        return self.memory.session_id
+
+
+class ConversationServer:
+    """
+    Serves many clients from one process over HTTP on localhost. Each session keeps its own
+    MemoryManager, while the Whisper model, Piper voice, LLM connection pool and SQLite store are
+    loaded once and shared, with concurrent inference bounded per resource by an InferenceScheduler.
+
+        POST   /sessions               {"session_id": optional, to resume} -> {"session_id": ...}
+        POST   /sessions/<id>/turn     raw s16le 16 kHz mono PCM (Content-Length or chunked), or
+                                       JSON {"text": ...}; the reply streams back as NDJSON events
+        DELETE /sessions/<id>
+        GET    /health                 open sessions, scheduler slot usage and LLM backend health
+
+    Sessions idle for SERVER_SESSION_IDLE_SECONDS are closed (their history stays in the store and
+    can be resumed by id).
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        llm_client: LLMClient,
+        store: HistoryStore,
+        transcriber: Optional[Any] = None,
+        tts_engine: Optional[TtsEngine] = None,
+        recall: Optional[RecallIndex] = None,
+        metrics: Optional[TurnMetrics] = None,
+        search_index: Optional[SearchIndex] = None,
+    ):
+        self.settings = settings
+        self.llm_client = llm_client
+        self.store = store
+        self.transcriber = transcriber
+        self.tts_engine = tts_engine if tts_engine is not None and tts_engine.enabled else None
+        self.recall = recall
+        self.metrics = metrics
+        self.search_index = search_index
+        self.scheduler = InferenceScheduler(
+            {
+                "stt": settings.server_stt_slots,
+                "llm": settings.server_llm_slots,
+                "tts": settings.server_tts_slots,
+            }
+        )
+        self._sessions: Dict[str, ServerSession] = {}
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._stopped = threading.Event()
+
+    def open_session(self, session_id: Optional[str] = None) -> ServerSession:
+        """A new session, or the live one with that id (history in the store is resumed either way)."""
+        session_id = session_id or f"session_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                memory = MemoryManager(self.settings, session_id=session_id, store=self.store)
+                memory.set_system_prompt(self.llm_client.system_prompt or "")
+                memory.recall = self.recall
+                memory.search_index = self.search_index
+                client = self.llm_client.view()
+                summariser = (
+                    BackgroundSummariser(
+                        memory, client, self.settings.summarise_prompt, batch_messages=self.settings.summary_batch_messages
+                    )
+                    if self.settings.summary_background
+                    else None
+                )
+                session = ServerSession(memory, client, summariser)
+                self._sessions[session_id] = session
+            session.last_active = time.monotonic()
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def expire_idle(self, now: Optional[float] = None) -> int:
+        """Close sessions with no turn for SERVER_SESSION_IDLE_SECONDS; returns how many were closed."""
+        idle = self.settings.server_session_idle_seconds
+        if idle <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                session_id
+                for session_id, session in self._sessions.items()
+                if now - session.last_active >= idle and not session.claims and not session.lock.locked()
+            ]
+            sessions = [self._sessions.pop(session_id) for session_id in expired]
+        for session in sessions:
+            session.close()
+        return len(sessions)
+
+    def _expire_loop(self) -> None:
+        interval = min(60.0, max(1.0, self.settings.server_session_idle_seconds / 4))
+        while not self._stopped.wait(interval):
+            self.expire_idle()
+
+    def session(self, session_id: str) -> Optional[ServerSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    @contextmanager
+    def claim(self, session_id: str) -> Iterator[Optional[ServerSession]]:
+        """
+        The live session with that id (None if there is none), marked active and kept from idle
+        expiry until the block ends, so a request arriving right at the timeout cannot lose it
+        between the lookup and its turn.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.claims += 1
+                session.last_active = time.monotonic()
+        try:
+            yield session
+        finally:
+            if session is not None:
+                with self._lock:
+                    session.claims -= 1
+                    session.last_active = time.monotonic()
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            "status": "ok",
+            "sessions": sessions,
+            "scheduler": self.scheduler.stats(),
+            "llm": self.llm_client.pool.stats(),
+        }
+
+    def run_turn(self, session: ServerSession, audio: Optional[bytes] = None, text: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe (if audio), stream the reply and synthesize it sentence by sentence, yielding
+        events: transcript, reply_delta, audio (base64 s16le), then done or error.
+        """
+        with session.lock:
+            session.last_active = time.monotonic()
+            try:
+                yield from self._turn(session, audio, text)
+            finally:
+                session.last_active = time.monotonic()
+
+    def _turn(self, session: ServerSession, audio: Optional[bytes], text: Optional[str]) -> Iterator[Dict[str, Any]]:
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        if audio is not None:
+            if self.transcriber is None:
+                yield {"type": "error", "message": "audio input needs a transcriber"}
+                return
+            samples = numpy.frombuffer(audio[: len(audio) - len(audio) % 2], dtype="<i2")
+            with self.scheduler.slot("stt", timings):
+                text = self.transcriber.transcribe(samples.astype(numpy.float32) / 32768.0)
+            yield {"type": "transcript", "text": text}
+        if not text or not text.strip():
+            yield {"type": "done", "reply": "", "timings": timings}
+            return
+
+        prompt_started = time.perf_counter()
+        prompt = session.memory.build_context(text)
+        timings["prompt"] = time.perf_counter() - prompt_started
+        events: "queue.Queue[Optional[Tuple[str, Any]]]" = queue.Queue()
+        cancelled = threading.Event()
+        producer = threading.Thread(
+            target=self._generate, args=(session, prompt, events, cancelled, timings), name="server-llm", daemon=True
+        )
+        producer.start()
+        reply_parts: List[str] = []
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                kind, value = event
+                if kind == "error":
+                    print(f"[SYSTEM] LLM call failed: {value}", file=sys.stderr)
+                    yield {"type": "error", "message": f"LLM call failed: {value}"}
+                    return
+                if kind == "delta":
+                    if not reply_parts:
+                        timings.setdefault("first_token", time.perf_counter() - started)
+                    reply_parts.append(value)
+                    yield {"type": "reply_delta", "text": value}
+                elif kind == "sentence" and self.tts_engine is not None:
+                    yield from self._speak(value, timings, started)
+        finally:
+            # A client that disconnects mid-reply stops generation at the next token.
+            cancelled.set()
+        reply = "".join(reply_parts).strip()
+        memory_started = time.perf_counter()
+        session.memory.record_turn(text, reply)
+        timings["memory"] = time.perf_counter() - memory_started
+        timings["total"] = time.perf_counter() - started
+        session.turns += 1
+        if self.metrics is not None:
+            self.metrics.observe_turn(timings)
+        # Same post-turn step as the voice loop: fold aged-out turns, or summarise/shrink near the limit.
+        apply_context_limits(session.llm_client, session.memory, self.settings, session.summariser)
+        yield {"type": "done", "reply": reply, "timings": timings}
+
+    def _generate(self, session: ServerSession, prompt: Any, events: "queue.Queue[Optional[Tuple[str, Any]]]", cancelled: threading.Event, timings: Dict[str, float]) -> None:
+        segmenter = SentenceSegmenter()
+        try:
+            with self.scheduler.slot("llm", timings):
+                for delta in session.llm_client.complete_stream(prompt):
+                    if cancelled.is_set():
+                        return
+                    events.put(("delta", delta))
+                    for sentence in segmenter.feed(delta):
+                        events.put(("sentence", sentence))
+            tail = segmenter.flush()
+            if tail:
+                events.put(("sentence", tail))
+        except Exception as exc:
+            events.put(("error", exc))
+        finally:
+            events.put(None)
+
+    def _speak(self, sentence: str, timings: Dict[str, float], started: float) -> Iterator[Dict[str, Any]]:
+        assert self.tts_engine is not None
+        try:
+            # Synthesis is collected inside the slot so a slow client never holds a TTS slot.
+            with self.scheduler.slot("tts", timings):
+                chunks = list(self.tts_engine.iter_pcm(sentence))
+        except Exception as exc:
+            print(f"[SYSTEM] TTS failed: {exc}", file=sys.stderr)
+            yield {"type": "error", "message": f"TTS failed: {exc}", "fatal": False}
+            return
+        for chunk in chunks:
+            timings.setdefault("first_audio", time.perf_counter() - started)
+            yield {
+                "type": "audio",
+                "text": sentence,
+                "sample_rate": chunk.sample_rate,
+                "channels": chunk.channels,
+                "pcm": base64.b64encode(chunk.samples.tobytes()).decode("ascii"),
+            }
+
+    def start(self, host: str, port: int) -> None:
+        """Listen in a background thread; use port 0 for any free port (see .port)."""
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="server-http", daemon=True).start()
+        if self.settings.server_session_idle_seconds > 0:
+            threading.Thread(target=self._expire_loop, name="server-expiry", daemon=True).start()
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._httpd.server_address[1] if self._httpd is not None else None
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+def _handler_for(server: ConversationServer) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            if self.path.rstrip("/") != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, server.health())
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server API
+            try:
+                body = self._read_body()
+            except ValueError as exc:
+                self._send_json(413 if "too large" in str(exc) else 400, {"error": str(exc)})
+                return
+            if self.path.rstrip("/") == "/sessions":
+                try:
+                    requested = json.loads(body or b"{}").get("session_id")
+                except (ValueError, AttributeError):
+                    self._send_json(400, {"error": "expected a JSON object"})
+                    return
+                session = server.open_session(requested)
+                self._send_json(201, {"session_id": session.id})
+                return
+            match = _SESSION_PATH.match(self.path)
+            with server.claim(match.group(1) if match and match.group(2) else "") as session:
+                if session is None:
+                    self._send_json(404, {"error": "unknown session"})
+                    return
+                audio: Optional[bytes] = body
+                text: Optional[str] = None
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    try:
+                        text = str(json.loads(body).get("text") or "")
+                    except (ValueError, AttributeError):
+                        self._send_json(400, {"error": "expected {\"text\": ...}"})
+                        return
+                    audio = None
+                elif not audio:
+                    self._send_json(400, {"error": "empty audio upload"})
+                    return
+                self._stream(server.run_turn(session, audio=audio, text=text))
+
+        def do_DELETE(self) -> None:  # noqa: N802 - http.server API
+            match = _SESSION_PATH.match(self.path)
+            if match is None or match.group(2) or not server.close_session(match.group(1)):
+                self._send_json(404, {"error": "unknown session"})
+                return
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _read_body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                # Clients can stream PCM as it is captured and end the upload when speech ends.
+                parts: List[bytes] = []
+                size = 0
+                while True:
+                    length = int(self.rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+                    if length == 0:
+                        while self.rfile.readline().strip():
+                            pass  # trailers
+                        return b"".join(parts)
+                    size += length
+                    if size > MAX_UPLOAD_BYTES:
+                        self.close_connection = True
+                        raise ValueError("upload too large")
+                    parts.append(self.rfile.read(length))
+                    self.rfile.readline()
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_UPLOAD_BYTES:
+                self.close_connection = True
+                raise ValueError("upload too large")
+            return self.rfile.read(length) if length else b""
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, events: Iterator[Dict[str, Any]]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for event in events:
+                    line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            finally:
+                events.close()  # type: ignore[attr-defined]
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return _Handler
@@ -1,26 +1,159 @@
 from __future__ import annotations
 
+import gzip
+import json
+import queue
+import shutil
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from datetime import datetime, timezone
 
+if TYPE_CHECKING:
+    from src.search_index import SearchIndex
+
+# Queue marker asking the writer to write out its current batch immediately.
+_FLUSH: Dict[str, Any] = {}
+
 
 class SessionLogger:
-    # Append conversation turns to a session log file.
+    """
+    Append conversation turns to a JSONL session log.
+    Records are queued and written in batches by a background thread (on a timer, when the batch
+    fills, or on close), and the file is rotated to a gzip archive once it grows past max_bytes.
+    Written batches are also added to the full-text search index, if one is given.
+    """
 
-    def __init__(self, directory: str = "session_logs", filename: Optional[str] = None):
+    def __init__(
+        self,
+        directory: str = "session_logs",
+        filename: Optional[str] = None,
+        flush_interval: float = 1.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        batch_size: int = 64,
+        search_index: Optional[SearchIndex] = None,
+    ):
         self.dir_path = Path(directory)
         self.dir_path.mkdir(parents=True, exist_ok=True)
         if filename is None:
             timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-            filename = f"session_{timestamp}.log"
+            filename = f"session_{timestamp}.jsonl"
         self.file_path = self.dir_path / filename
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.batch_size = max(1, batch_size)
+        self.search_index = search_index
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-logger", daemon=True)
+        self._thread.start()
+
+    def append_turn(
+        self,
+        user_text: str,
+        model_response: str,
+        timings: Optional[Dict[str, float]] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        message_id: Optional[int] = None,
+    ) -> None:
+        """Queue a turn record; never blocks on disk. message_id links it to the turn in the memory DB."""
+        record: Dict[str, Any] = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "session": self.file_path.stem,
+            "user": user_text,
+            "assistant": model_response,
+            "timings": timings or {},
+            "usage": usage or {},
+        }
+        if message_id is not None:
+            record["message_id"] = message_id
+        self._queue.put(record)
 
-    def append_turn(self, user_text: str, model_response: str) -> None:
-        with self.file_path.open("a", encoding="utf-8") as f:
-            f.write(f"USER: {user_text}\n")
-            f.write(f"ASSISTANT: {model_response}\n")
-            f.write("---\n")
+    def flush(self) -> None:
+        """Write out pending records now and block until they are on disk."""
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
 
     def path(self) -> Path:
         return self.file_path
+
+    def turn_audio_path(self, turn: int, extension: str = "wav") -> Path:
+        """Per-turn audio file next to the log, e.g. session_<ts>.turn0003.wav."""
+        return self.file_path.with_name(f"{self.file_path.stem}.turn{turn:04d}.{extension}")
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                continue
+            if item is None:
+                self._write(batch)
+                self._queue.task_done()
+                return
+            if item is _FLUSH:
+                self._write(batch)
+                self._queue.task_done()
+                continue
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        written: List[Dict[str, Any]] = []
+        try:
+            lines: List[str] = []
+            for record in batch:
+                # One bad record is dropped on its own; it must not take the writer thread down.
+                try:
+                    lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+                except Exception as exc:
+                    print(f"[SYSTEM] Session log record dropped: {exc}", file=sys.stderr)
+                    continue
+                written.append(record)
+            if lines:
+                with self.file_path.open("a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+                if self.file_path.stat().st_size >= self.max_bytes:
+                    self._rotate()
+        except Exception as exc:
+            print(f"[SYSTEM] Session log write failed: {exc}", file=sys.stderr)
+        finally:
+            # Indexed before the batch is marked done, so flush() also waits for the index.
+            if self.search_index is not None and written:
+                self._index(written)
+            for _ in batch:
+                self._queue.task_done()
+            batch.clear()
+
+    def _index(self, batch: List[Dict[str, Any]]) -> None:
+        assert self.search_index is not None
+        try:
+            self.search_index.add_log_records(batch)
+        except Exception as exc:
+            print(f"[SYSTEM] Search indexing failed: {exc}", file=sys.stderr)
+
+    def _rotate(self) -> None:
+        index = 1
+        while True:
+            archive = self.file_path.with_name(f"{self.file_path.stem}.{index}{self.file_path.suffix}.gz")
+            if not archive.exists():
+                break
+            index += 1
+        with self.file_path.open("rb") as src, gzip.open(archive, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        self.file_path.unlink()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+from src.llm_client import LLMClient, Prompt
+from src.sentence_segmenter import SentenceSegmenter
+
+if TYPE_CHECKING:
+    from src.metrics import TurnMetrics
+    from src.tts_engine import TtsEngine
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+
+def normalise_prompt(prompt: Prompt) -> str:
+    """Prompt text with case, punctuation and spacing ignored (the final pass often only re-punctuates)."""
+    text = prompt if isinstance(prompt, str) else json.dumps(prompt, ensure_ascii=False)
+    return _SPACE.sub(" ", _PUNCTUATION.sub(" ", text.casefold())).strip()
+
+
+class Speculation:
+    """One speculative reply, streamed on its own thread into a buffer that can be replayed once."""
+
+    def __init__(self, llm_client: LLMClient, text: str, prompt: Prompt, on_first_sentence: Optional[Callable[[str], None]] = None):
+        self.text = text
+        self.prompt = prompt
+        self._client = llm_client.view()
+        self._on_first_sentence = on_first_sentence
+        self._deltas: List[str] = []
+        self._done = False
+        self._error: Optional[Exception] = None
+        self._cond = threading.Condition()
+        self._cancelled = threading.Event()
+
+    @property
+    def usage(self) -> Optional[Dict[str, object]]:
+        return self._client.last_usage
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="speculation", daemon=True).start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _run(self) -> None:
+        segmenter = SentenceSegmenter() if self._on_first_sentence is not None else None
+        stream = self._client.complete_stream(self.prompt)
+        try:
+            for delta in stream:
+                if self._cancelled.is_set():
+                    break
+                with self._cond:
+                    self._deltas.append(delta)
+                    self._cond.notify_all()
+                if segmenter is not None and self._on_first_sentence is not None:
+                    sentences = segmenter.feed(delta)
+                    if sentences:
+                        self._on_first_sentence(sentences[0])
+                        segmenter = None
+        except Exception as exc:
+            with self._cond:
+                self._error = exc
+        finally:
+            stream.close()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def replay(self) -> Iterator[str]:
+        """Deltas received so far, then the rest as they arrive."""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._deltas) and not self._done:
+                    self._cond.wait()
+                if index < len(self._deltas):
+                    delta = self._deltas[index]
+                    index += 1
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            yield delta
+
+
+class SpeculativeResponder:
+    """
+    Starts the LLM request while the user is still speaking. Once the realtime (partial) transcript
+    has stayed the same for stable_seconds, the prompt is built from it and the reply is streamed
+    into a buffer, hiding prefill behind the recorder's end-of-speech delay. complete_stream() then
+    replays that buffer if the final prompt matches (a hit), or cancels it and asks afresh (a miss).
+    With a TTS engine that has a cache, the first sentence of a speculative reply is pre-rendered
+    into the cache as well.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        build_prompt: Callable[[str], Prompt],
+        stable_seconds: float = 0.3,
+        tts_engine: Optional[TtsEngine] = None,
+        metrics: Optional[TurnMetrics] = None,
+    ):
+        self.llm_client = llm_client
+        self.build_prompt = build_prompt
+        self.stable_seconds = stable_seconds
+        self.tts_engine = tts_engine if tts_engine is not None and tts_engine.cache is not None else None
+        self.metrics = metrics
+        self.counts = {"hit": 0, "miss": 0, "none": 0, "superseded": 0}
+        self._lock = threading.Lock()
+        self._partial = ""
+        self._timer: Optional[threading.Timer] = None
+        self._current: Optional[Speculation] = None
+
+    def on_partial(self, text: str) -> None:
+        """Realtime transcript update (the recorder's stabilised-text callback)."""
+        text = text.strip()
+        with self._lock:
+            if text == self._partial:
+                return
+            self._partial = text
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not text:
+                return
+            self._timer = threading.Timer(self.stable_seconds, self._speculate, args=(text,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def discard(self) -> None:
+        """Drop any speculation for the previous utterance (call when a new one starts)."""
+        with self._lock:
+            self._partial = ""
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            current, self._current = self._current, None
+        if current is not None:
+            current.cancel()
+            self._count("superseded")
+
+    def _speculate(self, text: str) -> None:
+        with self._lock:
+            if text != self._partial or (self._current is not None and self._current.text == text):
+                return
+        try:
+            prompt = self.build_prompt(text)
+        except Exception as exc:
+            print(f"[SYSTEM] Speculative prompt failed: {exc}", file=sys.stderr)
+            return
+        speculation = Speculation(self.llm_client, text, prompt, self._prerender if self.tts_engine else None)
+        with self._lock:
+            # The transcript moved on (or was finalised) while the prompt was being built.
+            if text != self._partial:
+                return
+            previous, self._current = self._current, speculation
+        speculation.start()
+        if previous is not None:
+            previous.cancel()
+            self._count("superseded")
+
+    def _prerender(self, sentence: str) -> None:
+        def render() -> None:
+            assert self.tts_engine is not None
+            try:
+                for _ in self.tts_engine.iter_pcm(sentence):
+                    pass
+            except Exception as exc:
+                print(f"[SYSTEM] Speculative TTS failed: {exc}", file=sys.stderr)
+
+        threading.Thread(target=render, name="speculation-tts", daemon=True).start()
+
+    def complete_stream(self, prompt: Prompt) -> Iterator[str]:
+        """The reply for the final prompt: the speculative stream on a hit, a fresh request otherwise."""
+        with self._lock:
+            self._partial = ""
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            speculation, self._current = self._current, None
+        if speculation is not None and normalise_prompt(speculation.prompt) == normalise_prompt(prompt):
+            replay = speculation.replay()
+            try:
+                first = next(replay, None)
+            except Exception as exc:
+                # The speculative request failed before its first token: ask afresh, as on a miss.
+                print(f"[SYSTEM] Speculative LLM call failed: {exc}", file=sys.stderr)
+            else:
+                self._count("hit")
+                try:
+                    if first is not None:
+                        yield first
+                        yield from replay
+                finally:
+                    speculation.cancel()
+                self.llm_client.last_usage = speculation.usage
+                return
+        if speculation is not None:
+            speculation.cancel()
+        self._count("miss" if speculation is not None else "none")
+        yield from self.llm_client.complete_stream(prompt)
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+        if self.metrics is not None:
+            self.metrics.count(f"speculation_{outcome}")
+
+    def format_stats(self) -> str:
+        with self._lock:
+            counts = dict(self.counts)
+        decided = counts["hit"] + counts["miss"]
+        rate = f"{counts['hit'] / decided:.0%}" if decided else "n/a"
+        return (
+            f"[SYSTEM] Speculation: {counts['hit']} hits, {counts['miss']} misses ({rate} hit rate), "
+            f"{counts['none']} turns without a speculation, {counts['superseded']} superseded."
+        )
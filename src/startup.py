@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def run_parallel(
+    tasks: Dict[str, Callable[[], Any]],
+    max_workers: Optional[int] = None,
+    results: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run named startup tasks concurrently and return (results, seconds per task).
+    Every task is allowed to finish; the first failure (in task order) is then re-raised. Pass
+    results to also receive what the successful tasks built when that happens, so it can be released.
+    """
+    timings: Dict[str, float] = {}
+
+    def _timed(name: str, task: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return task()
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1, thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(_timed, name, task) for name, task in tasks.items()}
+    if results is not None:
+        results.update({name: f.result() for name, f in futures.items() if f.exception() is None})
+    errors = [f.exception() for f in futures.values() if f.exception() is not None]
+    if errors:
+        raise errors[0]  # type: ignore[misc]
+    return {name: f.result() for name, f in futures.items()}, timings
+
+
+def format_breakdown(timings: Dict[str, float], total: float) -> str:
+    """One-line startup report, slowest component first."""
+    parts = [f"{name} {seconds:.2f}s" for name, seconds in sorted(timings.items(), key=lambda kv: -kv[1])]
+    return f"[SYSTEM] Startup {total:.2f}s: " + ", ".join(parts)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from src.llm_client import LLMClient
+
+if TYPE_CHECKING:
+    from src.memory_manager import MemoryManager
+
+
+class BackgroundSummariser:
+    """
+    Folds turns that have left the recent window into the rolling summary on a worker thread,
+    a few messages at a time and only while the LLM has no foreground request in flight.
+    """
+
+    def __init__(
+        self,
+        memory_manager: MemoryManager,
+        llm_client: LLMClient,
+        prompt_prefix: str,
+        batch_messages: int = 4,
+        idle_poll: float = 0.1,
+    ):
+        self.memory_manager = memory_manager
+        self.llm_client = llm_client
+        self.prompt_prefix = prompt_prefix
+        self.batch_messages = max(1, batch_messages)
+        self.idle_poll = idle_poll
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="summariser", daemon=True)
+        self._thread.start()
+
+    def schedule(self) -> None:
+        """Ask the worker to fold whatever has aged out of the window."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+
+    def _wait_for_idle(self) -> None:
+        while self.llm_client.in_flight and not self._stopped.is_set():
+            time.sleep(self.idle_poll)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stopped.is_set():
+                self._wait_for_idle()
+                if self._stopped.is_set():
+                    return
+                try:
+                    folded = self.memory_manager.fold_older(
+                        self.llm_client.summaries, self.prompt_prefix, self.batch_messages
+                    )
+                except Exception as exc:
+                    print(f"[SYSTEM] Summary failed: {exc}", file=sys.stderr)
+                    break
+                if not folded:
+                    break
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import re
+
+# Words and individual punctuation marks; a rough stand-in for BPE pieces.
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast, dependency-free token estimate for prompt budgeting.
+    One token per word or punctuation mark, plus one for every further six characters of long words,
+    which slightly over-counts typical BPE vocabularies so budgets err on the safe side.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _PIECE.findall(text))
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Union
+
+import numpy
+
+from src.config import Settings
+
+# Rate faster-whisper expects for in-memory audio.
+WHISPER_SAMPLE_RATE = 16000
+
+
+class WhisperTranscriber:
+    """
+    faster-whisper (the model RealtimeSTT wraps) for whole utterances or files, batching each
+    input's segments. One loaded model can serve several threads (see num_workers).
+    """
+
+    def __init__(self, settings: Settings, batch_size: int = 8, workers: int = 1):
+        from faster_whisper import BatchedInferencePipeline, WhisperModel  # type: ignore[import-not-found]
+
+        self.language = settings.rtstt_language or None
+        self.batch_size = batch_size
+        # num_workers lets several threads call transcribe() on the one model concurrently.
+        self._model = WhisperModel(
+            settings.rtstt_model,
+            compute_type=settings.rtstt_compute_type,
+            cpu_threads=settings.rtstt_cpu_threads,
+            num_workers=workers,
+        )
+        self._batched = BatchedInferencePipeline(model=self._model) if batch_size > 1 else None
+
+    def transcribe(self, audio: Union[Path, numpy.ndarray]) -> str:
+        """Transcribe a file, or mono float32 samples at 16 kHz."""
+        source = str(audio) if isinstance(audio, Path) else audio
+        if self._batched is not None:
+            segments, _ = self._batched.transcribe(source, language=self.language, batch_size=self.batch_size)
+        else:
+            segments, _ = self._model.transcribe(source, language=self.language)
+        return " ".join(segment.text.strip() for segment in segments).strip()
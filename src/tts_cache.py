@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy
+
+_SPACE = re.compile(r"\s+")
+# Disk entry header: sample rate (uint32) and channel count (uint32), then raw little-endian int16 PCM.
+_HEADER = struct.Struct("<II")
+
+
+def normalize_text(text: str) -> str:
+    """Text as it affects synthesis: Unicode-normalised with whitespace collapsed."""
+    return _SPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache location ($XDG_CACHE_HOME or ~/.cache), used when TTS_CACHE_DIR is empty."""
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "sottovoce" / "tts"
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    samples: numpy.ndarray  # int16, interleaved; a read-only memmap when loaded from disk
+    sample_rate: int
+    channels: int
+
+
+class TtsCache:
+    """
+    Content-addressed cache of synthesized speech.
+    Entries are keyed by a hash of the normalised text, the voice model and the synthesis
+    parameters. A byte-bounded in-memory LRU sits in front of a directory of raw int16 files that
+    are memory-mapped on hit; the directory is trimmed oldest-used-first past max_disk_bytes.
+    """
+
+    def __init__(self, directory: Path, max_memory_bytes: int, max_disk_bytes: int):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    @staticmethod
+    def key(text: str, voice_digest: str, **params: float) -> str:
+        parts = [voice_digest, normalize_text(text)]
+        parts.extend(f"{name}={params[name]!r}" for name in sorted(params))
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pcm"
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.hits += 1
+                return audio
+            on_disk = key in self._disk
+        if not on_disk:
+            with self._lock:
+                self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                sample_rate, channels = _HEADER.unpack(f.read(_HEADER.size))
+            samples = numpy.memmap(path, dtype="<i2", mode="r", offset=_HEADER.size)
+            os.utime(path)
+        except (OSError, ValueError, struct.error) as exc:
+            print(f"[SYSTEM] TTS cache read failed: {exc}", file=sys.stderr)
+            with self._lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+        audio = CachedAudio(samples, sample_rate, channels)
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, audio)
+            self.hits += 1
+        return audio
+
+    def put(self, key: str, samples: numpy.ndarray, sample_rate: int, channels: int) -> None:
+        samples = numpy.ascontiguousarray(samples, dtype="<i2")
+        audio = CachedAudio(samples, sample_rate, channels)
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with tmp.open("wb") as f:
+                f.write(_HEADER.pack(sample_rate, channels))
+                samples.tofile(f)
+            os.replace(tmp, path)
+        except OSError as exc:
+            print(f"[SYSTEM] TTS cache write failed: {exc}", file=sys.stderr)
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self._remember(key, audio)
+            return
+        size = _HEADER.size + samples.nbytes
+        with self._lock:
+            self._remember(key, audio)
+            self._forget_disk(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            self._evict_disk()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key: str, audio: CachedAudio) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.samples.nbytes
+        if audio.samples.nbytes > self.max_memory_bytes:
+            return
+        self._memory[key] = audio
+        self._memory_bytes += audio.samples.nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.samples.nbytes
+
+    def _forget_disk(self, key: str) -> None:
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            # A memmap still held by the memory tier keeps its data readable after unlink on POSIX.
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as exc:
+                print(f"[SYSTEM] TTS cache eviction failed: {exc}", file=sys.stderr)
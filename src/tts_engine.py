@@ -1,17 +1,58 @@
 from __future__ import annotations
 
+import dataclasses
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Deque, Dict, Iterator, List, Optional, Tuple
 
 import numpy
-import sounddevice as sd  # type: ignore[import-not-found]
-from piper import PiperVoice, SynthesisConfig  # type: ignore[import-not-found]
 
+from src.audio_archive import AudioArchive, to_int16
+from src.audio_output import AudioPlayer
 from src.config import Settings
+from src.tts_cache import CachedAudio, TtsCache, default_cache_dir, file_digest
+
+if TYPE_CHECKING:
+    from piper import PiperVoice  # type: ignore[import-not-found]
+
+    from src.metrics import TurnTimer
+
+
+@dataclass(frozen=True)
+class SynthesisStats:
+    """Timing of the last synthesize() call, for latency and real-time-factor metrics."""
+
+    first_audio_at: Optional[float]  # perf_counter when the first samples were queued for playback
+    audio_seconds: float
+    inference_seconds: float  # time spent producing audio, excluding waits on the playback buffer
+    cached: bool
+
+
+@dataclass(frozen=True)
+class RenderedSpeech:
+    """A sentence synthesized ahead of playback by a synthesis worker."""
+
+    audio: Optional[CachedAudio]  # unscaled int16; None if Piper produced nothing
+    inference_seconds: float
+    cached: bool
 
 
 class TtsEngine:
-    """Thin wrapper around Piper TTS."""
+    """
+    Thin wrapper around Piper TTS.
+    With tts_workers > 1 the voice is loaded once per worker, each with its own ONNX session sized
+    to a share of the cores, and queued sentences are rendered concurrently (see prefetch) while
+    playback still happens in order.
+    """
 
     def __init__(self, settings: Settings):
         self.enabled = settings.tts_enabled
@@ -22,39 +63,379 @@ class TtsEngine:
         self.noise_w_scale = settings.tts_noise_w_scale
         self.volume = settings.tts_volume
         self._voice: Optional[PiperVoice] = None
+        self._player = AudioPlayer(
+            buffer_seconds=settings.tts_buffer_seconds, null_sink=settings.tts_null_sink
+        )
+        # Optional per-turn recording of everything spoken, fed from the playback chunks.
+        self.archive = AudioArchive(settings.tts_archive_format) if settings.tts_archive_format else None
+        self.audio_extension = settings.tts_archive_format or "wav"
+        self.cache: Optional[TtsCache] = None
+        if settings.tts_enabled and settings.tts_cache_enabled:
+            self.cache = TtsCache(
+                Path(settings.tts_cache_dir) if settings.tts_cache_dir else default_cache_dir(),
+                max_memory_bytes=settings.tts_cache_memory_mb * 1024 * 1024,
+                max_disk_bytes=settings.tts_cache_disk_mb * 1024 * 1024,
+            )
+        self.cache_max_chars = settings.tts_cache_max_chars
+        self._voice_digest = ""
+        self.last_synthesis: Optional[SynthesisStats] = None
+        self._voice_lock = threading.Lock()
+        self.workers = max(1, settings.tts_workers)
+        # Several sessions each using every core would just contend; split the cores between them.
+        self.threads_per_worker = settings.tts_threads_per_worker or (
+            max(1, (os.cpu_count() or 1) // self.workers) if self.workers > 1 else 0
+        )
+        self._idle_voices: "queue.Queue[PiperVoice]" = queue.Queue()
+        self._render_pool = (
+            ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tts-render") if self.workers > 1 else None
+        )
+        self._prefetched: Dict[str, Deque["Future[RenderedSpeech]"]] = {}
+        self._prefetch_lock = threading.Lock()
+        # Set while a filler plays: the next utterance crossfades into it (seconds).
+        self._crossfade_next = 0.0
+        # Held while audio is queued for playback, so a filler never slips in ahead of a reply chunk.
+        self._output_lock = threading.Lock()
 
     def _ensure_voice(self) -> None:
+        with self._voice_lock:
+            self._load_voice()
+
+    def _load_voice(self) -> None:
         if self._voice is None:
             if not self.voice_path:
                 raise RuntimeError("TTS voice path is not set. Set TTS_VOICE_PATH to a Piper voice .onnx.")
-            self._voice = PiperVoice.load(self.voice_path, use_cuda=self.use_cuda)
+            # Piper (and onnxruntime) are imported here so they load during warm-up, not at startup.
+            from piper import PiperVoice  # type: ignore[import-not-found]
+
+            voice = PiperVoice.load(self.voice_path, use_cuda=self.use_cuda)
+            if self.threads_per_worker:
+                voice = dataclasses.replace(voice, session=self._new_session(voice))
+            self._voice = voice
+            if self.workers > 1:
+                self._idle_voices.put(voice)
+                for _ in range(self.workers - 1):
+                    self._idle_voices.put(dataclasses.replace(voice, session=self._new_session(voice)))
+            if self.cache is not None:
+                self._voice_digest = file_digest(self.voice_path)
+
+    def _new_session(self, voice: PiperVoice):
+        """Another ONNX session for the voice model, limited to threads_per_worker threads."""
+        import onnxruntime  # type: ignore[import-not-found]
+
+        options = onnxruntime.SessionOptions()
+        if self.threads_per_worker:
+            options.intra_op_num_threads = self.threads_per_worker
+            options.inter_op_num_threads = 1
+        return onnxruntime.InferenceSession(
+            self.voice_path, sess_options=options, providers=voice.session.get_providers()
+        )
+
+    @contextmanager
+    def _borrow_voice(self) -> Iterator[PiperVoice]:
+        """A voice no other thread is running (with one worker, the shared voice)."""
+        if self.workers == 1:
+            assert self._voice is not None
+            yield self._voice
+            return
+        voice = self._idle_voices.get()
+        try:
+            yield voice
+        finally:
+            self._idle_voices.put(voice)
 
     def _synth_config(self):
+        from piper import SynthesisConfig  # type: ignore[import-not-found]
+
         assert self._voice is not None
+        # Volume is applied while copying into the playback buffer, so Piper skips its own pass.
         return SynthesisConfig(
-            volume=self.volume,
+            volume=1.0,
             length_scale=self.length_scale,
             noise_scale=self.noise_scale,
             noise_w_scale=self.noise_w_scale,
         )
 
+    def warm_up(self) -> None:
+        """Load the voice and run a throwaway synthesis so the first reply skips ONNX session setup."""
+        if not self.enabled:
+            return
+        self._ensure_voice()
+        syn_config = self._synth_config()
+
+        def warm(_: int) -> None:
+            with self._borrow_voice() as voice:
+                for _ in voice.synthesize("Hello.", syn_config=syn_config):
+                    pass
+
+        if self._render_pool is not None:
+            list(self._render_pool.map(warm, range(self.workers)))
+        else:
+            warm(0)
+
+    def _cache_key(self, text: str, syn_config) -> Optional[str]:
+        if self.cache is None or len(text) > self.cache_max_chars:
+            return None
+        return TtsCache.key(
+            text,
+            self._voice_digest,
+            length_scale=syn_config.length_scale,
+            noise_scale=syn_config.noise_scale,
+            noise_w_scale=syn_config.noise_w_scale,
+            volume=syn_config.volume,
+        )
+
+    def play_rendered(self, speech: RenderedSpeech, output_path: Path) -> None:
+        """Play (and archive) audio synthesized ahead of time, then wait for it to finish."""
+        audio = speech.audio
+        if audio is None:
+            self.last_synthesis = None
+            return
+        self.last_synthesis = SynthesisStats(
+            first_audio_at=time.perf_counter(),
+            audio_seconds=len(audio.samples) / (audio.sample_rate * audio.channels),
+            inference_seconds=speech.inference_seconds,
+            cached=speech.cached,
+        )
+        if self.archive is not None:
+            self.archive.write(output_path, audio.samples, audio.sample_rate, audio.channels, self.volume)
+        # Rendered PCM is int16, so the int16 -> float conversion folds into the volume scale.
+        self._play(audio.samples, audio.sample_rate, audio.channels, self.volume / 32767.0)
+        self._player.wait()
+
+    def _play(self, samples: numpy.ndarray, sample_rate: int, channels: int, volume: float) -> bool:
+        with self._output_lock:
+            crossfade, self._crossfade_next = self._crossfade_next, 0.0
+            return self._player.play(samples, sample_rate, channels, volume, crossfade)
+
+    def play_filler(self, audio: CachedAudio, crossfade: float) -> bool:
+        """
+        Queue a short clip (unscaled int16) without waiting for it, unless something is already
+        playing; the next utterance then crossfades into what is left of it.
+        """
+        with self._output_lock:
+            if not self._player.idle:
+                return False
+            self._crossfade_next = crossfade
+            return self._player.play(audio.samples, audio.sample_rate, audio.channels, self.volume / 32767.0)
+
+    def prefetch(self, text: str) -> None:
+        """
+        Start rendering a sentence that will be passed to synthesize() shortly, so several queued
+        sentences synthesize in parallel. A no-op with a single worker.
+        """
+        if self._render_pool is None or not self.enabled:
+            return
+        future = self._render_pool.submit(self.render, text)
+        with self._prefetch_lock:
+            self._prefetched.setdefault(text, deque()).append(future)
+
+    def _take_prefetched(self, text: str) -> Optional["Future[RenderedSpeech]"]:
+        with self._prefetch_lock:
+            pending = self._prefetched.get(text)
+            if not pending:
+                return None
+            future = pending.popleft()
+            if not pending:
+                del self._prefetched[text]
+            return future
+
+    def discard_prefetched(self, text: str) -> None:
+        """Drop a sentence passed to prefetch() that will not be spoken after all (cancelled turns)."""
+        future = self._take_prefetched(text)
+        if future is not None:
+            future.cancel()
+
+    def render(self, text: str) -> RenderedSpeech:
+        """Synthesize a sentence to int16 PCM without playing it (uses the cache and a pooled voice)."""
+        started = time.perf_counter()
+        chunks: List[numpy.ndarray] = []
+        sample_rate = channels = 0
+        cached = False
+        for audio, cached in self._iter_raw(text):
+            chunks.append(audio.samples)
+            sample_rate, channels = audio.sample_rate, audio.channels
+        if not chunks:
+            return RenderedSpeech(None, time.perf_counter() - started, cached=False)
+        samples = chunks[0] if len(chunks) == 1 else numpy.concatenate(chunks)
+        inference = 0.0 if cached else time.perf_counter() - started
+        return RenderedSpeech(CachedAudio(samples, sample_rate, channels), inference, cached)
+
     def synthesize(self, text: str, output_path: Path) -> Path:
         if not self.enabled:
             raise RuntimeError("TTS is disabled")
+        prefetched = self._take_prefetched(text)
+        if prefetched is not None:
+            self.play_rendered(prefetched.result(), output_path)
+            return output_path
         self._ensure_voice()
-        assert self._voice is not None
         syn_config = self._synth_config()
+        self.last_synthesis = None
+        key = self._cache_key(text, syn_config)
+        if key is not None and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.play_rendered(RenderedSpeech(cached, 0.0, cached=True), output_path)
+                return output_path
 
-        # Play back to the user (no disk write)
-        chunks = list(self._voice.synthesize(text, syn_config=syn_config))
-        if chunks:
-            sample_rate = chunks[0].sample_rate
-            channels = chunks[0].sample_channels
-            audio_bytes = b"".join(chunk.audio_int16_bytes for chunk in chunks)
-            audio = numpy.frombuffer(audio_bytes, dtype=numpy.int16)
-            if channels > 1:
-                audio = audio.reshape(-1, channels)
-            sd.play(audio, sample_rate)
-            sd.wait()
+        # Play back to the user chunk by chunk as Piper produces them; the archive (if any)
+        # appends the same chunks to output_path in the background.
+        pcm_chunks = []
+        completed = True
+        sample_rate = channels = 0
+        first_audio_at: Optional[float] = None
+        audio_seconds = blocked = 0.0
+        started = time.perf_counter()
+        with self._borrow_voice() as voice:
+            for chunk in voice.synthesize(text, syn_config=syn_config):
+                sample_rate, channels = chunk.sample_rate, chunk.sample_channels
+                audio_seconds += len(chunk.audio_float_array) / (sample_rate * channels)
+                if key is not None:
+                    pcm_chunks.append(to_int16(chunk.audio_float_array))
+                if self.archive is not None:
+                    self.archive.write(
+                        output_path,
+                        chunk.audio_float_array,
+                        chunk.sample_rate,
+                        chunk.sample_channels,
+                        self.volume,
+                    )
+                play_started = time.perf_counter()
+                if first_audio_at is None:
+                    first_audio_at = play_started
+                played = self._play(
+                    chunk.audio_float_array,
+                    chunk.sample_rate,
+                    chunk.sample_channels,
+                    self.volume,
+                )
+                blocked += time.perf_counter() - play_started
+                if not played:
+                    completed = False
+                    break
+        self.last_synthesis = SynthesisStats(
+            first_audio_at, audio_seconds, time.perf_counter() - started - blocked, cached=False
+        )
+        # Only complete utterances are cached; a barge-in leaves a truncated one.
+        if key is not None and self.cache is not None and completed and pcm_chunks:
+            self.cache.put(key, numpy.concatenate(pcm_chunks), sample_rate, channels)
+        self._player.wait()
 
         return output_path
+
+    def iter_pcm(self, text: str) -> Iterator[CachedAudio]:
+        """
+        Synthesize without playback, yielding 16-bit PCM chunks (volume applied) as Piper produces
+        them. Safe to call from several threads, which share the cache and the voice pool.
+        """
+        for audio, _ in self._iter_raw(text):
+            yield CachedAudio(to_int16(audio.samples, self.volume), audio.sample_rate, audio.channels)
+
+    def _iter_raw(self, text: str) -> Iterator[Tuple[CachedAudio, bool]]:
+        """Unscaled int16 chunks, each flagged with whether it came from the cache."""
+        if not self.enabled:
+            raise RuntimeError("TTS is disabled")
+        self._ensure_voice()
+        syn_config = self._synth_config()
+        key = self._cache_key(text, syn_config)
+        cached = self.cache.get(key) if key is not None and self.cache is not None else None
+        if cached is not None:
+            yield cached, True
+            return
+        raw: List[numpy.ndarray] = []
+        sample_rate = channels = 0
+        with self._borrow_voice() as voice:
+            for chunk in voice.synthesize(text, syn_config=syn_config):
+                sample_rate, channels = chunk.sample_rate, chunk.sample_channels
+                pcm = to_int16(chunk.audio_float_array)
+                if key is not None:
+                    raw.append(pcm)
+                yield CachedAudio(pcm, sample_rate, channels), False
+        # Reached only if the consumer took every chunk, so the cached utterance is complete.
+        if key is not None and self.cache is not None and raw:
+            self.cache.put(key, numpy.concatenate(raw), sample_rate, channels)
+
+    def render_to_file(self, text: str, output_path: Path) -> float:
+        """
+        Synthesize straight to a WAV file without playback (batch mode); returns seconds of audio.
+        The file is written under a temporary name and only renamed into place once it is complete.
+        """
+        partial = output_path.with_name(output_path.name + ".part")
+        seconds = 0.0
+        wav: Optional[wave.Wave_write] = None
+        try:
+            for chunk in self.iter_pcm(text):
+                if wav is None:
+                    # Opened on the first chunk, whose format it takes, so a failure before any
+                    # audio surfaces as itself rather than as wave's "# channels not specified".
+                    wav = wave.open(str(partial), "wb")
+                    wav.setnchannels(chunk.channels)
+                    wav.setsampwidth(2)
+                    wav.setframerate(chunk.sample_rate)
+                wav.writeframes(chunk.samples.tobytes())
+                seconds += len(chunk.samples) / (chunk.sample_rate * chunk.channels)
+            if wav is None:
+                raise RuntimeError("Piper produced no audio")
+            wav.close()
+            wav = None
+            os.replace(partial, output_path)
+        finally:
+            if wav is not None:
+                wav.close()
+            partial.unlink(missing_ok=True)
+        return seconds
+
+    def finish_output(self, output_path: Path) -> None:
+        """Mark the end of a turn's audio so its archive file can be finalised."""
+        if self.archive is not None:
+            self.archive.finish(output_path)
+
+    def stop(self) -> None:
+        """Cut off any audio still queued for playback and drop sentences rendered ahead."""
+        with self._prefetch_lock:
+            pending = [future for futures in self._prefetched.values() for future in futures]
+            self._prefetched.clear()
+        for future in pending:
+            future.cancel()
+        self._crossfade_next = 0.0
+        self._player.stop()
+
+    def close(self) -> None:
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False, cancel_futures=True)
+        self._player.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+class SpeechQueue:
+    """Speaks queued sentences in order on a background thread so generation can continue."""
+
+    def __init__(self, engine: TtsEngine, output_path: Path, timer: Optional[TurnTimer] = None):
+        self._engine = engine
+        self._output_path = output_path
+        self._timer = timer
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="tts-speech", daemon=True)
+        self._thread.start()
+
+    def put(self, text: str) -> None:
+        self._engine.prefetch(text)
+        self._queue.put(text)
+
+    def close(self) -> None:
+        """Wait for every queued sentence to finish playing."""
+        self._queue.put(None)
+        self._thread.join()
+        self._engine.finish_output(self._output_path)
+
+    def _run(self) -> None:
+        while True:
+            text = self._queue.get()
+            if text is None:
+                return
+            try:
+                self._engine.synthesize(text, self._output_path)
+            except Exception as exc:
+                print(f"[SYSTEM] TTS failed: {exc}", file=sys.stderr)
+            if self._timer is not None:
+                self._timer.add_synthesis(self._engine.last_synthesis)
@@ -0,0 +1,26 @@
+from src.config import Settings
+
+testable_settings = Settings(
+    rtstt_model="tiny",
+    rtstt_compute_type="int8",
+    rtstt_language="en",
+    rtstt_use_microphone=False,
+    llm_endpoint="http://localhost:9999/v1/chat/completions",
+    llm_model="local-model",
+    llm_timeout=7.5,
+    session_logs_dir="session_logs",
+    tts_enabled=True,
+    tts_voice_path="/tmp/voice.onnx",
+    tts_use_cuda=False,
+    tts_length_scale=1.0,
+    tts_noise_scale=0.667,
+    tts_noise_w_scale=0.8,
+    tts_volume=1.0,
+    context_window_tokens=2048,
+    context_window_messages=8,
+    summarise_prompt="Summarise the convo.",
+    llm_prompt_conversational="Keep replies concise...",
+    llm_stream=True,
+    concurrent_pipeline=True,
+    barge_in=True,
+)
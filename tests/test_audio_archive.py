@@ -0,0 +1,58 @@
+import contextlib
+import io
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+import numpy
+
+from src.audio_archive import AudioArchive, to_int16
+
+
+class AudioArchiveTests(unittest.TestCase):
+    def test_to_int16_scales_and_clips(self) -> None:
+        pcm = to_int16(numpy.array([0.5, -2.0, 1.0], dtype=numpy.float32), volume=0.5)
+        self.assertEqual(pcm.tolist(), [8191, -32767, 16383])
+
+    def test_chunks_are_written_to_one_file_per_turn(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = Path(tmp) / "turn1.wav", Path(tmp) / "turn2.wav"
+            archive = AudioArchive("wav")
+            archive.write(first, numpy.zeros(100, dtype=numpy.float32), 22050, 1)
+            archive.write(first, numpy.full(50, 0.5, dtype=numpy.float32), 22050, 1)
+            archive.finish(first)
+            archive.write(second, numpy.zeros(30, dtype=numpy.float32), 16000, 1)
+            archive.close()
+
+            with wave.open(str(first), "rb") as wav:
+                self.assertEqual(wav.getframerate(), 22050)
+                self.assertEqual(wav.getsampwidth(), 2)
+                self.assertEqual(wav.getnframes(), 150)
+            with wave.open(str(second), "rb") as wav:
+                self.assertEqual(wav.getframerate(), 16000)
+                self.assertEqual(wav.getnframes(), 30)
+
+    def test_a_failed_sink_is_reported_once_per_turn(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            missing, good = Path(tmp) / "gone" / "turn1.wav", Path(tmp) / "turn2.wav"
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                archive = AudioArchive("wav")
+                for _ in range(5):
+                    archive.write(missing, numpy.zeros(10, dtype=numpy.float32), 16000, 1)
+                archive.finish(missing)
+                archive.write(good, numpy.zeros(20, dtype=numpy.float32), 16000, 1)
+                archive.close()
+
+            self.assertEqual(stderr.getvalue().count("Audio archive write failed"), 1)
+            with wave.open(str(good), "rb") as wav:
+                self.assertEqual(wav.getnframes(), 20)
+
+    def test_rejects_unknown_format(self) -> None:
+        with self.assertRaises(ValueError):
+            AudioArchive("mp3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+import numpy
+
+from src.audio_output import AudioPlayer, PcmRingBuffer
+
+
+class PcmRingBufferTests(unittest.TestCase):
+    def test_write_applies_volume_and_wraps(self) -> None:
+        buf = PcmRingBuffer(capacity_frames=4)
+        self.assertTrue(buf.write(numpy.array([0.5, -0.5, 1.0], dtype=numpy.float32), scale=0.5))
+        out = numpy.zeros((2, 1), dtype=numpy.float32)
+        self.assertEqual(buf.read_into(out), 2)
+        numpy.testing.assert_allclose(out[:, 0], [0.25, -0.25])
+
+        # Wraps around the end of the backing array.
+        self.assertTrue(buf.write(numpy.array([0.1, 0.2, 0.3], dtype=numpy.float32)))
+        out = numpy.zeros((5, 1), dtype=numpy.float32)
+        self.assertEqual(buf.read_into(out), 4)
+        numpy.testing.assert_allclose(out[:, 0], [0.5, 0.1, 0.2, 0.3, 0.0])
+
+    def test_writer_blocks_until_consumed_and_clear_releases(self) -> None:
+        buf = PcmRingBuffer(capacity_frames=2)
+        results: list[bool] = []
+        writer = threading.Thread(
+            target=lambda: results.append(buf.write(numpy.ones(6, dtype=numpy.float32)))
+        )
+        writer.start()
+        out = numpy.zeros((2, 1), dtype=numpy.float32)
+        while buf.pending < 2:
+            pass
+        buf.read_into(out)
+        buf.clear()
+        writer.join(timeout=2)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(results, [False])
+        self.assertEqual(buf.pending, 0)
+
+    def test_crossfade_blends_into_queued_audio(self) -> None:
+        buf = PcmRingBuffer(capacity_frames=16)
+        buf.write(numpy.full(10, 0.5, dtype=numpy.float32))
+        # Int16 reply with its full-scale volume, blended over the next 4 queued frames.
+        self.assertTrue(buf.write(numpy.full(6, -16384, dtype=numpy.int16), scale=1 / 32768, crossfade=4))
+        self.assertEqual(buf.pending, 6)
+        out = numpy.zeros((6, 1), dtype=numpy.float32)
+        buf.read_into(out)
+        numpy.testing.assert_allclose(out[:, 0], [0.5, 0.25, 0.0, -0.25, -0.5, -0.5])
+        # Nothing queued: a plain write.
+        buf.write(numpy.full(3, 0.1, dtype=numpy.float32), crossfade=4)
+        self.assertEqual(buf.pending, 3)
+
+
+class NullSinkTests(unittest.TestCase):
+    def test_null_sink_drains_at_playback_rate(self) -> None:
+        player = AudioPlayer(buffer_seconds=1.0, null_sink=True)
+        try:
+            started = time.perf_counter()
+            self.assertTrue(player.play(numpy.zeros(1600, dtype=numpy.float32), sample_rate=16000))
+            player.wait()
+            elapsed = time.perf_counter() - started
+        finally:
+            player.close()
+        self.assertGreaterEqual(elapsed, 0.08)
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+from src.batch import BatchItem, BatchRunner, completed_ids, load_items
+from src.llm_client import LLMClient, LLMConfig
+
+
+class FakeTranscriber:
+    def transcribe(self, path: Path) -> str:
+        return f"transcript of {path.stem}"
+
+
+class BatchTests(unittest.TestCase):
+    def test_load_items_from_directory_and_manifest(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "a.wav").write_bytes(b"")
+            (root / "b.txt").write_text(" Hello there \n", encoding="utf-8")
+            (root / "notes.md").write_text("ignored", encoding="utf-8")
+            items = load_items(root)
+            self.assertEqual(items, [BatchItem("a", audio=root / "a.wav"), BatchItem("b", text="Hello there")])
+
+            manifest = root / "manifest.jsonl"
+            manifest.write_text('{"id": "x", "audio": "a.wav"}\n\n{"text": "Hi"}\n', encoding="utf-8")
+            items = load_items(manifest)
+            self.assertEqual(items, [BatchItem("x", audio=root / "a.wav"), BatchItem("3", text="Hi")])
+
+    def test_runs_llm_requests_concurrently_and_resumes(self) -> None:
+        items = [BatchItem(f"t{i}", text=f"prompt {i}") for i in range(4)] + [BatchItem("a1", audio=Path("a1.wav"))]
+        with tempfile.TemporaryDirectory() as tmp, StubLLMServer(StubConfig(1000.0, 0.3, "Sure.")) as stub:
+            out = Path(tmp)
+            client = LLMClient(LLMConfig(stub.endpoint, "stub", pool_size=8))
+            runner = BatchRunner(client, out, transcriber=FakeTranscriber(), llm_concurrency=5)
+            started = time.perf_counter()
+            counts = runner.run(items)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(counts, {"skipped": 0, "ok": 5, "error": 0})
+            # Five 0.3s requests in parallel, not one after another.
+            self.assertLess(elapsed, 1.2)
+
+            records = [json.loads(line) for line in runner.results_path.read_text(encoding="utf-8").splitlines()]
+            by_id = {r["id"]: r for r in records}
+            self.assertEqual(by_id["a1"]["transcript"], "transcript of a1")
+            self.assertEqual(by_id["t0"]["reply"], "Sure.")
+            self.assertIn("llm", by_id["t0"]["timings"])
+
+            # A crash mid-write leaves a partial line; it is ignored and only new items run.
+            with runner.results_path.open("a", encoding="utf-8") as f:
+                f.write('{"id": "t9", "sta')
+            self.assertEqual(completed_ids(runner.results_path), {"t0", "t1", "t2", "t3", "a1"})
+            counts = runner.run(items + [BatchItem("t5", text="one more")])
+            self.assertEqual(counts, {"skipped": 5, "ok": 1, "error": 0})
+            self.assertEqual(stub.requests, 6)
+            self.assertIn("t5", completed_ids(runner.results_path))
+            client.close()
+
+    def test_failures_are_recorded_and_retried(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = BatchRunner(None, Path(tmp))
+            counts = runner.run([BatchItem("a", audio=Path("a.wav"))])
+            self.assertEqual(counts["error"], 1)
+            record = json.loads(runner.results_path.read_text(encoding="utf-8"))
+            self.assertEqual(record["status"], "error")
+            self.assertIn("transcriber", record["error"])
+            self.assertEqual(completed_ids(runner.results_path), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
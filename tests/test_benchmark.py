@@ -0,0 +1,28 @@
+import dataclasses
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.run import bench_settings, compare, run_conversation, run_memory_growth
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+from tests.fixtures import testable_settings
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_scripted_run_against_stub_server(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, StubLLMServer(StubConfig(500.0, 0.05, "Fine, thanks. And you?")) as stub:
+            workdir = Path(tmp)
+            base = dataclasses.replace(testable_settings, tts_enabled=False)
+            settings = bench_settings(base, stub.endpoint, workdir, tts_cache=False)
+            summary = run_conversation(settings, workdir, [], ["Hello", "How are you?"], speed=1.0)
+            memory = run_memory_growth(settings, workdir, [5, 10], with_recall=True, repeats=2)
+
+        self.assertEqual(stub.requests, 2)
+        self.assertEqual(summary["turns"], 2)
+        self.assertGreaterEqual(summary["stages"]["llm_first_token"]["p50"], 0.05)
+        self.assertEqual([row["turns"] for row in memory], [5, 10])
+        self.assertIn("llm", compare({"conversation": summary}, {"conversation": summary}))
+
+
+if __name__ == "__main__":
+    unittest.main()
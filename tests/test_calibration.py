@@ -0,0 +1,132 @@
+import importlib
+import json
+import os
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from typing import Dict
+from unittest import mock
+
+import numpy
+
+from src import config
+from src.calibration import (
+    Candidate,
+    Measurement,
+    candidate_grid,
+    default_thread_counts,
+    load_stt_profile,
+    measure_candidate,
+    reference_clip,
+    run_calibration,
+    write_profile,
+)
+from tests.fixtures import testable_settings
+
+# Seconds to transcribe the clip, per (model, compute type, threads).
+TIMINGS: Dict[Candidate, float] = {
+    Candidate("tiny.en", "int8", 1): 0.3,
+    Candidate("tiny.en", "int8", 2): 0.2,
+    Candidate("base.en", "int8", 1): 0.9,
+    Candidate("base.en", "int8", 2): 0.6,
+    Candidate("small.en", "int8", 1): 2.5,
+    Candidate("small.en", "int8", 2): 1.6,
+}
+
+
+def fake_measure(candidate: Candidate, samples: numpy.ndarray, language: str, repeats: int) -> Measurement:
+    seconds = TIMINGS[candidate]
+    return Measurement(candidate, seconds=seconds, real_time_factor=seconds / 5, peak_rss_mb=100.0)
+
+
+class CalibrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_largest_model_within_target_wins_in_its_fastest_setup(self) -> None:
+        candidates = candidate_grid(["tiny.en", "base.en", "small.en"], ["int8"], [1, 2])
+        self.assertEqual(len(candidates), 6)
+        seen = []
+        chosen, measurements = run_calibration(
+            candidates, numpy.zeros(16000, dtype=numpy.float32), 1.0, measure=fake_measure, on_result=seen.append
+        )
+        self.assertEqual(len(seen), 6)
+        assert chosen is not None
+        self.assertEqual(chosen.candidate, Candidate("base.en", "int8", 2))
+
+        chosen, _ = run_calibration(candidates, numpy.zeros(16000, dtype=numpy.float32), 0.1, measure=fake_measure)
+        self.assertIsNone(chosen)
+        self.assertEqual(default_thread_counts(6), [1, 2, 4, 6])
+        self.assertEqual(default_thread_counts(1), [1])
+
+    def test_profile_is_loaded_by_get_settings(self) -> None:
+        path = self.dir / "stt_profile.json"
+        best = fake_measure(Candidate("base.en", "int8", 2), numpy.zeros(1), "", 1)
+        write_profile(path, best, [best], clip_seconds=5.0, target_latency=1.0)
+        self.assertEqual(json.loads(path.read_text())["rtstt_cpu_threads"], 2)
+
+        unset = {"RTSTT_MODEL": "", "RTSTT_COMPUTE_TYPE": "", "RTSTT_CPU_THREADS": ""}
+        with mock.patch.dict(os.environ, {**unset, "STT_PROFILE_PATH": str(path)}):
+            importlib.reload(config)
+            settings = config.get_settings()
+        self.assertEqual((settings.rtstt_model, settings.rtstt_compute_type, settings.rtstt_cpu_threads), ("base.en", "int8", 2))
+
+        # Values set explicitly win over the profile.
+        with mock.patch.dict(os.environ, {**unset, "STT_PROFILE_PATH": str(path), "RTSTT_MODEL": "small.en", "RTSTT_CPU_THREADS": "1"}):
+            settings = config.get_settings()
+        self.assertEqual((settings.rtstt_model, settings.rtstt_compute_type, settings.rtstt_cpu_threads), ("small.en", "int8", 1))
+
+        # Unset, the path defaults to the per-user config directory rather than the working directory.
+        write_profile(self.dir / "sottovoce" / "stt_profile.json", best, [best], clip_seconds=5.0, target_latency=1.0)
+        with mock.patch.dict(os.environ, {**unset, "XDG_CONFIG_HOME": str(self.dir)}):
+            os.environ.pop("STT_PROFILE_PATH", None)
+            settings = config.get_settings()
+        self.assertEqual(settings.stt_profile_path, str(self.dir / "sottovoce" / "stt_profile.json"))
+        self.assertEqual((settings.rtstt_compute_type, settings.rtstt_cpu_threads), ("int8", 2))
+
+        # Copied from a machine with a different core count: ignored.
+        with mock.patch("src.calibration.os.cpu_count", return_value=(os.cpu_count() or 1) + 4):
+            self.assertIsNone(load_stt_profile(str(path)))
+        self.assertIsNone(load_stt_profile(str(self.dir / "missing.json")))
+
+    def test_profile_wins_with_the_shipped_env_template(self) -> None:
+        from dotenv import dotenv_values
+
+        best = fake_measure(Candidate("small.en", "int8", 2), numpy.zeros(1), "", 1)
+        write_profile(self.dir / ".config" / "sottovoce" / "stt_profile.json", best, [best], clip_seconds=5.0, target_latency=1.0)
+        template = {k: v or "" for k, v in dotenv_values(Path(__file__).resolve().parent.parent / ".env-default").items()}
+        with mock.patch.dict(os.environ, {**template, "HOME": str(self.dir)}):
+            os.environ.pop("XDG_CONFIG_HOME", None)
+            settings = config.get_settings()
+        self.assertEqual((settings.rtstt_model, settings.rtstt_compute_type, settings.rtstt_cpu_threads), ("small.en", "int8", 2))
+
+        # Without a profile the template falls back to the hand-picked values.
+        with mock.patch.dict(os.environ, {**template, "HOME": str(self.dir / "elsewhere")}):
+            os.environ.pop("XDG_CONFIG_HOME", None)
+            settings = config.get_settings()
+        self.assertEqual((settings.rtstt_model, settings.rtstt_compute_type, settings.rtstt_cpu_threads), ("base.en", "default", 0))
+
+    def test_wav_clip_is_downmixed_and_resampled(self) -> None:
+        path = self.dir / "clip.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(32000)
+            wav.writeframes(numpy.full(64000, 16384, dtype="<i2").tobytes())
+        samples = reference_clip(testable_settings, path)
+        self.assertEqual(len(samples), 16000)
+        self.assertAlmostEqual(float(samples.mean()), 0.5, places=3)
+
+    def test_failed_setup_is_reported_not_raised(self) -> None:
+        # A model name faster-whisper cannot load (or faster-whisper missing altogether).
+        measurement = measure_candidate(Candidate("no-such-model", "int8", 1), numpy.zeros(1600, dtype=numpy.float32))
+        self.assertTrue(measurement.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,8 +10,8 @@ class ConfigTests(unittest.TestCase):
         # Backup environment and clear relevant keys for each test.
         self._env_backup = os.environ.copy()
         baseline = {
-            "RTSTT_MODEL": "base.en",
-            "RTSTT_COMPUTE_TYPE": "default",
+            "RTSTT_MODEL": "",
+            "RTSTT_COMPUTE_TYPE": "",
             "RTSTT_LANGUAGE": "",
             "RTSTT_USE_MICROPHONE": "true",
             "LLM_ENDPOINT": "http://localhost:1234/v1/chat/completions",
@@ -29,6 +29,73 @@ class ConfigTests(unittest.TestCase):
             "CONTEXT_WINDOW_MESSAGES": "8",
             "SUMMARISE_PROMPT": "Summarise the convo.",
             "LLM_PROMPT_CONVERSATIONAL": "Keep replies concise...",
+            "LLM_STREAM": "",
+            "TTS_BUFFER_SECONDS": "2.0",
+            "LLM_CONNECT_TIMEOUT": "5",
+            "LLM_POOL_SIZE": "4",
+            "LLM_MAX_RETRIES": "2",
+            "LLM_RETRY_BACKOFF": "0.5",
+            "CONCURRENT_PIPELINE": "",
+            "BARGE_IN": "",
+            "CONTEXT_REPLY_TOKENS": "512",
+            "SUMMARY_BACKGROUND": "",
+            "SUMMARY_BATCH_MESSAGES": "4",
+            "LLM_STRUCTURED_MESSAGES": "",
+            "LLM_CACHE_PROMPT": "",
+            "RECALL_ENABLED": "",
+            "RECALL_TOP_K": "3",
+            "RECALL_MIN_SCORE": "0.3",
+            "RECALL_EMBEDDING_ENDPOINT": "",
+            "RECALL_EMBEDDING_MODEL": "",
+            "SESSION_LOG_FLUSH_SECONDS": "1.0",
+            "SESSION_LOG_MAX_BYTES": "10485760",
+            "TTS_ARCHIVE_FORMAT": "",
+            "TTS_CACHE_ENABLED": "true",
+            "TTS_CACHE_DIR": "",
+            "TTS_CACHE_MEMORY_MB": "32",
+            "TTS_CACHE_DISK_MB": "256",
+            "TTS_CACHE_MAX_CHARS": "200",
+            "METRICS_PROMETHEUS_PATH": "",
+            "METRICS_PORT": "0",
+            "TTS_NULL_SINK": "",
+            "BATCH_STT_WORKERS": "1",
+            "BATCH_STT_BATCH_SIZE": "8",
+            "BATCH_LLM_CONCURRENCY": "4",
+            "BATCH_TTS_WORKERS": "2",
+            "SERVER_HOST": "127.0.0.1",
+            "SERVER_PORT": "8765",
+            "SERVER_STT_SLOTS": "1",
+            "SERVER_LLM_SLOTS": "4",
+            "SERVER_TTS_SLOTS": "2",
+            "LLM_HEDGE_AFTER": "1.5",
+            "LLM_HEALTH_INTERVAL": "10.0",
+            "LLM_SUMMARY_MODEL": "",
+            "RTSTT_REALTIME_MODEL": "tiny.en",
+            "SPECULATIVE_LLM": "",
+            "SPECULATIVE_STABLE_SECONDS": "0.3",
+            "SPECULATIVE_TTS": "",
+            "TTS_WORKERS": "1",
+            "TTS_THREADS_PER_WORKER": "0",
+            "RTSTT_CPU_THREADS": "",
+            "STT_PROFILE_PATH": "",
+            "RTSTT_SILERO_SENSITIVITY": "0.4",
+            "RTSTT_WEBRTC_SENSITIVITY": "3",
+            "RTSTT_SILERO_DEACTIVITY": "",
+            "RTSTT_POST_SPEECH_SILENCE": "0.6",
+            "RTSTT_MIN_RECORDING_SECONDS": "0.5",
+            "RTSTT_MIN_GAP_SECONDS": "0.0",
+            "RTSTT_PRE_RECORDING_BUFFER": "1.0",
+            "RTSTT_EARLY_TRANSCRIPTION_ON_SILENCE": "0.0",
+            "RTSTT_REALTIME_PAUSE": "0.2",
+            "ADAPTIVE_ENDPOINTING": "",
+            "ENDPOINT_SHORT_SILENCE": "0.25",
+            "ENDPOINT_LONG_SILENCE": "1.0",
+            "SEARCH_INDEX_PATH": "memory/search.db",
+            "FILLER_ENABLED": "",
+            "FILLER_PHRASES": "Mm-hm.|Let me think.|Hmm, okay.|Right.",
+            "FILLER_DELAY": "0.7",
+            "FILLER_CROSSFADE_SECONDS": "0.12",
+            "SERVER_SESSION_IDLE_SECONDS": "1800",
         }
         for key, value in baseline.items():
             os.environ[key] = value
@@ -59,6 +126,73 @@ class ConfigTests(unittest.TestCase):
         self.assertEqual(settings.context_window_messages, 8)
         self.assertEqual(settings.summarise_prompt, "Summarise the convo.")
         self.assertEqual(settings.llm_prompt_conversational, "Keep replies concise...")
+        self.assertFalse(settings.llm_stream)
+        self.assertEqual(settings.tts_buffer_seconds, 2.0)
+        self.assertEqual(settings.llm_connect_timeout, 5.0)
+        self.assertEqual(settings.llm_pool_size, 4)
+        self.assertEqual(settings.llm_max_retries, 2)
+        self.assertEqual(settings.llm_retry_backoff, 0.5)
+        self.assertFalse(settings.concurrent_pipeline)
+        self.assertFalse(settings.barge_in)
+        self.assertEqual(settings.context_reply_tokens, 512)
+        self.assertFalse(settings.summary_background)
+        self.assertEqual(settings.summary_batch_messages, 4)
+        self.assertFalse(settings.llm_structured_messages)
+        self.assertFalse(settings.llm_cache_prompt)
+        self.assertFalse(settings.recall_enabled)
+        self.assertEqual(settings.recall_top_k, 3)
+        self.assertEqual(settings.recall_min_score, 0.3)
+        self.assertEqual(settings.recall_embedding_endpoint, "")
+        self.assertEqual(settings.recall_embedding_model, "")
+        self.assertEqual(settings.session_log_flush_seconds, 1.0)
+        self.assertEqual(settings.session_log_max_bytes, 10485760)
+        self.assertEqual(settings.tts_archive_format, "")
+        self.assertTrue(settings.tts_cache_enabled)
+        self.assertEqual(settings.tts_cache_dir, "")
+        self.assertEqual(settings.tts_cache_memory_mb, 32)
+        self.assertEqual(settings.tts_cache_disk_mb, 256)
+        self.assertEqual(settings.tts_cache_max_chars, 200)
+        self.assertEqual(settings.metrics_prometheus_path, "")
+        self.assertEqual(settings.metrics_port, 0)
+        self.assertFalse(settings.tts_null_sink)
+        self.assertEqual(settings.batch_stt_workers, 1)
+        self.assertEqual(settings.batch_stt_batch_size, 8)
+        self.assertEqual(settings.batch_llm_concurrency, 4)
+        self.assertEqual(settings.batch_tts_workers, 2)
+        self.assertEqual(settings.server_host, "127.0.0.1")
+        self.assertEqual(settings.server_port, 8765)
+        self.assertEqual(settings.server_stt_slots, 1)
+        self.assertEqual(settings.server_llm_slots, 4)
+        self.assertEqual(settings.server_tts_slots, 2)
+        self.assertEqual(settings.llm_hedge_after, 1.5)
+        self.assertEqual(settings.llm_health_interval, 10.0)
+        self.assertEqual(settings.llm_summary_model, "")
+        self.assertEqual(settings.rtstt_realtime_model, "tiny.en")
+        self.assertFalse(settings.speculative_llm)
+        self.assertEqual(settings.speculative_stable_seconds, 0.3)
+        self.assertFalse(settings.speculative_tts)
+        self.assertEqual(settings.tts_workers, 1)
+        self.assertEqual(settings.tts_threads_per_worker, 0)
+        self.assertEqual(settings.rtstt_cpu_threads, 0)
+        self.assertEqual(settings.stt_profile_path, "")
+        self.assertEqual(settings.rtstt_silero_sensitivity, 0.4)
+        self.assertEqual(settings.rtstt_webrtc_sensitivity, 3)
+        self.assertFalse(settings.rtstt_silero_deactivity)
+        self.assertEqual(settings.rtstt_post_speech_silence, 0.6)
+        self.assertEqual(settings.rtstt_min_recording_seconds, 0.5)
+        self.assertEqual(settings.rtstt_min_gap_seconds, 0.0)
+        self.assertEqual(settings.rtstt_pre_recording_buffer, 1.0)
+        self.assertEqual(settings.rtstt_early_transcription_on_silence, 0.0)
+        self.assertEqual(settings.rtstt_realtime_pause, 0.2)
+        self.assertFalse(settings.adaptive_endpointing)
+        self.assertEqual(settings.endpoint_short_silence, 0.25)
+        self.assertEqual(settings.endpoint_long_silence, 1.0)
+        self.assertEqual(settings.search_index_path, "memory/search.db")
+        self.assertFalse(settings.filler_enabled)
+        self.assertEqual(settings.filler_phrases, "Mm-hm.|Let me think.|Hmm, okay.|Right.")
+        self.assertEqual(settings.filler_delay, 0.7)
+        self.assertEqual(settings.filler_crossfade_seconds, 0.12)
+        self.assertEqual(settings.server_session_idle_seconds, 1800.0)
 
     def test_env_overrides(self) -> None:
         os.environ["RTSTT_MODEL"] = "small"
@@ -80,6 +214,73 @@ class ConfigTests(unittest.TestCase):
         os.environ["CONTEXT_WINDOW_MESSAGES"] = "4"
         os.environ["SUMMARISE_PROMPT"] = "Custom prompt."
         os.environ["LLM_PROMPT_CONVERSATIONAL"] = "Another prompt."
+        os.environ["LLM_STREAM"] = "true"
+        os.environ["TTS_BUFFER_SECONDS"] = "0.5"
+        os.environ["LLM_CONNECT_TIMEOUT"] = "1.5"
+        os.environ["LLM_POOL_SIZE"] = "8"
+        os.environ["LLM_MAX_RETRIES"] = "0"
+        os.environ["LLM_RETRY_BACKOFF"] = "1.0"
+        os.environ["CONCURRENT_PIPELINE"] = "true"
+        os.environ["BARGE_IN"] = "true"
+        os.environ["CONTEXT_REPLY_TOKENS"] = "256"
+        os.environ["SUMMARY_BACKGROUND"] = "true"
+        os.environ["SUMMARY_BATCH_MESSAGES"] = "2"
+        os.environ["LLM_STRUCTURED_MESSAGES"] = "true"
+        os.environ["LLM_CACHE_PROMPT"] = "true"
+        os.environ["RECALL_ENABLED"] = "true"
+        os.environ["RECALL_TOP_K"] = "5"
+        os.environ["RECALL_MIN_SCORE"] = "0.5"
+        os.environ["RECALL_EMBEDDING_ENDPOINT"] = "http://localhost:1234/v1/embeddings"
+        os.environ["RECALL_EMBEDDING_MODEL"] = "nomic-embed"
+        os.environ["SESSION_LOG_FLUSH_SECONDS"] = "0.25"
+        os.environ["SESSION_LOG_MAX_BYTES"] = "1024"
+        os.environ["TTS_ARCHIVE_FORMAT"] = "flac"
+        os.environ["TTS_CACHE_ENABLED"] = "false"
+        os.environ["TTS_CACHE_DIR"] = "/tmp/tts"
+        os.environ["TTS_CACHE_MEMORY_MB"] = "8"
+        os.environ["TTS_CACHE_DISK_MB"] = "64"
+        os.environ["TTS_CACHE_MAX_CHARS"] = "80"
+        os.environ["METRICS_PROMETHEUS_PATH"] = "session_logs/metrics.prom"
+        os.environ["METRICS_PORT"] = "9464"
+        os.environ["TTS_NULL_SINK"] = "true"
+        os.environ["BATCH_STT_WORKERS"] = "2"
+        os.environ["BATCH_STT_BATCH_SIZE"] = "16"
+        os.environ["BATCH_LLM_CONCURRENCY"] = "8"
+        os.environ["BATCH_TTS_WORKERS"] = "3"
+        os.environ["SERVER_HOST"] = "0.0.0.0"
+        os.environ["SERVER_PORT"] = "9000"
+        os.environ["SERVER_STT_SLOTS"] = "2"
+        os.environ["SERVER_LLM_SLOTS"] = "8"
+        os.environ["SERVER_TTS_SLOTS"] = "3"
+        os.environ["LLM_HEDGE_AFTER"] = "0.5"
+        os.environ["LLM_HEALTH_INTERVAL"] = "2.0"
+        os.environ["LLM_SUMMARY_MODEL"] = "small-model"
+        os.environ["RTSTT_REALTIME_MODEL"] = "base.en"
+        os.environ["SPECULATIVE_LLM"] = "true"
+        os.environ["SPECULATIVE_STABLE_SECONDS"] = "0.5"
+        os.environ["SPECULATIVE_TTS"] = "true"
+        os.environ["TTS_WORKERS"] = "3"
+        os.environ["TTS_THREADS_PER_WORKER"] = "2"
+        os.environ["RTSTT_CPU_THREADS"] = "2"
+        os.environ["STT_PROFILE_PATH"] = "calibrated.json"
+        os.environ["RTSTT_SILERO_SENSITIVITY"] = "0.6"
+        os.environ["RTSTT_WEBRTC_SENSITIVITY"] = "2"
+        os.environ["RTSTT_SILERO_DEACTIVITY"] = "true"
+        os.environ["RTSTT_POST_SPEECH_SILENCE"] = "0.4"
+        os.environ["RTSTT_MIN_RECORDING_SECONDS"] = "0.3"
+        os.environ["RTSTT_MIN_GAP_SECONDS"] = "0.2"
+        os.environ["RTSTT_PRE_RECORDING_BUFFER"] = "0.5"
+        os.environ["RTSTT_EARLY_TRANSCRIPTION_ON_SILENCE"] = "0.2"
+        os.environ["RTSTT_REALTIME_PAUSE"] = "0.1"
+        os.environ["ADAPTIVE_ENDPOINTING"] = "true"
+        os.environ["ENDPOINT_SHORT_SILENCE"] = "0.2"
+        os.environ["ENDPOINT_LONG_SILENCE"] = "1.4"
+        os.environ["SEARCH_INDEX_PATH"] = "idx/search.db"
+        os.environ["FILLER_ENABLED"] = "true"
+        os.environ["FILLER_PHRASES"] = "Okay.|Sure."
+        os.environ["FILLER_DELAY"] = "0.5"
+        os.environ["FILLER_CROSSFADE_SECONDS"] = "0.2"
+        os.environ["SERVER_SESSION_IDLE_SECONDS"] = "600"
 
         importlib.reload(config)
         settings = config.get_settings()
@@ -102,6 +303,73 @@ class ConfigTests(unittest.TestCase):
         self.assertEqual(settings.context_window_messages, 4)
         self.assertEqual(settings.summarise_prompt, "Custom prompt.")
         self.assertEqual(settings.llm_prompt_conversational, "Another prompt.")
+        self.assertTrue(settings.llm_stream)
+        self.assertEqual(settings.tts_buffer_seconds, 0.5)
+        self.assertEqual(settings.llm_connect_timeout, 1.5)
+        self.assertEqual(settings.llm_pool_size, 8)
+        self.assertEqual(settings.llm_max_retries, 0)
+        self.assertEqual(settings.llm_retry_backoff, 1.0)
+        self.assertTrue(settings.concurrent_pipeline)
+        self.assertTrue(settings.barge_in)
+        self.assertEqual(settings.context_reply_tokens, 256)
+        self.assertTrue(settings.summary_background)
+        self.assertEqual(settings.summary_batch_messages, 2)
+        self.assertTrue(settings.llm_structured_messages)
+        self.assertTrue(settings.llm_cache_prompt)
+        self.assertTrue(settings.recall_enabled)
+        self.assertEqual(settings.recall_top_k, 5)
+        self.assertEqual(settings.recall_min_score, 0.5)
+        self.assertEqual(settings.recall_embedding_endpoint, "http://localhost:1234/v1/embeddings")
+        self.assertEqual(settings.recall_embedding_model, "nomic-embed")
+        self.assertEqual(settings.session_log_flush_seconds, 0.25)
+        self.assertEqual(settings.session_log_max_bytes, 1024)
+        self.assertEqual(settings.tts_archive_format, "flac")
+        self.assertFalse(settings.tts_cache_enabled)
+        self.assertEqual(settings.tts_cache_dir, "/tmp/tts")
+        self.assertEqual(settings.tts_cache_memory_mb, 8)
+        self.assertEqual(settings.tts_cache_disk_mb, 64)
+        self.assertEqual(settings.tts_cache_max_chars, 80)
+        self.assertEqual(settings.metrics_prometheus_path, "session_logs/metrics.prom")
+        self.assertEqual(settings.metrics_port, 9464)
+        self.assertTrue(settings.tts_null_sink)
+        self.assertEqual(settings.batch_stt_workers, 2)
+        self.assertEqual(settings.batch_stt_batch_size, 16)
+        self.assertEqual(settings.batch_llm_concurrency, 8)
+        self.assertEqual(settings.batch_tts_workers, 3)
+        self.assertEqual(settings.server_host, "0.0.0.0")
+        self.assertEqual(settings.server_port, 9000)
+        self.assertEqual(settings.server_stt_slots, 2)
+        self.assertEqual(settings.server_llm_slots, 8)
+        self.assertEqual(settings.server_tts_slots, 3)
+        self.assertEqual(settings.llm_hedge_after, 0.5)
+        self.assertEqual(settings.llm_health_interval, 2.0)
+        self.assertEqual(settings.llm_summary_model, "small-model")
+        self.assertEqual(settings.rtstt_realtime_model, "base.en")
+        self.assertTrue(settings.speculative_llm)
+        self.assertEqual(settings.speculative_stable_seconds, 0.5)
+        self.assertTrue(settings.speculative_tts)
+        self.assertEqual(settings.tts_workers, 3)
+        self.assertEqual(settings.tts_threads_per_worker, 2)
+        self.assertEqual(settings.rtstt_cpu_threads, 2)
+        self.assertEqual(settings.stt_profile_path, "calibrated.json")
+        self.assertEqual(settings.rtstt_silero_sensitivity, 0.6)
+        self.assertEqual(settings.rtstt_webrtc_sensitivity, 2)
+        self.assertTrue(settings.rtstt_silero_deactivity)
+        self.assertEqual(settings.rtstt_post_speech_silence, 0.4)
+        self.assertEqual(settings.rtstt_min_recording_seconds, 0.3)
+        self.assertEqual(settings.rtstt_min_gap_seconds, 0.2)
+        self.assertEqual(settings.rtstt_pre_recording_buffer, 0.5)
+        self.assertEqual(settings.rtstt_early_transcription_on_silence, 0.2)
+        self.assertEqual(settings.rtstt_realtime_pause, 0.1)
+        self.assertTrue(settings.adaptive_endpointing)
+        self.assertEqual(settings.endpoint_short_silence, 0.2)
+        self.assertEqual(settings.endpoint_long_silence, 1.4)
+        self.assertEqual(settings.search_index_path, "idx/search.db")
+        self.assertTrue(settings.filler_enabled)
+        self.assertEqual(settings.filler_phrases, "Okay.|Sure.")
+        self.assertEqual(settings.filler_delay, 0.5)
+        self.assertEqual(settings.filler_crossfade_seconds, 0.2)
+        self.assertEqual(settings.server_session_idle_seconds, 600.0)
 
 
 if __name__ == "__main__":
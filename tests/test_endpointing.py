@@ -0,0 +1,48 @@
+import unittest
+from types import SimpleNamespace
+
+from src.endpointing import AdaptiveEndpointer, classify
+from src.metrics import TurnMetrics
+
+
+class EndpointingTests(unittest.TestCase):
+    def test_classify(self) -> None:
+        self.assertEqual(classify("What time is it?"), "complete")
+        self.assertEqual(classify("Where are you from?"), "complete")
+        self.assertEqual(classify("I'd like a coffee."), "complete")
+        self.assertEqual(classify("I'd like a coffee and."), "incomplete")
+        self.assertEqual(classify("I was thinking, um"), "incomplete")
+        self.assertEqual(classify("So yesterday,"), "incomplete")
+        self.assertEqual(classify("well..."), "incomplete")
+        self.assertEqual(classify("turn on the lights"), "unknown")
+        self.assertEqual(classify(""), "unknown")
+
+    def test_silence_timeout_follows_the_partial_transcript(self) -> None:
+        metrics = TurnMetrics()
+        recorder = SimpleNamespace(post_speech_silence_duration=0.0)
+        endpointer = AdaptiveEndpointer(0.6, 0.25, 1.0, metrics)
+        endpointer.attach(recorder)
+        self.assertEqual(recorder.post_speech_silence_duration, 0.6)
+
+        endpointer.on_recording_start()
+        endpointer.on_partial("Can you tell me")
+        self.assertEqual(recorder.post_speech_silence_duration, 0.6)
+        endpointer.on_partial("Can you tell me about the")
+        self.assertEqual(recorder.post_speech_silence_duration, 1.0)
+        endpointer.on_partial("Can you tell me about the weather?")
+        self.assertEqual(recorder.post_speech_silence_duration, 0.25)
+        self.assertEqual(endpointer.on_recording_stop(), 0.25)
+        # Reset for the next utterance.
+        self.assertEqual(recorder.post_speech_silence_duration, 0.6)
+
+        endpointer.on_partial("and the")
+        self.assertEqual(endpointer.on_recording_stop(), 1.0)
+        self.assertEqual(metrics.summary()["events"], {"endpoint_complete": 1, "endpoint_incomplete": 1})
+
+        metrics.speech.started()
+        metrics.speech.ended(0.25)
+        self.assertEqual(metrics.speech.take()[2], 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
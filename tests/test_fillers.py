@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator
+from unittest.mock import MagicMock, PropertyMock
+
+import numpy
+
+import main
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+from src.fillers import FillerPool, parse_phrases
+from src.llm_client import LLMClient, LLMConfig
+from src.metrics import TurnMetrics
+from src.tts_engine import TtsEngine
+from tests.fixtures import testable_settings
+
+
+class InstantVoice:
+    def synthesize(self, text: str, syn_config: object = None) -> Iterator[SimpleNamespace]:
+        yield SimpleNamespace(
+            audio_float_array=numpy.full(800, 0.1, dtype=numpy.float32), sample_rate=16000, sample_channels=1
+        )
+
+
+class FillerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = TtsEngine(replace(testable_settings, tts_cache_enabled=False))
+        self.engine.enabled = True
+        self.engine._voice = InstantVoice()  # type: ignore[assignment]
+        self.engine._player = MagicMock()
+        self.engine._player.idle = True
+        self.engine._player.play.return_value = True
+        self.metrics = TurnMetrics()
+        self.pool = FillerPool(self.engine, parse_phrases("Mm-hm. | Let me think."), delay=0.1, crossfade=0.12, metrics=self.metrics)
+        self.assertEqual(self.pool.prepare(), 2)
+        self.engine._player.play.reset_mock()
+
+    def tearDown(self) -> None:
+        self.engine.close()
+
+    def _reply(self, first_token_delay: float) -> str:
+        stub = StubLLMServer(StubConfig(1000.0, first_token_delay, "Here you go.")).start()
+        client = LLMClient(LLMConfig(stub.endpoint, "stub"))
+        try:
+            return main.stream_reply(client, "hi", self.engine, Path("turn.wav"), filler=self.pool.arm())
+        finally:
+            client.close()
+            stub.close()
+
+    def test_slow_first_token_plays_a_filler_and_the_reply_crossfades_into_it(self) -> None:
+        self.assertEqual(self._reply(first_token_delay=0.3), "Here you go.")
+        calls = self.engine._player.play.call_args_list  # type: ignore[attr-defined]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(calls[0].args), 4)  # the filler: played from memory, no crossfade
+        self.assertEqual(calls[1].args[4], 0.12)  # the reply blends into what is left of it
+        self.assertEqual(self.metrics.summary()["events"], {"filler_played": 1})
+
+    def test_fast_first_token_plays_no_filler(self) -> None:
+        self._reply(first_token_delay=0.0)
+        calls = self.engine._player.play.call_args_list  # type: ignore[attr-defined]
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args[4], 0.0)
+        time.sleep(0.15)  # past the delay: the cancelled filler stays silent
+        self.assertEqual(self.engine._player.play.call_count, 1)  # type: ignore[attr-defined]
+
+    def test_filler_is_skipped_while_other_audio_plays(self) -> None:
+        self.engine._player.idle = False
+        self.assertFalse(self.pool.play())
+        self.assertEqual(self.metrics.summary()["events"], {})
+
+    def test_reply_arriving_during_the_idle_check_crossfades_into_the_filler(self) -> None:
+        chunk = numpy.full(800, 0.1, dtype=numpy.float32)
+        speaker = threading.Thread(target=self.engine._play, args=(chunk, 16000, 1, 1.0))
+
+        def first_chunk_arrives() -> bool:
+            speaker.start()
+            speaker.join(timeout=0.2)
+            return True
+
+        type(self.engine._player).idle = PropertyMock(side_effect=first_chunk_arrives)
+        self.assertTrue(self.pool.play())
+        speaker.join()
+        calls = self.engine._player.play.call_args_list  # type: ignore[attr-defined]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(calls[0].args), 4)
+        self.assertEqual(calls[1].args[4], 0.12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+import requests
+
+from src.llm_client import EndpointPool, LLMClient, LLMConfig, parse_endpoints
+
+
+def _sse(*events: object) -> list[str]:
+    lines = [f"data: {json.dumps(e)}" for e in events]
+    lines.append("data: [DONE]")
+    return lines
+
+
+class LLMClientStreamTests(unittest.TestCase):
+    def test_complete_stream_yields_deltas_and_usage(self) -> None:
+        client = LLMClient(LLMConfig(endpoint="http://localhost:9999/v1/chat/completions", model="m"))
+        fake_response = MagicMock()
+        fake_response.raise_for_status.return_value = None
+        fake_response.iter_lines.return_value = [": keep-alive", ""] + _sse(
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "Hello"}}]},
+            {"choices": [{"delta": {"content": " there."}}]},
+            {"choices": [], "usage": {"total_tokens": 12}},
+        )
+
+        with patch.object(client.session, "post", return_value=fake_response) as mock_post:
+            deltas = list(client.complete_stream("hi"))
+
+        self.assertEqual(deltas, ["Hello", " there."])
+        self.assertEqual(client.last_usage, {"total_tokens": 12})
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertTrue(payload["stream"])
+        self.assertTrue(mock_post.call_args.kwargs["stream"])
+        fake_response.close.assert_called_once()
+
+    def test_session_pools_and_splits_timeouts(self) -> None:
+        config = LLMConfig(
+            endpoint="http://localhost:9999/v1/chat/completions",
+            model="m",
+            timeout=30.0,
+            connect_timeout=2.0,
+            pool_size=8,
+            max_retries=3,
+        )
+        client = LLMClient(config)
+        adapter = client.session.get_adapter(config.endpoint)
+        self.assertEqual(adapter._pool_maxsize, 8)  # type: ignore[attr-defined]
+        self.assertEqual(adapter.max_retries.total, 3)  # type: ignore[attr-defined]
+        self.assertIn(503, adapter.max_retries.status_forcelist)  # type: ignore[attr-defined]
+
+        fake_response = MagicMock()
+        fake_response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        with patch.object(client.session, "post", return_value=fake_response) as mock_post:
+            client.complete("hi")
+        self.assertEqual(mock_post.call_args.kwargs["timeout"], (2.0, 30.0))
+
+
+class LLMClientPayloadTests(unittest.TestCase):
+    def test_structured_messages_merge_leading_system_and_hint_cache(self) -> None:
+        client = LLMClient(LLMConfig(endpoint="http://localhost:9999/v1/chat/completions", model="m", cache_prompt=True))
+        client.system_prompt = "Be kind."
+        fake_response = MagicMock()
+        fake_response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        messages = [
+            {"role": "system", "content": "Summary of the earlier conversation: tea."},
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "hello"},
+            {"role": "user", "content": "again"},
+        ]
+
+        with patch.object(client.session, "post", return_value=fake_response) as mock_post:
+            client.complete(messages)
+
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertTrue(payload["cache_prompt"])
+        self.assertEqual(
+            payload["messages"][0],
+            {"role": "system", "content": "Be kind.\n\nSummary of the earlier conversation: tea."},
+        )
+        self.assertEqual(payload["messages"][1:], messages[1:])
+
+
+def _dead_endpoint() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+class RejectingServer:
+    """Answers every completion request with 400, as a server does for a prompt over its context length."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                server.requests += 1
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                body = b'{"error": "context length exceeded"}'
+                self.send_response(400)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.endpoint = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class EndpointPoolTests(unittest.TestCase):
+    def test_parses_weights_and_routes_to_least_loaded(self) -> None:
+        endpoints = parse_endpoints("http://a/v1/chat/completions*3, http://b/v1/chat/completions")
+        self.assertEqual(endpoints, [("http://a/v1/chat/completions", 3.0), ("http://b/v1/chat/completions", 1.0)])
+        pool = EndpointPool(endpoints)
+        a, b = pool.backends
+        # Three requests per unit of weight on a for every one on b.
+        picked = [pool.acquire() for _ in range(4)]
+        self.assertEqual(sum(backend is a for backend in picked), 3)
+        self.assertEqual(pool.in_flight, 4)
+        pool.mark_failed(a)
+        self.assertIs(pool.acquire(), b)
+        self.assertIs(pool.acquire(exclude=[b]), a)  # nothing healthy left: try it anyway
+        pool.mark_ok(a, latency=0.01)
+        self.assertTrue(a.healthy)
+
+    def test_fails_over_and_hedges_slow_backends(self) -> None:
+        slow = StubLLMServer(StubConfig(1000.0, 1.0, "Slow reply.")).start()
+        fast = StubLLMServer(StubConfig(1000.0, 0.05, "Fast reply.")).start()
+        try:
+            # A dead backend listed first: the request moves on and the backend is marked down.
+            client = LLMClient(LLMConfig(f"{_dead_endpoint()}*5,{fast.endpoint}", "m", max_retries=0, health_interval=0))
+            self.assertEqual(client.complete("hi"), "Fast reply.")
+            self.assertFalse(client.pool.backends[0].healthy)
+            self.assertEqual("".join(client.complete_stream("hi")), "Fast reply.")
+            client.close()
+
+            client = LLMClient(LLMConfig(f"{slow.endpoint},{fast.endpoint}", "m", hedge_after=0.2, health_interval=0))
+            started = time.perf_counter()
+            reply = "".join(client.complete_stream("hi"))
+            self.assertEqual(reply, "Fast reply.")
+            self.assertLess(time.perf_counter() - started, 0.8)
+            self.assertEqual((slow.requests, fast.requests), (1, 3))
+            self.assertIsNotNone(client.last_usage)
+            client.close()
+        finally:
+            slow.close()
+            fast.close()
+
+    def test_client_errors_are_raised_without_failing_over(self) -> None:
+        first, second = RejectingServer(), RejectingServer()
+        try:
+            client = LLMClient(LLMConfig(f"{first.endpoint},{second.endpoint}", "m", health_interval=0))
+            with self.assertRaises(requests.HTTPError):
+                client.complete("far too long")
+            self.assertEqual(first.requests + second.requests, 1)
+            with self.assertRaises(requests.HTTPError):
+                "".join(client.complete_stream("far too long"))
+            self.assertEqual(first.requests + second.requests, 2)
+            self.assertTrue(all(backend.healthy for backend in client.pool.backends))
+            client.close()
+        finally:
+            first.close()
+            second.close()
+
+    def test_summaries_use_their_own_model_on_the_same_pool(self) -> None:
+        client = LLMClient(LLMConfig("http://localhost:9999/v1/chat/completions", "big", summary_model="small"))
+        self.assertEqual(client.summaries.config.model, "small")
+        self.assertIs(client.summaries.pool, client.pool)
+        self.assertIs(LLMClient(LLMConfig("http://localhost:9999/v1/chat/completions", "big")).summaries.config.model, "big")
+
+    def test_views_get_their_own_summaries(self) -> None:
+        client = LLMClient(LLMConfig("http://localhost:9999/v1/chat/completions", "big", summary_model="small"))
+        client.summaries.last_usage = {"total_tokens": 3}
+        view = client.view()
+        self.assertIsNot(view.summaries, client.summaries)
+        self.assertIs(view.summaries.summaries, view.summaries)
+        self.assertEqual(view.summaries.config.model, "small")
+        self.assertIs(view.summaries.pool, client.pool)
+        self.assertIsNone(view.summaries.last_usage)
+        self.assertEqual(client.summaries.view().summaries.config.model, "small")
+
+        plain = LLMClient(LLMConfig("http://localhost:9999/v1/chat/completions", "big"))
+        overridden = plain.view("other")
+        self.assertIs(overridden.summaries, overridden)
+
+
+if __name__ == "__main__":
+    unittest.main()
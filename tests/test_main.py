@@ -1,3 +1,8 @@
+import contextlib
+import dataclasses
+import io
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 
@@ -47,6 +52,8 @@ class MainTests(unittest.TestCase):
         try:
             main.AudioToTextRecorder = DummyRecorder  # type: ignore[assignment]
             recorder = main.build_recorder(settings)
+            realtime = main.build_recorder(settings, on_partial=print)
+            updates = main.build_recorder(settings, on_partial_update=print)
         finally:
             main.AudioToTextRecorder = original_cls
 
@@ -55,6 +62,29 @@ class MainTests(unittest.TestCase):
         self.assertEqual(recorder.kwargs["compute_type"], "int8")  # type: ignore[attr-defined]
         self.assertEqual(recorder.kwargs["language"], "en")  # type: ignore[attr-defined]
         self.assertFalse(recorder.kwargs["use_microphone"])  # type: ignore[attr-defined]
+        self.assertNotIn("enable_realtime_transcription", recorder.kwargs)  # type: ignore[attr-defined]
+        self.assertTrue(realtime.kwargs["enable_realtime_transcription"])  # type: ignore[attr-defined]
+        self.assertIs(realtime.kwargs["on_realtime_transcription_stabilized"], print)  # type: ignore[attr-defined]
+        self.assertIsNone(realtime.kwargs["on_realtime_transcription_update"])  # type: ignore[attr-defined]
+        self.assertTrue(updates.kwargs["enable_realtime_transcription"])  # type: ignore[attr-defined]
+        self.assertIs(updates.kwargs["on_realtime_transcription_update"], print)  # type: ignore[attr-defined]
+        self.assertEqual(recorder.kwargs["post_speech_silence_duration"], 0.6)  # type: ignore[attr-defined]
+        self.assertEqual(recorder.kwargs["silero_sensitivity"], 0.4)  # type: ignore[attr-defined]
+        self.assertEqual(recorder.kwargs["webrtc_sensitivity"], 3)  # type: ignore[attr-defined]
+
+    def test_build_recorder_passes_the_thread_count_to_the_model(self) -> None:
+        settings = dataclasses.replace(testable_settings, rtstt_cpu_threads=2)
+        original_cls = main.AudioToTextRecorder
+        try:
+            main.AudioToTextRecorder = DummyRecorder  # type: ignore[assignment]
+            with patch.dict(main.os.environ, {"OMP_NUM_THREADS": "7"}):
+                recorder = main.build_recorder(settings)
+                self.assertEqual(main.os.environ["OMP_NUM_THREADS"], "7")
+            default = main.build_recorder(testable_settings)
+        finally:
+            main.AudioToTextRecorder = original_cls
+        self.assertEqual(recorder.kwargs["cpu_threads"], 2)  # type: ignore[attr-defined]
+        self.assertNotIn("cpu_threads", default.kwargs)  # type: ignore[attr-defined]
 
     def test_build_llm_client(self) -> None:
         settings = testable_settings
@@ -62,6 +92,8 @@ class MainTests(unittest.TestCase):
         self.assertEqual(client.config.endpoint, "http://localhost:9999/v1/chat/completions")
         self.assertEqual(client.config.model, "local-model")
         self.assertEqual(client.config.timeout, 7.5)
+        self.assertEqual(client.config.connect_timeout, 5.0)
+        self.assertEqual(client.config.pool_size, 4)
 
     def test_llm_client_system_prompt_injection(self) -> None:
         settings = testable_settings
@@ -72,7 +104,7 @@ class MainTests(unittest.TestCase):
         fake_response.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
         fake_response.raise_for_status.return_value = None
 
-        with patch("src.llm_client.requests.post", return_value=fake_response) as mock_post:
+        with patch.object(client.session, "post", return_value=fake_response) as mock_post:
             result = client.complete("user msg")
 
         self.assertEqual(result, "ok")
@@ -83,6 +115,24 @@ class MainTests(unittest.TestCase):
         self.assertEqual(payload["messages"][1]["role"], "user")
         self.assertEqual(payload["messages"][1]["content"], "user msg")
 
+    def test_components_built_before_a_startup_failure_are_released(self) -> None:
+        recorder = MagicMock()
+        memory_manager = MagicMock()
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = dataclasses.replace(
+                testable_settings, session_logs_dir=tmp, tts_enabled=False, search_index_path="", metrics_port=0
+            )
+            with patch.object(main, "get_settings", return_value=settings), patch.object(
+                main, "build_recorder", return_value=recorder
+            ), patch.object(main, "build_memory_manager", return_value=memory_manager), patch.object(
+                main, "ping_llm", side_effect=ConnectionError("LLM unreachable")
+            ), contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaisesRegex(ConnectionError, "LLM unreachable"):
+                    main.main([])
+        recorder.__exit__.assert_called_once_with(None, None, None)
+        memory_manager.store.close.assert_called_once()
+        self.assertFalse(any(t.name == "session-logger" for t in threading.enumerate()))
+
 
 if __name__ == "__main__":
     unittest.main()
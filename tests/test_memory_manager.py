@@ -0,0 +1,187 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.memory_manager import MemoryManager
+from src.summariser import BackgroundSummariser
+from src.token_counter import estimate_tokens
+from tests.fixtures import testable_settings
+
+
+class MemoryManagerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / "memory.db"
+        self.settings = replace(testable_settings, context_window_messages=4)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_prompt_uses_recent_window_and_survives_restart(self) -> None:
+        mm = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        for i in range(5):
+            mm.record_turn(f"q{i}", f"a{i}")
+        expected = "User: q3\nAssistant: a3\nUser: q4\nAssistant: a4\nUser: next"
+        self.assertEqual(mm.build_context_prompt("next"), expected)
+
+        # A fresh manager starts cold and only fetches the tail from SQLite.
+        reopened = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        self.assertEqual(reopened.build_context_prompt("next"), expected)
+        self.assertEqual(len(reopened.history.messages), 10)
+
+    def test_store_uses_wal_and_session_index(self) -> None:
+        MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        indexes = [r[1] for r in conn.execute("PRAGMA index_list('message_store')")]
+        self.assertIn("ix_message_store_session_id_id", indexes)
+        conn.close()
+
+    def test_clear_history_only_affects_session(self) -> None:
+        mm = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        other = MemoryManager(self.settings, session_id="s2", db_path=self.db_path)
+        mm.record_turn("q", "a")
+        other.record_turn("q2", "a2")
+        mm.clear_history()
+        self.assertEqual(mm.build_context_prompt("hi"), "User: hi")
+        self.assertEqual(len(other.history.messages), 2)
+
+    def test_prompt_stays_within_token_budget(self) -> None:
+        settings = replace(self.settings, context_window_tokens=80, context_reply_tokens=20, context_window_messages=8)
+        mm = MemoryManager(settings, session_id="s1", db_path=self.db_path)
+        mm.store.save_summary("s1", "the user likes tea.", 0)
+        mm.summary = "the user likes tea."
+        for i in range(2):
+            mm.record_turn(f"question number {i} " * 3, f"answer number {i} " * 3)
+        mm.set_system_prompt("You are helpful.")
+
+        prompt = mm.build_context_prompt("next")
+        # The summary and the newest turn fit; the older turn is dropped before overflowing.
+        self.assertTrue(prompt.startswith("Summary: the user likes tea."))
+        self.assertIn("answer number 1", prompt)
+        self.assertNotIn("question number 0", prompt)
+        self.assertLessEqual(
+            estimate_tokens(prompt) + mm.system_prompt_tokens,
+            settings.context_window_tokens - settings.context_reply_tokens,
+        )
+
+    def test_fold_older_summarises_only_turns_outside_window(self) -> None:
+        mm = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        for i in range(4):
+            mm.record_turn(f"q{i}", f"a{i}")
+        summariser = MagicMock()
+        summariser.complete.side_effect = ["first fold", "second fold"]
+
+        self.assertEqual(mm.fold_older(summariser, "Summarise.", batch_messages=2), 2)
+        self.assertIn("User: q0\nAssistant: a0", summariser.complete.call_args.args[0])
+        self.assertEqual(mm.fold_older(summariser, "Summarise.", batch_messages=2), 2)
+        self.assertIn("Summary so far:\nfirst fold", summariser.complete.call_args.args[0])
+        # Only the last window (4 messages) remains verbatim.
+        self.assertEqual(mm.fold_older(summariser, "Summarise.", batch_messages=2), 0)
+        self.assertEqual(
+            mm.build_context_prompt("next"),
+            "Summary: second fold\nUser: q2\nAssistant: a2\nUser: q3\nAssistant: a3\nUser: next",
+        )
+        reopened = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        self.assertEqual(reopened.summary, "second fold")
+
+    def test_clear_during_first_fold_drops_the_stale_summary(self) -> None:
+        mm = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        for i in range(4):
+            mm.record_turn(f"q{i}", f"a{i}")
+        started, release = threading.Event(), threading.Event()
+
+        def complete(prompt: str) -> str:
+            started.set()
+            release.wait(2)
+            return "summary of the cleared conversation"
+
+        summariser = MagicMock()
+        summariser.complete.side_effect = complete
+        folded: list = []
+        worker = threading.Thread(target=lambda: folded.append(mm.fold_older(summariser, "Summarise.", batch_messages=2)))
+        worker.start()
+        self.assertTrue(started.wait(2))
+        mm.clear_history()
+        release.set()
+        worker.join()
+
+        self.assertEqual(folded, [0])
+        self.assertEqual((mm.summary, mm.summary_through), ("", 0))
+        self.assertEqual(mm.store.load_summary("s1"), ("", 0))
+
+    def test_background_summariser_waits_for_idle_llm(self) -> None:
+        mm = MemoryManager(self.settings, session_id="s1", db_path=self.db_path)
+        for i in range(3):
+            mm.record_turn(f"q{i}", f"a{i}")
+        llm_client = MagicMock()
+        llm_client.in_flight = 1
+        llm_client.summaries = llm_client
+        llm_client.complete.return_value = "folded"
+        worker = BackgroundSummariser(mm, llm_client, "Summarise.", batch_messages=1, idle_poll=0.01)
+        try:
+            worker.schedule()
+            time.sleep(0.05)
+            llm_client.complete.assert_not_called()
+            llm_client.in_flight = 0
+            deadline = time.time() + 2
+            while mm.summary_through < 2 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        self.assertEqual(mm.summary, "folded")
+        self.assertEqual(llm_client.complete.call_count, 2)
+
+    def test_preview_leaves_the_structured_prefix_alone(self) -> None:
+        settings = replace(self.settings, llm_structured_messages=True)
+        mm = MemoryManager(settings, session_id="s1", db_path=self.db_path)
+        for i in range(3):
+            mm.record_turn(f"q{i}", f"a{i}")
+        before = (mm._prefix_summary, mm._prefix_after)
+        preview = mm.preview_context("next")
+        # The window overflowed, so a real build moves the prefix; the preview must not.
+        self.assertEqual((mm._prefix_summary, mm._prefix_after), before)
+        self.assertEqual(mm.build_context("next"), preview)
+        self.assertNotEqual((mm._prefix_summary, mm._prefix_after), before)
+
+    def test_structured_messages_keep_an_append_only_prefix(self) -> None:
+        settings = replace(self.settings, llm_structured_messages=True)
+        mm = MemoryManager(settings, session_id="s1", db_path=self.db_path)
+        mm.record_turn("q0", "a0")
+        first = mm.build_context("q1")
+        self.assertEqual(
+            first,
+            [
+                {"role": "user", "content": "q0"},
+                {"role": "assistant", "content": "a0"},
+                {"role": "user", "content": "q1"},
+            ],
+        )
+        mm.record_turn("q1", "a1")
+        second = mm.build_context("q2")
+        # Previously sent turns are replayed byte-for-byte; only the new turn is appended.
+        self.assertEqual(second[: len(first) - 1], first[:-1])
+        self.assertEqual(second[len(first) - 1 :], [
+            {"role": "user", "content": "q1"},
+            {"role": "assistant", "content": "a1"},
+            {"role": "user", "content": "q2"},
+        ])
+
+        # Overflowing the window drops the oldest half at once and snapshots the summary.
+        mm.summary, mm.summary_through = "earlier chat", mm.store.newest_id("s1", offset=3) or 0
+        mm.record_turn("q2", "a2")
+        third = mm.build_context("q3")
+        self.assertEqual(third[0], {"role": "system", "content": "Summary of the earlier conversation: earlier chat"})
+        self.assertEqual([m["content"] for m in third[1:]], ["q2", "a2", "q3"])
+        mm.record_turn("q3", "a3")
+        fourth = mm.build_context("q4")
+        self.assertEqual(fourth[: len(third) - 1], third[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from src.metrics import TurnMetrics, TurnTimer
+from src.tts_engine import SynthesisStats
+
+
+class TurnTimerTests(unittest.TestCase):
+    def test_stage_timings_are_derived_from_marks(self) -> None:
+        timer = TurnTimer(speech=(10.0, 12.0, 0.3))
+        timer.mark("transcribed", 12.5)
+        timer.mark("prompt", 12.6)
+        timer.mark("llm_first_token", 13.0)
+        timer.mark("llm_first_token", 13.5)  # later marks of the same milestone are ignored
+        timer.mark("llm_done", 14.0)
+        timer.add_synthesis(SynthesisStats(first_audio_at=13.2, audio_seconds=2.0, inference_seconds=0.5, cached=False))
+        timer.add_synthesis(SynthesisStats(first_audio_at=14.5, audio_seconds=1.0, inference_seconds=0.0, cached=True))
+        timer.mark("playback_end", 16.0)
+        timer.add("memory", 0.01)
+
+        timings = timer.timings()
+        self.assertAlmostEqual(timings["stt"], 0.5)
+        self.assertAlmostEqual(timings["stt_rtf"], 0.25)
+        self.assertAlmostEqual(timings["prompt"], 0.1)
+        self.assertAlmostEqual(timings["llm_first_token"], 0.4)
+        self.assertAlmostEqual(timings["llm"], 1.4)
+        self.assertAlmostEqual(timings["first_audio"], 1.2)
+        self.assertAlmostEqual(timings["total"], 4.0)
+        self.assertAlmostEqual(timings["tts_rtf"], 0.25)
+        self.assertAlmostEqual(timings["memory"], 0.01)
+        self.assertAlmostEqual(timings["endpoint"], 0.3)
+
+
+class TurnMetricsTests(unittest.TestCase):
+    def test_quantiles_prometheus_file_and_endpoint(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            prom = Path(tmp) / "metrics.prom"
+            metrics = TurnMetrics(str(prom), port=0)
+            for i in range(1, 101):
+                metrics.observe_turn({"llm": i / 100, "tts_rtf": 0.3})
+            quantiles = metrics.quantiles("llm")
+            self.assertAlmostEqual(quantiles[0.5], 0.51)
+            self.assertAlmostEqual(quantiles[0.99], 1.0)
+
+            text = prom.read_text(encoding="utf-8")
+            self.assertIn("sottovoce_turns_total 100", text)
+            self.assertIn('sottovoce_turn_stage_seconds_bucket{stage="llm",le="0.5"} 50', text)
+            self.assertIn('sottovoce_turn_stage_seconds_count{stage="llm"} 100', text)
+            self.assertIn('sottovoce_real_time_factor_bucket{stage="tts_rtf",le="0.3"} 100', text)
+            summary = metrics.summary()
+            self.assertEqual(summary["turns"], 100)
+            self.assertEqual(summary["stages"]["llm"]["count"], 100)
+            self.assertIn("tts_rtf", metrics.format_summary())
+
+    def test_http_endpoint_serves_exposition(self) -> None:
+        metrics = TurnMetrics()
+        metrics._serve(0)
+        try:
+            metrics.observe_turn({"total": 1.0})
+            with urllib.request.urlopen(f"http://127.0.0.1:{metrics.port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+            self.assertIn('sottovoce_turn_stage_seconds_count{stage="total"} 1', body)
+        finally:
+            metrics.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
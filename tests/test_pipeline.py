@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock
+
+from src.pipeline import ConversationPipeline
+from src.tts_engine import SynthesisStats
+from tests.fixtures import testable_settings
+
+
+class ScriptedRecorder:
+    """Returns one utterance, then waits for the reply to be logged before stopping the loop."""
+
+    def __init__(self, text: str, done: threading.Event) -> None:
+        self._text = text
+        self._done = done
+
+    def text(self) -> str:
+        if self._text:
+            text, self._text = self._text, ""
+            return text
+        self._done.wait(timeout=5)
+        raise KeyboardInterrupt
+
+
+def _build(stream: Iterator[str], done: threading.Event) -> tuple[ConversationPipeline, MagicMock, MagicMock, MagicMock]:
+    llm_client = MagicMock()
+    llm_client.complete_stream.return_value = stream
+    llm_client.last_usage = {"total_tokens": 10}
+    logger = MagicMock()
+    logger.path.return_value = Path("session_logs/session_test.log")
+    logger.append_turn.side_effect = lambda *_, **__: done.set()
+    tts_engine = MagicMock()
+    tts_engine.enabled = True
+    tts_engine.last_synthesis = SynthesisStats(
+        first_audio_at=time.perf_counter(), audio_seconds=1.0, inference_seconds=0.2, cached=False
+    )
+    memory_manager = MagicMock()
+    memory_manager.build_context.return_value = "User: hi"
+    pipeline = ConversationPipeline(
+        llm_client, logger, tts_engine, memory_manager, testable_settings
+    )
+    return pipeline, tts_engine, memory_manager, logger
+
+
+class ConversationPipelineTests(unittest.TestCase):
+    def test_reply_is_spoken_recorded_and_logged(self) -> None:
+        done = threading.Event()
+        stream = (d for d in ["Hello there, friend. ", "How are you today?"])
+        pipeline, tts_engine, memory_manager, logger = _build(stream, done)
+
+        with self.assertRaises(KeyboardInterrupt):
+            pipeline.run(ScriptedRecorder("hi", done))
+
+        spoken = [c.args[0] for c in tts_engine.synthesize.call_args_list]
+        self.assertEqual(spoken, ["Hello there, friend.", "How are you today?"])
+        full = "Hello there, friend. How are you today?"
+        memory_manager.record_turn.assert_called_once_with("hi", full)
+        logger.append_turn.assert_called_once()
+        self.assertEqual(logger.append_turn.call_args.args, ("hi", full))
+        self.assertEqual(logger.append_turn.call_args.kwargs["usage"], {"total_tokens": 10})
+        timings = logger.append_turn.call_args.kwargs["timings"]
+        self.assertIn("llm", timings)
+        self.assertIn("llm_first_token", timings)
+        self.assertAlmostEqual(timings["tts_rtf"], 0.2)
+
+    def test_barge_in_cancels_generation_and_playback(self) -> None:
+        done = threading.Event()
+        holder: dict[str, ConversationPipeline] = {}
+
+        def stream() -> Iterator[str]:
+            yield "Partial answer. "
+            holder["pipeline"].barge_in()
+            yield "Never spoken."
+
+        pipeline, tts_engine, memory_manager, _ = _build(stream(), done)
+        holder["pipeline"] = pipeline
+
+        with self.assertRaises(KeyboardInterrupt):
+            pipeline.run(ScriptedRecorder("hi", done))
+
+        tts_engine.stop.assert_called()
+        memory_manager.record_turn.assert_called_once_with("hi", "Partial answer. ")
+
+    def test_sentences_skipped_after_barge_in_drop_their_prefetch(self) -> None:
+        done, playing, interrupted = threading.Event(), threading.Event(), threading.Event()
+        holder: dict[str, ConversationPipeline] = {}
+
+        def stream() -> Iterator[str]:
+            yield "Hello there, friend. "
+            yield "How are you today? I hope you are well. "
+            playing.wait(2)
+            holder["pipeline"].barge_in()
+            interrupted.set()
+            yield "Never spoken."
+
+        pipeline, tts_engine, _, _ = _build(stream(), done)
+        holder["pipeline"] = pipeline
+        # Hold the first sentence in playback until the barge-in so the second is skipped, not spoken.
+        def synthesize(*_: object) -> None:
+            playing.set()
+            interrupted.wait(2)
+
+        tts_engine.synthesize.side_effect = synthesize
+
+        with self.assertRaises(KeyboardInterrupt):
+            pipeline.run(ScriptedRecorder("hi", done))
+
+        prefetched = [c.args[0] for c in tts_engine.prefetch.call_args_list]
+        spoken = [c.args[0] for c in tts_engine.synthesize.call_args_list]
+        discarded = [c.args[0] for c in tts_engine.discard_prefetched.call_args_list]
+        second = "How are you today? I hope you are well."
+        self.assertEqual((prefetched, spoken, discarded), (["Hello there, friend.", second], ["Hello there, friend."], [second]))
+
+
+if __name__ == "__main__":
+    unittest.main()
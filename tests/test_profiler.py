@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import main
+from src import profiler as profiler_module
+from src.metrics import TurnMetrics
+from src.profiler import SamplingProfiler, set_stage
+
+
+def _spin(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def _busy_llm(done: threading.Event) -> None:
+    set_stage("llm")
+    while not done.is_set():
+        _spin(0.01)
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def test_samples_are_tagged_with_the_stage_and_folded(self) -> None:
+        profiler = SamplingProfiler(interval=0.002)
+        set_stage("prompt")  # before start: ignored
+        self.assertEqual(profiler_module._stages, {})
+        profiler.start()
+        done = threading.Event()
+        worker = threading.Thread(target=_busy_llm, args=(done,), name="pipeline-respond")
+        worker.start()
+        try:
+            set_stage("memory")
+            _spin(0.3)
+        finally:
+            done.set()
+            worker.join()
+            profiler.stop()
+        self.assertFalse(profiler.running)
+        self.assertEqual(profiler_module._stages, {})
+
+        stages = {stage for stage, _ in profiler.samples}
+        self.assertLessEqual({"llm", "memory"}, stages)
+        folded = profiler.collapsed()
+        self.assertTrue(any(line.startswith("llm;") and "test_profiler.py:_busy_llm;test_profiler.py:_spin " in line for line in folded))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in folded))
+        report = profiler.report()
+        self.assertRegex(report, r"== memory: \d+ samples")
+        self.assertIn("test_profiler.py:_spin", report)
+
+    def test_turns_record_allocation_growth(self) -> None:
+        profiler = SamplingProfiler(interval=0.01, trace_allocations=True)
+        profiler.start()
+        try:
+            kept = [bytearray(1024) for _ in range(2000)]
+            first = profiler.turn_finished()
+            second = profiler.turn_finished()
+        finally:
+            profiler.stop()
+        self.assertEqual((first["turn"], second["turn"]), (1, 2))
+        self.assertGreater(first["peak_mb"], 1.5)
+        self.assertTrue(any("test_profiler.py" in g["where"] and g["kb"] > 1000 for g in first["growth"]))
+        self.assertFalse(any(g["kb"] > 1000 for g in second["growth"]))
+        del kept
+
+    def test_main_writes_the_profile_after_the_requested_turns(self) -> None:
+        metrics = TurnMetrics()
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "session.profile"
+            finish = main.start_profiler(metrics, 2, 0.002, out, trace_allocations=True)
+            for _ in range(2):
+                _spin(0.05)
+                metrics.observe_turn({"total": 0.05})
+            self.assertTrue((out / "stacks.collapsed").read_text(encoding="utf-8").strip())
+            self.assertIn("== turns ==", (out / "report.txt").read_text(encoding="utf-8"))
+            turns = [json.loads(line) for line in (out / "memory.jsonl").read_text(encoding="utf-8").splitlines()]
+            self.assertEqual([t["turn"] for t in turns], [1, 2])
+            # Later turns and the exit path leave the written profile alone.
+            metrics.observe_turn({"total": 0.05})
+            finish()
+            self.assertEqual(len((out / "memory.jsonl").read_text(encoding="utf-8").splitlines()), 2)
+        metrics.close()
+
+    def test_allocations_are_only_traced_on_request(self) -> None:
+        metrics = TurnMetrics()
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "session.profile"
+            finish = main.start_profiler(metrics, 1, 0.002, out)
+            self.assertFalse(tracemalloc.is_tracing())
+            metrics.observe_turn({"total": 0.05})
+            finish()
+            self.assertIn("== turns ==", (out / "report.txt").read_text(encoding="utf-8"))
+            self.assertFalse((out / "memory.jsonl").exists())
+        metrics.close()
+
+    def test_profile_flags_are_rejected_outside_the_conversation_loop(self) -> None:
+        self.assertTrue(main.parse_args(["--profile", "2", "--profile-allocations"]).profile_allocations)
+        for argv in (
+            ["--profile", "2", "batch", "inputs"],
+            ["--profile-allocations", "serve"],
+            ["--profile", "1", "search", "coffee"],
+            ["--profile-out", "/tmp/p", "calibrate"],
+            ["--profile-interval", "0.01"],
+            ["--profile", "0"],
+        ):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                main.parse_args(argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
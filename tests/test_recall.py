@@ -0,0 +1,95 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy
+
+from src.history_store import HistoryStore
+from src.recall import HashingEmbedder, RecallIndex, VectorIndex
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+class VectorIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_appends_persist_and_reload(self) -> None:
+        index = VectorIndex(self.dir, "test")
+        vectors = numpy.eye(3, dtype=numpy.float32)
+        index.append([10, 11], vectors[:2])
+        index.append([12], vectors[2:])
+
+        reloaded = VectorIndex(self.dir, "test")
+        self.assertEqual(reloaded.size, 3)
+        self.assertEqual(reloaded.max_id, 12)
+        self.assertEqual(reloaded.search(numpy.array([0, 1, 0], dtype=numpy.float32), 1), [(11, 1.0)])
+
+        # A different embedder invalidates the stored vectors.
+        self.assertEqual(VectorIndex(self.dir, "other").size, 0)
+
+    def test_half_written_append_is_cut_off_on_load(self) -> None:
+        vectors = numpy.eye(4, dtype=numpy.float32)
+        VectorIndex(self.dir, "test").append([10, 11], vectors[:2])
+        # Crash after the vector of id 12 was written but before its id (plus half of another vector).
+        with (self.dir / "recall.f32").open("ab") as f:
+            vectors[2].tofile(f)
+            vectors[3][:2].tofile(f)
+
+        index = VectorIndex(self.dir, "test")
+        self.assertEqual(index.size, 2)
+        index.append([13], vectors[3:])
+        reloaded = VectorIndex(self.dir, "test")
+        self.assertEqual(reloaded.size, 3)
+        self.assertEqual(reloaded.search(numpy.array([0, 0, 0, 1], dtype=numpy.float32), 1), [(13, 1.0)])
+        self.assertEqual(reloaded.search(numpy.array([0, 1, 0, 0], dtype=numpy.float32), 1), [(11, 1.0)])
+
+    def test_search_ranks_and_masks_excluded_ids(self) -> None:
+        rng = numpy.random.default_rng(0)
+        vectors = rng.standard_normal((2_000, 64)).astype(numpy.float32)
+        vectors /= numpy.linalg.norm(vectors, axis=1, keepdims=True)
+        index = VectorIndex(self.dir, "test")
+        index.append(list(range(1, 2_001)), vectors)
+        hits = index.search(vectors[1234], 3)
+        self.assertEqual(hits[0][0], 1235)
+        self.assertEqual([s for _, s in hits], sorted((s for _, s in hits), reverse=True))
+        masked = index.search(vectors[1234], 3, exclude=[1235])
+        self.assertNotIn(1235, [i for i, _ in masked])
+        self.assertEqual(len(masked), 3)
+        # Masking everything leaves nothing to rank.
+        self.assertEqual(index.search(vectors[0], 5, exclude=list(range(1, 2_001))), [])
+
+
+class RecallIndexTests(unittest.TestCase):
+    def test_sync_and_search_across_sessions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "memory.db")
+            store.append("old", [HumanMessage(content="My dog is called Biscuit"), AIMessage(content="Lovely name!")])
+            store.append("old", [HumanMessage(content="I work as a nurse"), AIMessage(content="That sounds demanding.")])
+            store.append("now", [HumanMessage(content="Tell me about my dog Biscuit"), AIMessage(content="Sure.")])
+            recall = RecallIndex(store, HashingEmbedder(), Path(tmp), min_score=0.1)
+
+            self.assertEqual(recall.sync(batch_size=1), 3)
+            self.assertEqual(recall.sync(), 0)
+            results = recall.search("what is my dog called?", k=1, exclude_session="now")
+            self.assertEqual(results, ["User: My dog is called Biscuit\nAssistant: Lovely name!"])
+            store.close()
+
+    def test_current_session_near_duplicates_do_not_crowd_out_recall(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "memory.db")
+            store.append("old", [HumanMessage(content="My dog is called Biscuit"), AIMessage(content="Lovely name!")])
+            for _ in range(20):
+                store.append("now", [HumanMessage(content="What is my dog called?"), AIMessage(content="Your dog is called...")])
+            recall = RecallIndex(store, HashingEmbedder(), Path(tmp), min_score=0.1)
+            recall.sync()
+            results = recall.search("what is my dog called?", k=1, exclude_session="now")
+            self.assertEqual(results, ["User: My dog is called Biscuit\nAssistant: Lovely name!"])
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import contextlib
+import gzip
+import io
+import json
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+
+import main
+
+from src.history_store import HistoryStore
+from src.memory_manager import MemoryManager
+from src.search_index import SearchIndex, match_query
+from src.session_logger import SessionLogger
+from tests.fixtures import testable_settings
+
+
+def _record(session: str, ts: str, user: str, assistant: str) -> str:
+    return json.dumps({"ts": ts, "session": session, "user": user, "assistant": assistant, "timings": {}, "usage": {}}) + "\n"
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+        self.index = SearchIndex(self.dir / "search.db")
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self._tmp.cleanup()
+
+    def test_turns_are_indexed_as_they_are_logged_and_recorded(self) -> None:
+        logger = SessionLogger(directory=str(self.dir / "logs"), filename="session_a.jsonl", search_index=self.index)
+        memory = MemoryManager(testable_settings, session_id="session_a", db_path=self.dir / "memory.db")
+        memory.search_index = self.index
+        message_id = memory.record_turn("Where should we go hiking?", "The ridge trail is lovely in autumn.")
+        logger.append_turn("Where should we go hiking?", "The ridge trail is lovely in autumn.", message_id=message_id)
+        logger.append_turn("Any good bakeries?", "Try the one by the harbour.")
+        logger.flush()
+
+        # The same turn from the log and the memory DB is one row.
+        self.assertEqual(self.index.size, 2)
+        hits = self.index.search("hiking trails")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0].session, "session_a")
+        self.assertIn("[hiking]", hits[0].user)
+        self.assertIn("[trail]", hits[0].assistant)
+        self.assertIsNotNone(hits[0].ts)
+        self.assertRegex(hits[0].timestamp, r"\.\d{3}\+00:00$")
+        logger.close()
+        memory.store.close()
+
+    def test_bulk_sync_is_incremental_over_logs_archives_and_memory(self) -> None:
+        logs = self.dir / "logs"
+        logs.mkdir()
+        live = logs / "session_b.jsonl"
+        live.write_text(
+            _record("session_b", "2024-03-01T10:00:00.250+00:00", "Remind me about the dentist", "Tuesday at nine.")
+            + '{"ts": "2024-03-01T10:01',  # still being written
+            encoding="utf-8",
+        )
+        with gzip.open(logs / "session_a.1.jsonl.gz", "wt", encoding="utf-8") as f:
+            f.write(_record("session_a", "2023-01-05T08:00:00.000+00:00", "What is a good sourdough hydration?", "Around 75 percent."))
+        store = HistoryStore(self.dir / "memory.db")
+        memory = MemoryManager(testable_settings, session_id="session_c", store=store)
+        memory.record_turn("How do I fix a bike puncture?", "Patch the inner tube.")
+
+        self.assertEqual(self.index.sync(logs, store), 3)
+        self.assertEqual(self.index.sync(logs, store), 0)
+        with live.open("a", encoding="utf-8") as f:
+            f.write(':00.000+00:00", "session": "session_b", "user": "And the dentist address?", "assistant": "High street."}\n')
+        self.assertEqual(self.index.sync(logs, store), 1)
+
+        hits = self.index.search("dentist")
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(sorted(h.ts for h in hits if h.ts is not None), [1709287200250, 1709287260000])
+        self.assertEqual([h.session for h in self.index.search("dentist", since=1709287230000)], ["session_b"])
+        self.assertEqual(self.index.search("sourdough", session="session_b"), [])
+        bike = self.index.search("punctur*")
+        self.assertEqual((bike[0].session, bike[0].source, bike[0].timestamp), ("session_c", "memory", "-"))
+
+        self.index.clear()
+        self.assertEqual(self.index.size, 0)
+        self.assertEqual(self.index.sync(logs, store), 4)
+        store.close()
+
+    def test_repeated_turns_stay_separate_and_rotated_logs_are_reread(self) -> None:
+        store = HistoryStore(self.dir / "memory.db")
+        memory = MemoryManager(testable_settings, session_id="session_a", store=store)
+        memory.record_turn("What time is it?", "Ten past nine.")
+        memory.record_turn("What time is it?", "Ten past nine.")
+        self.assertEqual(self.index.sync(store=store), 2)
+
+        logs = self.dir / "logs"
+        logs.mkdir()
+        live = logs / "session_b.jsonl"
+        live.write_text(
+            _record("session_b", "2024-03-01T10:00:00.000+00:00", "Any plans?", "A walk by the river.")
+            + _record("session_b", "2024-03-01T10:01:00.000+00:00", "Any plans?", "A walk by the river."),
+            encoding="utf-8",
+        )
+        self.assertEqual(self.index.sync(logs), 2)
+        # Rotated: the old file is archived away and a new one, already longer than the old offset, takes its name.
+        live.rename(logs / "archived.txt")
+        live.write_text(
+            "".join(_record("session_b", f"2024-03-01T11:0{i}:00.000+00:00", f"Question {i} about the weather?", "Sunny.") for i in range(3)),
+            encoding="utf-8",
+        )
+        self.assertEqual(self.index.sync(logs), 3)
+        self.assertEqual(len(self.index.search("weather")), 3)
+        store.close()
+
+    def test_legacy_text_logs_are_indexed(self) -> None:
+        logs = self.dir / "logs"
+        logs.mkdir()
+        (logs / "session_20240102T030405Z.log").write_text(
+            "USER: Which knot for a tarp?\nASSISTANT: A taut-line hitch.\nIt stays adjustable.\n---\n"
+            "USER: And for the ridgeline?\nASSISTANT: A bowline at one end.\n---\n",
+            encoding="utf-8",
+        )
+        self.assertEqual(self.index.sync(logs), 2)
+        self.assertEqual(self.index.sync(logs), 0)
+        hits = self.index.search("adjustable")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual((hits[0].session, hits[0].source, hits[0].timestamp), ("session_20240102T030405Z", "log", "2024-01-02T03:04:05.000+00:00"))
+        self.assertIn("taut-line hitch.\nIt stays [adjustable]", hits[0].assistant)
+
+    def test_search_cli_reports_bad_input_as_usage_errors(self) -> None:
+        settings = replace(testable_settings, search_index_path=str(self.dir / "search.db"))
+        self.index.add_turn(1, "s", "coffee", "Coffee.")
+        for argv in (["search", "coffee", "--since", "last tuesday"], ["search", '"coffee', "--raw", "--no-sync"]):
+            with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()) as err:
+                main.run_search(settings, main.parse_args(argv))
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn("error:", err.getvalue())
+        self.assertEqual(main.parse_args(["search", "x", "--since", "2024-03-01T10:00:00+01:00"]).since, 1709283600000)
+
+    def test_index_from_another_schema_version_is_rebuilt(self) -> None:
+        self.index.add_turn(1, "s", "coffee", "Coffee.")
+        with self.index._conn:
+            self.index._conn.execute("UPDATE meta SET value = 1 WHERE key = 'schema'")
+        self.index.close()
+        self.index = SearchIndex(self.dir / "search.db")
+        self.assertEqual(self.index.size, 0)
+
+    def test_ranking_and_query_syntax(self) -> None:
+        self.index.add_turn(1, "s", "coffee", "Coffee, coffee and more coffee.")
+        self.index.add_turn(3, "s", "tea or coffee?", "Tea, please.")
+        hits = self.index.search("coffee")
+        self.assertEqual(len(hits), 2)
+        self.assertGreater(hits[0].score, hits[1].score)
+        self.assertIn("more", hits[0].assistant)
+        # Punctuation can't break the FTS5 expression.
+        self.assertEqual(match_query('tea (or) "more coffee" caf*'), '"tea" "or" "more coffee" "caf"*')
+        self.assertEqual(len(self.index.search('"more coffee" AND-NOT:')), 0)
+        self.assertEqual(len(self.index.search("tea OR more", raw=True)), 2)
+        self.assertEqual(self.index.search("!!!"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+
+from src.sentence_segmenter import SentenceSegmenter
+
+
+class SentenceSegmenterTests(unittest.TestCase):
+    def test_emits_sentences_as_they_close(self) -> None:
+        seg = SentenceSegmenter(min_chars=5)
+        self.assertEqual(seg.feed("Hello the"), [])
+        self.assertEqual(seg.feed("re. How are"), ["Hello there."])
+        self.assertEqual(seg.feed(" you today? I'm"), ["How are you today?"])
+        self.assertEqual(seg.flush(), "I'm")
+        self.assertIsNone(seg.flush())
+
+    def test_short_fragments_merge_into_next_sentence(self) -> None:
+        seg = SentenceSegmenter(min_chars=10)
+        self.assertEqual(seg.feed("Hi. That is great! "), ["Hi. That is great!"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import base64
+import http.client
+import json
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy
+
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+from src.history_store import HistoryStore
+from src.llm_client import LLMClient, LLMConfig
+from src.server import ConversationServer
+from src.tts_cache import CachedAudio
+from tests.fixtures import testable_settings
+
+
+class FakeTranscriber:
+    def __init__(self) -> None:
+        self.seen: List[int] = []
+
+    def transcribe(self, samples: numpy.ndarray) -> str:
+        self.seen.append(len(samples))
+        return "hello from audio"
+
+
+class FakeTts:
+    enabled = True
+
+    def iter_pcm(self, text: str) -> Iterator[CachedAudio]:
+        yield CachedAudio(numpy.full(4, 100, dtype=numpy.int16), 22050, 1)
+
+
+class ConversationServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.stub = StubLLMServer(StubConfig(1000.0, 0.3, "Hi there. How are you today?"))
+        self.stub.start()
+        settings = replace(testable_settings, server_llm_slots=4)
+        self.llm_client = LLMClient(LLMConfig(self.stub.endpoint, "stub", pool_size=4))
+        self.store = HistoryStore(Path(self._tmp.name) / "memory.db")
+        self.transcriber = FakeTranscriber()
+        self.server = ConversationServer(
+            settings, self.llm_client, self.store, transcriber=self.transcriber, tts_engine=FakeTts()  # type: ignore[arg-type]
+        )
+        self.server.start("127.0.0.1", 0)
+
+    def tearDown(self) -> None:
+        self.server.close()
+        self.llm_client.close()
+        self.store.close()
+        self.stub.close()
+        self._tmp.cleanup()
+
+    def _request(self, method: str, path: str, body: Any = None, headers: Dict[str, str] = {}) -> http.client.HTTPResponse:
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=10)
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _open(self, session_id: str = "") -> str:
+        response = self._request("POST", "/sessions", json.dumps({"session_id": session_id} if session_id else {}))
+        self.assertEqual(response.status, 201)
+        return json.loads(response.read())["session_id"]
+
+    def _turn(self, session_id: str, body: Any, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        response = self._request("POST", f"/sessions/{session_id}/turn", body, headers)
+        self.assertEqual(response.status, 200)
+        return [json.loads(line) for line in response.read().splitlines()]
+
+    def test_sessions_share_models_and_run_concurrently(self) -> None:
+        first, second = self._open(), self._open()
+        self.assertNotEqual(first, second)
+        results: Dict[str, List[Dict[str, Any]]] = {}
+
+        def talk(session_id: str) -> None:
+            results[session_id] = self._turn(session_id, json.dumps({"text": "Hello"}), {"Content-Type": "application/json"})
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=talk, args=(s,)) for s in (first, second)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Both 0.3s LLM requests are in flight at once.
+        self.assertLess(time.perf_counter() - started, 0.55)
+
+        events = results[first]
+        self.assertEqual(events[-1]["type"], "done")
+        self.assertEqual(events[-1]["reply"], "Hi there. How are you today?")
+        self.assertIn("llm", events[-1]["timings"])
+        audio = [e for e in events if e["type"] == "audio"]
+        self.assertEqual([e["text"] for e in audio], ["Hi there. How are you today?"])
+        self.assertEqual(numpy.frombuffer(base64.b64decode(audio[0]["pcm"]), dtype=numpy.int16).tolist(), [100] * 4)
+        # Each session keeps its own history in the one shared store.
+        self.assertEqual(len(self.store.all(first)), 2)
+        self.assertEqual(len(self.store.all(second)), 2)
+
+    def test_chunked_pcm_upload_is_transcribed_and_session_resumes(self) -> None:
+        session_id = self._open("client-a")
+        pcm = numpy.zeros(1600, dtype="<i2").tobytes()
+
+        def chunks() -> Iterator[bytes]:
+            yield pcm[:1000]
+            yield pcm[1000:]
+
+        # An iterable body without Content-Length is sent chunked, as a client streaming capture would.
+
+        events = self._turn(session_id, chunks(), {"Content-Type": "application/octet-stream"})
+        self.assertEqual(events[0], {"type": "transcript", "text": "hello from audio"})
+        self.assertEqual(self.transcriber.seen, [1600])
+
+        delete = self._request("DELETE", f"/sessions/{session_id}")
+        self.assertEqual(delete.status, 204)
+        self.assertEqual(self._request("POST", f"/sessions/{session_id}/turn", b"").status, 404)
+        # Reopening the id picks its history back up from the store.
+        self._open("client-a")
+        session = self.server.session("client-a")
+        assert session is not None
+        self.assertIn("hello from audio", session.memory.build_context_prompt("again"))
+
+        health = json.loads(self._request("GET", "/health").read())
+        self.assertEqual(health["sessions"], 1)
+        self.assertEqual(health["scheduler"]["llm"], {"slots": 4, "busy": 0, "waiting": 0})
+
+    def test_turns_fold_into_the_summary_and_idle_sessions_expire(self) -> None:
+        settings = replace(
+            testable_settings, summary_background=True, context_window_messages=2, server_session_idle_seconds=60
+        )
+        server = ConversationServer(settings, self.llm_client, self.store)
+        session = server.open_session("folding")
+        for text in ("First.", "Second."):
+            events = list(server.run_turn(session, text=text))
+            self.assertEqual(events[-1]["type"], "done")
+        deadline = time.time() + 5
+        while session.memory.summary_through == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(session.memory.summary, "Hi there. How are you today?")
+
+        self.assertEqual(server.expire_idle(), 0)
+        self.assertEqual(server.expire_idle(now=time.monotonic() + 61), 1)
+        self.assertIsNone(server.session("folding"))
+        assert session.summariser is not None
+        self.assertFalse(session.summariser._thread.is_alive())
+        # The history stays in the store, so the id can be resumed.
+        self.assertEqual(len(self.store.all("folding")), 4)
+        server.close()
+
+    def test_claimed_sessions_survive_expiry_and_empty_uploads_are_rejected(self) -> None:
+        settings = replace(testable_settings, server_session_idle_seconds=60)
+        server = ConversationServer(settings, self.llm_client, self.store)
+        server.open_session("claimed")
+        with server.claim("claimed") as session:
+            self.assertIsNotNone(session)
+            # The reaper runs between the handler's lookup and its turn.
+            self.assertEqual(server.expire_idle(now=time.monotonic() + 61), 0)
+        self.assertIs(server.session("claimed"), session)
+        with server.claim("missing") as missing:
+            self.assertIsNone(missing)
+        server.close()
+
+        session_id = self._open()
+        for headers in ({"Content-Length": "0"}, {"Transfer-Encoding": "chunked"}):
+            body = b"0\r\n\r\n" if "Transfer-Encoding" in headers else b""
+            response = self._request("POST", f"/sessions/{session_id}/turn", body, headers)
+            self.assertEqual(response.status, 400)
+            self.assertEqual(json.loads(response.read()), {"error": "empty audio upload"})
+        self.assertEqual(self.transcriber.seen, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.session_logger import SessionLogger
+
+
+class SessionLoggerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_writes_structured_records_in_background(self) -> None:
+        logger = SessionLogger(directory=str(self.dir), filename="session_test.jsonl", flush_interval=60)
+        logger.append_turn("hi", "hello", timings={"llm": 0.5}, usage={"total_tokens": 12})
+        self.assertFalse(logger.path().exists())  # still batched, waiting on the timer
+        logger.flush()
+        records = [json.loads(line) for line in logger.path().read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["user"], "hi")
+        self.assertEqual(records[0]["assistant"], "hello")
+        self.assertEqual(records[0]["timings"], {"llm": 0.5})
+        self.assertEqual(records[0]["usage"], {"total_tokens": 12})
+        self.assertEqual(records[0]["session"], "session_test")
+        logger.close()
+
+    def test_unserialisable_record_is_dropped_and_flush_returns(self) -> None:
+        logger = SessionLogger(directory=str(self.dir), filename="session_test.jsonl", flush_interval=60)
+        logger.append_turn("bad", "reply", usage={"raw": object()})
+        logger.append_turn("good", "reply")
+        logger.flush()
+        logger.append_turn("later", "reply")
+        logger.flush()
+        users = [json.loads(line)["user"] for line in logger.path().read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(users, ["good", "later"])
+        logger.close()
+
+    def test_rotates_and_compresses_by_size(self) -> None:
+        logger = SessionLogger(directory=str(self.dir), filename="session_test.jsonl", max_bytes=200, batch_size=1)
+        for i in range(5):
+            logger.append_turn(f"question {i}", "x" * 100)
+        logger.close()
+        archives = sorted(self.dir.glob("session_test.*.jsonl.gz"))
+        self.assertGreaterEqual(len(archives), 2)
+        with gzip.open(archives[0], "rt", encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["user"], "question 0")
+
+
+if __name__ == "__main__":
+    unittest.main()
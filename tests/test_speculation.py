@@ -0,0 +1,76 @@
+import socket
+import time
+import unittest
+from unittest.mock import patch
+
+from benchmarks.stub_llm import StubConfig, StubLLMServer
+from src.llm_client import LLMClient, LLMConfig
+from src.metrics import TurnMetrics
+from src.speculation import SpeculativeResponder, normalise_prompt
+
+
+class SpeculativeResponderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stub = StubLLMServer(StubConfig(1000.0, 0.3, "Sure thing.")).start()
+        self.client = LLMClient(LLMConfig(self.stub.endpoint, "stub"))
+        self.metrics = TurnMetrics()
+        self.responder = SpeculativeResponder(
+            self.client, lambda text: f"User: {text}", stable_seconds=0.05, metrics=self.metrics
+        )
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.stub.close()
+
+    def test_stable_partial_is_answered_before_the_final_transcript(self) -> None:
+        self.responder.on_partial("what's the weather")
+        self.responder.on_partial("what's the weather like")
+        time.sleep(0.45)  # stable window + the stub's time to first token
+        started = time.perf_counter()
+        # The final pass only re-punctuated, so the speculative reply is used.
+        reply = "".join(self.responder.complete_stream("User: What's the weather like?"))
+        self.assertEqual(reply, "Sure thing.")
+        self.assertLess(time.perf_counter() - started, 0.15)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertIsNotNone(self.client.last_usage)
+        self.assertEqual(self.responder.counts["hit"], 1)
+
+    def test_changed_final_transcript_is_reissued(self) -> None:
+        self.responder.on_partial("turn on the")
+        time.sleep(0.1)
+        self.responder.on_partial("turn on the lights")  # supersedes the first speculation
+        time.sleep(0.1)
+        reply = "".join(self.responder.complete_stream("User: turn off the lights"))
+        self.assertEqual(reply, "Sure thing.")
+        self.assertEqual(self.stub.requests, 3)
+        self.assertEqual(self.responder.counts, {"hit": 0, "miss": 1, "none": 0, "superseded": 1})
+        self.assertEqual(self.metrics.summary()["events"], {"speculation_miss": 1, "speculation_superseded": 1})
+
+        # No partial at all (e.g. a very short utterance): a plain request.
+        "".join(self.responder.complete_stream("User: hi"))
+        self.assertEqual(self.responder.counts["none"], 1)
+        self.assertIn("1 misses", self.responder.format_stats())
+
+    def test_failed_speculation_counts_as_a_miss_and_is_reissued(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            dead = f"http://127.0.0.1:{sock.getsockname()[1]}/v1/chat/completions"
+        broken = LLMClient(LLMConfig(dead, "stub", max_retries=0))
+        with patch.object(self.client, "view", return_value=broken):
+            self.responder.on_partial("tell me a joke")
+            time.sleep(0.2)
+        reply = "".join(self.responder.complete_stream("User: tell me a joke"))
+        self.assertEqual(reply, "Sure thing.")
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual((self.responder.counts["hit"], self.responder.counts["miss"]), (0, 1))
+        broken.close()
+
+    def test_normalise_prompt_ignores_case_and_punctuation(self) -> None:
+        self.assertEqual(normalise_prompt("Hello, there!"), normalise_prompt("hello there"))
+        messages = [{"role": "user", "content": "Hi."}]
+        self.assertEqual(normalise_prompt(messages), normalise_prompt([{"role": "user", "content": "hi"}]))
+        self.assertNotEqual(normalise_prompt("turn on"), normalise_prompt("turn off"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import threading
+import unittest
+
+from src.startup import format_breakdown, run_parallel
+
+
+class StartupTests(unittest.TestCase):
+    def test_tasks_run_concurrently_and_are_timed(self) -> None:
+        barrier = threading.Barrier(2, timeout=2)
+
+        def task(name: str) -> str:
+            barrier.wait()
+            return name
+
+        results, timings = run_parallel({"a": lambda: task("A"), "b": lambda: task("B")})
+        self.assertEqual(results, {"a": "A", "b": "B"})
+        self.assertEqual(set(timings), {"a", "b"})
+
+    def test_failure_is_raised_after_all_tasks_finish(self) -> None:
+        finished = threading.Event()
+
+        def fail() -> None:
+            raise RuntimeError("no model")
+
+        built: dict = {}
+        with self.assertRaisesRegex(RuntimeError, "no model"):
+            run_parallel({"stt": fail, "tts": finished.set, "llm": lambda: "session"}, results=built)
+        self.assertTrue(finished.is_set())
+        # What did get built is handed back for cleanup.
+        self.assertEqual(built, {"tts": None, "llm": "session"})
+
+    def test_breakdown_lists_slowest_first(self) -> None:
+        line = format_breakdown({"tts": 0.5, "stt": 2.0}, 2.1)
+        self.assertEqual(line, "[SYSTEM] Startup 2.10s: stt 2.00s, tts 0.50s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy
+
+from src.tts_cache import TtsCache, normalize_text
+from src.tts_engine import TtsEngine
+from tests.fixtures import testable_settings
+
+
+class TtsCacheTests(unittest.TestCase):
+    def test_key_normalizes_text_and_covers_parameters(self) -> None:
+        base = TtsCache.key("Hello  there.\n", "voice", length_scale=1.0, volume=1.0)
+        self.assertEqual(base, TtsCache.key(" Hello there.", "voice", volume=1.0, length_scale=1.0))
+        self.assertNotEqual(base, TtsCache.key("Hello there.", "other-voice", length_scale=1.0, volume=1.0))
+        self.assertNotEqual(base, TtsCache.key("Hello there.", "voice", length_scale=1.1, volume=1.0))
+        self.assertEqual(normalize_text("ﬁne\tday "), "fine day")
+
+    def test_disk_tier_is_memory_mapped_and_survives_restart(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TtsCache(Path(tmp), max_memory_bytes=1024, max_disk_bytes=1 << 20)
+            samples = numpy.arange(-50, 50, dtype=numpy.int16)
+            cache.put("a", samples, 22050, 1)
+
+            reopened = TtsCache(Path(tmp), max_memory_bytes=1024, max_disk_bytes=1 << 20)
+            audio = reopened.get("a")
+            assert audio is not None
+            self.assertIsInstance(audio.samples, numpy.memmap)
+            self.assertEqual((audio.sample_rate, audio.channels), (22050, 1))
+            numpy.testing.assert_array_equal(audio.samples, samples)
+            self.assertIsNone(reopened.get("missing"))
+            self.assertEqual(reopened.stats()["hits"], 1)
+            self.assertEqual(reopened.stats()["misses"], 1)
+
+    def test_lru_eviction_by_size(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            chunk = numpy.zeros(100, dtype=numpy.int16)  # 200 bytes (+8 header on disk)
+            cache = TtsCache(Path(tmp), max_memory_bytes=400, max_disk_bytes=420)
+            cache.put("a", chunk, 16000, 1)
+            cache.put("b", chunk, 16000, 1)
+            self.assertIsNotNone(cache.get("a"))  # "a" becomes most recently used
+            cache.put("c", chunk, 16000, 1)
+
+            stats = cache.stats()
+            self.assertEqual(stats["memory_entries"], 2)
+            self.assertEqual(stats["disk_entries"], 2)
+            self.assertFalse((Path(tmp) / "b.pcm").exists())
+            self.assertTrue((Path(tmp) / "a.pcm").exists())
+            self.assertIsNone(cache.get("b"))
+
+
+    def test_engine_builds_the_cache_under_the_user_cache_dir_only_when_tts_is_on(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+            settings = replace(testable_settings, tts_cache_enabled=True, tts_cache_dir="", tts_null_sink=True)
+            disabled = TtsEngine(replace(settings, tts_enabled=False))
+            self.assertIsNone(disabled.cache)
+            self.assertFalse((Path(tmp) / "sottovoce").exists())
+            disabled.close()
+
+            engine = TtsEngine(replace(settings, tts_enabled=True))
+            assert engine.cache is not None
+            self.assertEqual(engine.cache.directory, Path(tmp) / "sottovoce" / "tts")
+            self.assertTrue(engine.cache.directory.is_dir())
+            engine.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import tempfile
+import time
+import unittest
+import wave
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, List
+from unittest.mock import MagicMock
+
+import numpy
+
+from src.tts_engine import SpeechQueue, TtsEngine
+from tests.fixtures import testable_settings
+
+
+class SlowVoice:
+    """Stands in for a PiperVoice: one chunk per call after a fixed inference time."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+
+    def synthesize(self, text: str, syn_config: object = None) -> Iterator[SimpleNamespace]:
+        time.sleep(self.delay)
+        yield SimpleNamespace(
+            audio_float_array=numpy.full(8, len(text) / 100, dtype=numpy.float32), sample_rate=16000, sample_channels=1
+        )
+
+
+def _engine(workers: int) -> TtsEngine:
+    settings = replace(testable_settings, tts_workers=workers, tts_cache_enabled=False, tts_null_sink=True)
+    engine = TtsEngine(settings)
+    engine._voice = SlowVoice()  # type: ignore[assignment]
+    for _ in range(workers if workers > 1 else 0):
+        engine._idle_voices.put(SlowVoice())  # type: ignore[arg-type]
+    engine._player = MagicMock()
+    engine._player.play.return_value = True
+    return engine
+
+
+class ParallelSynthesisTests(unittest.TestCase):
+    def test_queued_sentences_render_in_parallel_and_play_in_order(self) -> None:
+        engine = _engine(workers=3)
+        self.assertGreaterEqual(engine.threads_per_worker, 1)
+        sentences = ["One.", "Sentence two.", "And the third one."]
+        started = time.perf_counter()
+        speech = SpeechQueue(engine, Path("turn.wav"))
+        for sentence in sentences:
+            speech.put(sentence)
+        speech.close()
+        # Three 0.2s syntheses overlap instead of running back to back.
+        self.assertLess(time.perf_counter() - started, 0.45)
+        played: List[int] = [int(call.args[0][0]) for call in engine._player.play.call_args_list]  # type: ignore[attr-defined]
+        expected = [int(numpy.float32(len(s) / 100) * 32767) for s in sentences]
+        self.assertEqual(played, expected)
+        self.assertIsNotNone(engine.last_synthesis)
+        assert engine.last_synthesis is not None
+        self.assertGreater(engine.last_synthesis.inference_seconds, 0.1)
+        engine.close()
+
+    def test_barge_in_drops_sentences_rendered_ahead(self) -> None:
+        engine = _engine(workers=2)
+        engine.prefetch("Never spoken.")
+        engine.stop()
+        self.assertEqual(engine._prefetched, {})
+        engine.close()
+
+    def test_discarded_sentences_are_cancelled_and_forgotten(self) -> None:
+        engine = _engine(workers=2)
+        for text in ("Busy.", "Queued.", "Queued.", "Kept."):
+            engine.prefetch(text)
+        # Two workers: "Busy." and the first "Queued." are rendering, the second is still waiting.
+        queued = engine._prefetched["Queued."][1]
+        engine.discard_prefetched("Queued.")
+        engine.discard_prefetched("Queued.")
+        engine.discard_prefetched("Never prefetched.")
+        self.assertTrue(queued.cancelled())
+        self.assertEqual(sorted(engine._prefetched), ["Busy.", "Kept."])
+        engine.close()
+
+    def test_single_worker_streams_without_a_render_pool(self) -> None:
+        engine = _engine(workers=1)
+        engine.prefetch("Hello there.")
+        self.assertIsNone(engine._render_pool)
+        engine.synthesize("Hello there.", Path("turn.wav"))
+        self.assertEqual(engine._player.play.call_count, 1)  # type: ignore[attr-defined]
+        engine.close()
+
+
+
+class BrokenVoice:
+    def synthesize(self, text: str, syn_config: object = None) -> Iterator[SimpleNamespace]:
+        raise ValueError("voice exploded")
+        yield  # pragma: no cover
+
+
+class RenderToFileTests(unittest.TestCase):
+    def test_writes_a_complete_file_or_nothing(self) -> None:
+        engine = _engine(workers=1)
+        engine._voice = SlowVoice(delay=0)  # type: ignore[assignment]
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "reply.wav"
+            self.assertAlmostEqual(engine.render_to_file("Hello.", out), 8 / 16000)
+            with wave.open(str(out), "rb") as wav:
+                self.assertEqual((wav.getnchannels(), wav.getframerate(), wav.getnframes()), (1, 16000, 8))
+
+            failed = Path(tmp) / "failed.wav"
+            engine._voice = BrokenVoice()  # type: ignore[assignment]
+            with self.assertRaisesRegex(ValueError, "voice exploded"):
+                engine.render_to_file("Hello.", failed)
+            engine._voice = MagicMock(synthesize=MagicMock(return_value=iter(())))
+            with self.assertRaisesRegex(RuntimeError, "no audio"):
+                engine.render_to_file("Hello.", failed)
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["reply.wav"])
+        engine.close()
+
+
+if __name__ == "__main__":
+    unittest.main()